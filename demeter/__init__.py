@@ -27,7 +27,7 @@ from .broker import (
     ActionTypeEnum,
 )
 
-from .core import Actuator
+from .core import Actuator, MultiActuator, ParameterSweep, LoopProfiler
 from .indicator import simple_moving_average, exponential_moving_average, realized_volatility
 from .strategy import (
     Strategy,
@@ -41,4 +41,5 @@ from .strategy import (
     AtTimeTrigger,
     PriceTrigger,
 )
-from .result import BackTestDescription
\ No newline at end of file
+from .result import BackTestDescription
+from .utils import NumericBackend, set_numeric_backend, get_numeric_backend
\ No newline at end of file
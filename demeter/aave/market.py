@@ -2,7 +2,7 @@ import json
 import os
 import token
 from _decimal import Decimal
-from datetime import date, timedelta
+from datetime import date
 from orjson import orjson
 from typing import Dict, List, Set
 
@@ -36,6 +36,7 @@ from .._typing import DECIMAL_0, UnitDecimal, ChainType
 from ..broker import Market, MarketInfo, write_func
 from ..utils import get_formatted_predefined, STYLE, get_formatted_from_dict, console_text
 from ..utils.application import require, float_param_formatter, to_decimal
+from ..utils.loader import iter_days, load_daily_files
 
 DEFAULT_DATA_PATH = "./data"
 
@@ -196,12 +197,12 @@ class AaveV3Market(Market):
         :type end_date: date
         """
         self.logger.info(f"start load files from {start_date} to {end_date}...")
+        csv_converters = {n: to_decimal for n in AaveV3Market.REQUIRED_DATA_COLUMN}
         for token_info in token_info_list:
-            day = start_date
-            df = pd.DataFrame()
             if token_info.address == "":
                 raise DemeterError(f"address of {token_info.name} not set")
-            while day <= end_date:
+            paths = []
+            for day in iter_days(start_date, end_date):
                 path = os.path.join(
                     self.data_path,
                     f"{chain.name.lower()}-aave_v3-{token_info.address}-{day.strftime('%Y-%m-%d')}.minute.csv",
@@ -210,16 +211,10 @@ class AaveV3Market(Market):
                     raise IOError(
                         f"resource file {path} not found, please download with demeter-fetch: https://github.com/zelos-alpha/demeter-fetch"
                     )
-                csv_converters = {n: to_decimal for n in AaveV3Market.REQUIRED_DATA_COLUMN}
-                day_df = pd.read_csv(
-                    path,
-                    converters=csv_converters,
-                    index_col=0,
-                    parse_dates=True,
-                )
-
-                df = pd.concat([df, day_df])
-                day += timedelta(days=1)
+                paths.append(path)
+            df = load_daily_files(
+                paths, lambda p: pd.read_csv(p, converters=csv_converters, index_col=0, parse_dates=True)
+            )
             self.set_token_data(token_info, df)
         self.logger.info("data has been prepared")
 
@@ -301,6 +296,13 @@ class AaveV3Market(Market):
         """
         return Decimal(sum(self.borrows_value.values()))
 
+    @property
+    def is_idle(self) -> bool:
+        """
+        Market is idle when there is no supply and no borrow
+        """
+        return len(self._supplies) == 0 and len(self._borrows) == 0
+
     @property
     def supplies(self) -> Dict[SupplyKey, Supply]:
         """
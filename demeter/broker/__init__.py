@@ -16,6 +16,7 @@ from ._typing import (
     Rule,
     MarketTypeEnum,
     RowData,
+    BarRow,
     BASE_FREQ,
 )
 from .broker import Broker
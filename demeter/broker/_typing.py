@@ -1,4 +1,5 @@
 import json
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -7,7 +8,7 @@ from enum import Enum
 from typing import Generic, NamedTuple, List, Dict, TypeVar, Union
 
 from .._typing import DemeterError, TokenInfo
-from ..utils import to_multi_index_df
+from ..utils import to_multi_index_df, to_number
 
 T = TypeVar("T")
 
@@ -112,9 +113,9 @@ class Asset(object):
         :return:
         :rtype:
         """
-        base = self.balance if self.balance != Decimal(0) else Decimal(amount)
+        base = self.balance if self.balance != 0 else amount
 
-        if base == Decimal(0):  # amount and balance is both 0
+        if base == 0:  # amount and balance is both 0
             return self
         if allow_negative_balance:
             self.balance -= amount
@@ -122,8 +123,8 @@ class Asset(object):
             # if difference between amount and balance is below 0.01%, will deduct all the balance
             # That's because, the amount calculated by v3_core, has some acceptable error.
             if abs((self.balance - amount) / base) < 0.00001:
-                self.balance = Decimal(0)
-            elif self.balance - amount < Decimal(0):
+                self.balance = to_number(0)
+            elif self.balance - amount < 0:
                 raise AssertionError(
                     f"insufficient balance, balance is {self.balance}{self.name}, "
                     f"but sub amount is {amount}{self.name}"
@@ -162,6 +163,9 @@ class ActionTypeEnum(Enum):
     uni_lp_sell = "sell"
     uni_lp_swap = "swap"
     uni_lp_collect = "collect"
+    uni_lp_batch_add_liquidity = "batch_add_liquidity"
+    uni_lp_batch_remove_liquidity = "batch_remove_liquidity"
+    uni_lp_batch_collect = "batch_collect"
     aave_supply = "supply"
     aave_withdraw = "withdraw"
     aave_borrow = "borrow"
@@ -247,6 +251,100 @@ class AccountStatusCommon:
     net_value: Decimal = Decimal(0)
 
 
+class BarRow:
+    """
+    | A row of aligned data in main loop, it's a light weight replacement of pd.Series.
+    | Values can be read or set by label, as attribute or item, e.g. row.closeTick or row["closeTick"].
+    | New labels can not be added. Use to_series to get a pd.Series, which shares values with this row.
+    | It's only used by markets in main loop, strategies get pd.Series from Market.market_status and RowData.
+
+    :param values: values of row
+    :type values: np.ndarray
+    :param loc: label => position in values
+    :type loc: Dict[str, int]
+    :param index: labels of row
+    :type index: pd.Index
+    :param name: name of row, it's timestamp in main loop
+    """
+
+    __slots__ = ("_values", "_loc", "index", "name")
+
+    def __init__(self, values: np.ndarray, loc: Dict[str, int], index: pd.Index, name=None):
+        object.__setattr__(self, "_values", values)
+        object.__setattr__(self, "_loc", loc)
+        object.__setattr__(self, "index", index)
+        object.__setattr__(self, "name", name)
+
+    def __getitem__(self, key):
+        return self._values[self._loc[key]]
+
+    def __setitem__(self, key, value):
+        self._values[self._loc[key]] = value
+
+    def __getattr__(self, name):
+        # slots are not set yet when unpickling
+        if name.startswith("_") or name not in self._loc:
+            raise AttributeError(name)
+        return self._values[self._loc[name]]
+
+    def __setattr__(self, name, value):
+        if name in BarRow.__slots__:
+            object.__setattr__(self, name, value)
+        elif name in self._loc:
+            self._values[self._loc[name]] = value
+        else:
+            raise AttributeError(f"{name} is not in row")
+
+    def __contains__(self, key) -> bool:
+        return key in self._loc
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getstate__(self):
+        return self._values, self._loc, self.index, self.name
+
+    def __setstate__(self, state):
+        for name, value in zip(BarRow.__slots__, state):
+            object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        return repr(self.to_series())
+
+    @property
+    def loc(self) -> "BarRow":
+        """
+        The same as pd.Series.loc for a single label
+        """
+        return self
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    def get(self, key, default=None):
+        i = self._loc.get(key)
+        return default if i is None else self._values[i]
+
+    def keys(self) -> pd.Index:
+        return self.index
+
+    def items(self):
+        return zip(self.index, self._values)
+
+    def copy(self) -> "BarRow":
+        return BarRow(self._values.copy(), self._loc, self.index, self.name)
+
+    def to_series(self) -> pd.Series:
+        """
+        Convert to pd.Series, values are not copied.
+        """
+        return pd.Series(self._values, index=self.index, name=self.name, copy=False)
+
+
 @dataclass
 class MarketStatus:
     """
@@ -256,7 +354,7 @@ class MarketStatus:
     """
 
     timestamp: datetime | None
-    data: pd.Series | None = None
+    data: pd.Series | BarRow | None = None
 
 
 T = TypeVar("T")
@@ -523,12 +621,85 @@ class PositionManager:
         return key in self.positions
 
 
-@dataclass
+class _RowMarketDict(MarketDict):
+    """
+    MarketDict in row data, BarRow values are converted to pd.Series when they are read.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._names: Dict[str, MarketInfo] = {}
+
+    def __getitem__(self, item):
+        value = self.data[item]
+        if isinstance(value, BarRow):
+            value = self.data[item] = value.to_series()
+        return value
+
+    def __setitem__(self, key: MarketInfo, value):
+        if len(self.data) == 0:
+            self._default = key
+        self.data[key] = value
+        self._names[key.name] = key
+
+    def __getattr__(self, name):
+        names = self.__dict__.get("_names")
+        if names is None or name not in names:
+            raise AttributeError(name)
+        return self[names[name]]
+
+    @property
+    def default(self):
+        return self[self._default]
+
+    def items(self):
+        return [(k, self[k]) for k in self.data.keys()]
+
+    def values(self):
+        return [self[k] for k in self.data.keys()]
+
+
 class RowData:
-    timestamp: datetime  # Time of this iteration
-    row_id: int  # index of this iteration, start from 0
-    prices: pd.Series  # price of tokens at this time
-    market_status: MarketDict[Union[pd.Series, pd.DataFrame]] = MarketDict()  # status of markets at this time
+    """
+    | Data of an iteration, it's passed to strategy and triggers.
+    | Prices and market status are kept as BarRow in main loop, they are converted to pd.Series when they are read.
+
+    :param timestamp: time of this iteration
+    :type timestamp: datetime
+    :param row_id: index of this iteration, start from 0
+    :type row_id: int
+    :param prices: price of tokens at this time
+    :type prices: pd.Series | BarRow
+    :param market_status: status of markets at this time
+    :type market_status: MarketDict[Union[pd.Series, pd.DataFrame]]
+    """
+
+    def __init__(
+        self,
+        timestamp: datetime,
+        row_id: int,
+        prices: pd.Series | BarRow,
+        market_status: MarketDict[Union[pd.Series, pd.DataFrame]] | None = None,
+    ):
+        self.timestamp: datetime = timestamp
+        self.row_id: int = row_id
+        self._prices = prices
+        self.market_status: MarketDict[Union[pd.Series, pd.DataFrame]] = (
+            _RowMarketDict() if market_status is None else market_status
+        )
+
+    @property
+    def prices(self) -> pd.Series:
+        if isinstance(self._prices, BarRow):
+            self._prices = self._prices.to_series()
+        return self._prices
+
+    @prices.setter
+    def prices(self, value: pd.Series):
+        self._prices = value
+
+    def __repr__(self):
+        return f"RowData(timestamp={self.timestamp}, row_id={self.row_id})"
 
 
 BASE_FREQ = "1min"
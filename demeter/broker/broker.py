@@ -6,7 +6,7 @@ from typing import Dict, Callable
 from ._typing import Asset, TokenInfo, AccountStatus, MarketDict, AssetDict, BaseAction, MarketTypeEnum
 from .market import Market
 from .._typing import DemeterError, UnitDecimal, STABLE_COINS
-from ..utils import get_formatted_from_dict, get_formatted_predefined, STYLE, float_param_formatter
+from ..utils import get_formatted_from_dict, get_formatted_predefined, STYLE, float_param_formatter, to_number, is_fast_backend
 
 
 class Broker:
@@ -53,6 +53,17 @@ class Broker:
         """
         return self._assets
 
+    @property
+    def is_idle(self) -> bool:
+        """
+        If all the markets are idle, e.g. there is no position in any market,
+        so account status will only change with token prices.
+
+        :return: True if all the markets are idle
+        :rtype: bool
+        """
+        return all(market.is_idle for market in self._markets.values())
+
     # endregion
 
     def __str__(self):
@@ -113,7 +124,7 @@ class Broker:
 
         """
         asset: Asset = self.__add_asset(token)
-        asset.balance = amount
+        asset.balance = to_number(amount)
         return asset
 
     @float_param_formatter
@@ -136,13 +147,13 @@ class Broker:
         else:
             if self.allow_negative_balance:
                 asset: Asset = self.__add_asset(token)
-                asset.balance = 0 - amount
+                asset.balance = to_number(0) - amount
             else:
                 raise DemeterError(f"{token.name} doesn't exist in assets dict")
         return asset
 
     def __add_asset(self, token: TokenInfo) -> Asset:
-        self._assets[token] = Asset(token, 0)
+        self._assets[token] = Asset(token, to_number(0))
         return self._assets[token]
 
     def get_token_balance(self, token: TokenInfo) -> Decimal:
@@ -183,7 +194,7 @@ class Broker:
 
         """
         account_status = AccountStatus(timestamp=timestamp)
-        market_sum = Decimal(0)
+        market_sum = to_number(0)
         for k, v in self.markets.items():
             ms = v.get_market_balance()
             account_status.market_status[k] = ms
@@ -241,6 +252,8 @@ class Broker:
 
         data_length = []  # [1440]
         for market in self.markets.values():
+            if is_fast_backend() and not market.support_fast_backend:
+                raise DemeterError(f"{type(market).__name__} does not support fast numeric backend")
             data_length.append(len(market.data.index))
             market.check_market()  # check each market, including assets
 
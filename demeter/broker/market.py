@@ -5,7 +5,7 @@ from typing import Dict, Callable
 
 import pandas as pd
 
-from ._typing import BaseAction, MarketBalance, MarketStatus, MarketInfo, RowData
+from ._typing import BaseAction, MarketBalance, MarketStatus, MarketInfo, RowData, BarRow
 from .._typing import DECIMAL_0, DemeterError, TokenInfo, USD
 
 DEFAULT_DATA_PATH = "./data"
@@ -19,6 +19,7 @@ def write_func(func):
             raise DemeterError(f"{instance.market_info.name} is not open.")
         ret = func(*args, **kwargs)
         instance.has_update = True
+        instance._version += 1
         return ret
 
     return wrapper_func
@@ -29,6 +30,7 @@ class Market:
 
     | Market is the place to invest your assets.
     | This is an abstract class, you should use subclass instead this one
+    | If a market can calculate in float, set support_fast_backend to True, or it can only run in exact backend.
 
     :param market_info: Key of this market.
     :type market_info: MarketInfo
@@ -38,6 +40,8 @@ class Market:
     :type data_path: str
     """
 
+    support_fast_backend: bool = False
+
     def __init__(self, market_info: MarketInfo, data: pd.DataFrame = None, data_path=DEFAULT_DATA_PATH):
         """
         Initialize a Market
@@ -57,6 +61,9 @@ class Market:
         # so user liquidity will be added to total liquidity in this minute, and get more fee
         # remember set this flag to False after set_market_status
         self.has_update = False
+        # count of changes to market state, it's increased after every write operation,
+        # so values derived from market state can be cached until version changes
+        self._version = 0
         self.open: Callable[[RowData], None] = None
         # if market interval is minutely, is_open will always true,
         # or it will be false until timestamp is on its interval
@@ -116,13 +123,26 @@ class Market:
         """
         pass
 
+    @property
+    def is_idle(self) -> bool:
+        """
+        | If there is nothing in this market which may change with time or price, e.g. no position.
+        | When all the markets are idle, actuator can fast-forward to the next bar which needs strategy callback.
+        | Market which doesn't override this will never be idle.
+        """
+        return False
+
     @property
     def market_status(self):
         """
         Get market status, such as current total liquidity, current apy, etc.
-        In short, it's a row of market.data.
+        In short, it's a row of market.data, data is always a pd.Series.
         """
-        return self._market_status
+        status = self._market_status
+        if isinstance(status.data, BarRow):
+            # market reads BarRow in main loop, users get a pd.Series which shares values with it
+            status.data = status.data.to_series()
+        return status
 
     def set_market_status(
         self,
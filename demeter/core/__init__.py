@@ -3,3 +3,6 @@ Core module of demeter, includes actuator and evaluating indicator
 """
 
 from .actuator import Actuator
+from .multi import MultiActuator
+from .profiler import LoopProfiler
+from .sweep import ParameterSweep
@@ -1,3 +1,4 @@
+import bisect
 import logging
 import os
 import pickle
@@ -5,14 +6,14 @@ import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Union, Tuple
+from typing import Dict, List, Union, Tuple
 
+import numpy as np
 import pandas as pd
-from pandas import Timestamp
 from tqdm import tqdm  # process bar
 
 from .. import Broker, Asset, ActionTypeEnum
-from ..result import BackTestDescription
+from ..result import BackTestDescription, ResultSink
 from .._typing import (
     DemeterError,
     UnitDecimal,
@@ -22,11 +23,16 @@ from .._typing import (
     USD,
     DemeterLog,
 )
-from ..broker import BaseAction, AccountStatus, MarketInfo, MarketDict, MarketStatus, RowData
-from ..strategy import Strategy
+from .checkpoint import Checkpoint, detached_data, load_checkpoint, save_checkpoint
+from .cursor import BarCursor
+from .profiler import LoopProfiler
+from .recorder import AccountStatusRecorder
+from ..broker import BaseAction, AccountStatus, MarketInfo, MarketDict, RowData, BarRow
+from ..strategy import Strategy, TriggerScheduler
 from ..uniswap import PositionInfo
 from ..utils import console_text
 from ..utils import get_formatted_predefined, STYLE, to_decimal, to_multi_index_df
+from ..utils import NumericBackend, set_numeric_backend, is_fast_backend, to_number
 
 BASIC_INTERVAL = pd.Timedelta("1min")
 
@@ -42,18 +48,32 @@ class Actuator(object):
 
     :param allow_negative_balance: Allow cash balance of broker can be negative value or not. Default is False
     :type allow_negative_balance: bool
+    :param numeric_backend: Number type in calculation, exact(Decimal) or fast(float). It's set globally, and should be set before loading data. If leave to None, current backend will be kept. Default is exact.
+    :type numeric_backend: NumericBackend | str | None
+    :param fast_forward: Skip iterations when there is no position in any market and strategy is idle(see Strategy.idle_until), account status of skipped iterations will be filled in bulk. Default is False
+    :type fast_forward: bool
+    :param profile: Time each phase of main loop, report can be got from profile_report after back test. Default is False
+    :type profile: bool
     """
 
-    def __init__(self, allow_negative_balance=False):
+    def __init__(
+        self,
+        allow_negative_balance=False,
+        numeric_backend: NumericBackend | str | None = None,
+        fast_forward: bool = False,
+        profile: bool = False,
+    ):
         """
         init Actuator
         """
+        if numeric_backend is not None:
+            set_numeric_backend(numeric_backend)
         # all the actions during the test(buy/sell/add liquidity)
         self._action_list: List[BaseAction] = []
         self._logs: List[DemeterLog] = []
         self._currents = Currents()
-        # broker status in every bar, use array for performance
-        self._account_status_list: List[AccountStatus] = []
+        # broker status in every bar, kept in columns for performance
+        self._account_status_list: AccountStatusRecorder = AccountStatusRecorder()
         self._account_status_df: pd.DataFrame | None = None
 
         # broker
@@ -73,6 +93,19 @@ class Actuator(object):
         self.init_account_status = None
         # set backtest with other freq to make it faster, freq should be larger than 1 minute
         self.interval: str = "1min"
+        # skip idle iterations
+        self.fast_forward: bool = fast_forward
+        # time phases of main loop, set to a LoopProfiler to customize sampling
+        self.profiler: LoopProfiler | None = LoopProfiler() if profile else None
+        # save a checkpoint to checkpoint_path every checkpoint_every rows, 0 to disable
+        self.checkpoint_every: int = 0
+        self.checkpoint_path: str | None = None
+        # write account status and actions to disk during back test
+        self.result_sink: ResultSink | None = None
+        self.__sink_rows = 0  # rows of account status which have been written to sink
+        self.__sink_actions = 0  # position in action list, actions before it have been written to sink
+        # columns of market data before strategy initialized, columns added later will be saved in checkpoint
+        self.__initial_columns: Dict[MarketInfo, set] = {}
 
     def _record_action_list(self, action: BaseAction):
         """
@@ -89,9 +122,9 @@ class Actuator(object):
 
     # region property
     @property
-    def account_status(self) -> List[AccountStatus]:
+    def account_status(self) -> AccountStatusRecorder:
         """
-        | Get account status list.
+        | Get account status list. It can be visited like List[AccountStatus].
         | Account status includes balances, net values and positions.
         | Each element in this list stands for one minute.
         | It is good to call it during backtest.
@@ -119,6 +152,18 @@ class Actuator(object):
         """
         return self._token_prices
 
+    @property
+    def profile_report(self) -> pd.DataFrame | None:
+        """
+        | Time spent in each phase of main loop, indexed by phase and market.
+        | Columns are calls, total(seconds), mean_us(microseconds) and percent.
+        | It's None if profiler is not enabled.
+
+        :return: timing report
+        :rtype: pd.DataFrame | None
+        """
+        return None if self.profiler is None else self.profiler.report()
+
     @property
     def final_status(self) -> AccountStatus:
         """
@@ -129,7 +174,7 @@ class Actuator(object):
         :rtype: AccountStatus
         """
         if self.__backtest_finished:
-            return self._account_status_list[len(self._account_status_list) - 1]
+            return self._account_status_list[-1]
         else:
             raise DemeterError("please run strategy first")
 
@@ -140,7 +185,7 @@ class Actuator(object):
 
         self._action_list = []
         self._currents = Currents()
-        self._account_status_list = []
+        self._account_status_list = AccountStatusRecorder()
         self.__backtest_finished = False
 
         self._account_status_df: pd.DataFrame | None = None
@@ -204,7 +249,7 @@ class Actuator(object):
                 )
             self.__runnning_count.get_account_status_df += 1
 
-            self._account_status_df = AccountStatus.to_dataframe(self._account_status_list)
+            self._account_status_df = self._account_status_list.to_dataframe()
         return self._account_status_df
 
     @account_status_df.setter
@@ -266,8 +311,12 @@ class Actuator(object):
             quote_token = quote_token if quote_token is not None else USD
             prices = pd.DataFrame(data=prices, index=prices.index)
 
-        prices = prices.map(lambda y: to_decimal(y))
-        prices[USD.name] = 1
+        if is_fast_backend():
+            prices = prices.astype(float)
+            prices[USD.name] = 1.0
+        else:
+            prices = prices.map(lambda y: to_decimal(y))
+            prices[USD.name] = 1
         if self._token_prices is None:
             self._token_prices = prices
         else:
@@ -333,25 +382,174 @@ class Actuator(object):
     def _log(self, timestamp: datetime, message: str, level: int = logging.INFO):
         self._logs.append(DemeterLog(timestamp, message, level))
 
-    def __get_row_data(self, timestamp, row_id, current_price) -> RowData:
-        row_data = RowData(timestamp.to_pydatetime(), row_id, current_price)
+    def __get_row_data(self, timestamp: datetime, row_id, current_price) -> RowData:
+        row_data = RowData(timestamp, row_id, current_price)
         for market_info, market in self.broker.markets.items():
-            row_data.market_status[market_info] = market.market_status.data
+            row_data.market_status[market_info] = market._market_status.data
         row_data.market_status.set_default_key(self.broker.markets.get_default_key())
         return row_data
 
-    def __set_market_timestamp(self, timestamp: Timestamp, update: bool = False):
+    def __set_market_timestamp(
+        self,
+        cursor: BarCursor,
+        row_id: int,
+        price: BarRow,
+        update: bool = False,
+        profiler: LoopProfiler | None = None,
+    ):
         """
         set markets row data
-        :param timestamp:
+        :param cursor: aligned data of this back test
+        :param row_id: position of current row
+        :param price: token prices of current row
         :param update: enable or disable has_update flag in markets, if set to false, will always update, if set to true, just update when necessary
+        :param profiler: time each market if set
         :return:
         """
 
-        for market_key in self.broker.markets.keys():
-            if (not update) or (update and self._broker.markets[market_key].has_update):
-                ms = MarketStatus(timestamp, None)
-                self._broker.markets[market_key].set_market_status(ms, self._token_prices.loc[timestamp])
+        for market_key, market in self._broker.markets.items():
+            if (not update) or (update and market.has_update):
+                market.set_market_status(cursor.market_status(market_key, row_id), price)
+                if profiler is not None:
+                    profiler.lap("set_market_status", market_key.name)
+
+    def __fast_forward(self, cursor: BarCursor, row_id: int, row_data: RowData, scheduler: TriggerScheduler) -> int:
+        """
+        If all the markets are idle, skip iterations until strategy needs callback or a trigger is due.
+        Account status of skipped rows is calculated from token balances and price arrays.
+
+        :param cursor: aligned data of this back test
+        :param row_id: position of current row, its account status has been recorded
+        :param row_data: data of current row
+        :param scheduler: trigger scheduler
+        :return: count of skipped rows
+        """
+        if not self._broker.is_idle or any(m.open is not None for m in self._broker.markets.values()):
+            return 0
+        idle_until = self._strategy.idle_until(row_data)
+        if idle_until is None:
+            return 0
+        next_check = scheduler.next_check_time(row_data.timestamp)
+        if next_check is not None:
+            idle_until = min(idle_until, next_check)
+        # rows before stop are skipped
+        stop = bisect.bisect_left(cursor.datetimes, idle_until, lo=row_id + 1)
+        if stop <= row_id + 1:
+            return 0
+        start = row_id + 1
+
+        # the same to Broker.get_account_status, balances will not change in idle rows
+        last_status = self._account_status_list[-1]
+        asset_sum = 0
+        for token, balance in last_status.asset_balances.items():
+            asset_sum = asset_sum + balance * cursor.price_array(token.name, start, stop)
+        market_sum = to_number(0)
+        for market_key, market in self._broker.markets.items():
+            net_value = last_status.market_status[market_key].net_value
+            if market.quote_token == self._broker.quote_token:
+                market_sum = market_sum + net_value
+            else:
+                market_sum = market_sum + net_value * cursor.price_array(market.quote_token.name, start, stop)
+        net_values = asset_sum + market_sum
+        if not isinstance(net_values, np.ndarray):
+            net_values = np.full(stop - start, net_values)
+        self._account_status_list.repeat_last(cursor.datetimes[start:stop], net_values)
+        # market status of previous row is used in next row, e.g. last_tick of uniswap market
+        self.__set_market_timestamp(cursor, stop - 1, cursor.price(stop - 1), False)
+        return stop - start
+
+    def __with_price(self, account_status_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        append token prices to account status dataframe
+        """
+        tmp_price_df = (
+            self._token_prices.drop(columns=[USD.name])
+            .loc[account_status_df.index[0] : account_status_df.index[-1]]
+            .reindex(account_status_df.index)
+        )
+        to_multi_index_df(tmp_price_df, "price")
+        return pd.concat([account_status_df, tmp_price_df], axis=1, copy=False)
+
+    def __write_sink(self, force: bool):
+        """
+        Write account status and actions to sink when a chunk is full.
+
+        :param force: write even if chunk is not full, used at the end of back test
+        """
+        sink = self.result_sink
+        recorder = self._account_status_list
+        if len(recorder) == self.__sink_rows or (not force and len(recorder) - self.__sink_rows < sink.chunk_size):
+            return
+        sink.write_account_status(self.__with_price(recorder.to_dataframe(self.__sink_rows)))
+        self.__sink_rows = len(recorder)
+        sink.write_actions(self._action_list[self.__sink_actions :])
+        # actions are kept, they are used by strategy and saved in result
+        self.__sink_actions = len(self._action_list)
+        if not sink.keep_in_memory:
+            # keep the last row, it's used by fast-forward and final_status
+            recorder.release(1)
+
+    def __save_checkpoint(self, cursor: BarCursor, row_id: int, scheduler: TriggerScheduler):
+        """
+        Save state of back test before a row
+
+        :param cursor: aligned data of this back test
+        :param row_id: position of next row
+        :param scheduler: trigger scheduler
+        """
+        if self.checkpoint_path is None:
+            raise DemeterError("checkpoint_path is not set")
+        added_columns = {}
+        for market_key, market in self._broker.markets.items():
+            columns = [c for c in market.data.columns if c not in self.__initial_columns.get(market_key, set())]
+            if len(columns) > 0:
+                added_columns[market_key.name] = market.data[columns]
+        # profiler may have hooks which can not be pickled, and it's not part of back test state.
+        profiler = self.profiler
+        self.profiler = None
+        try:
+            with detached_data(self):
+                checkpoint = Checkpoint(self, scheduler, row_id, cursor.datetimes[row_id], added_columns)
+                save_checkpoint(checkpoint, self.checkpoint_path)
+        finally:
+            self.profiler = profiler
+
+    def __restore(self, checkpoint: Checkpoint):
+        """
+        Load state from checkpoint, market data and prices of this actuator are kept.
+
+        :param checkpoint: checkpoint to load
+        """
+        saved: Actuator = checkpoint.actuator
+        markets = self._broker.markets
+        for market_key, market in saved.broker.markets.items():
+            if market_key not in markets:
+                raise DemeterError(f"Market {market_key.name} in checkpoint is not found")
+            data = markets[market_key].data
+            if market_key.name in checkpoint.added_columns:
+                added = checkpoint.added_columns[market_key.name]
+                for column in added.columns:
+                    if column not in data.columns:
+                        data[column] = added[column]
+            market._data = data
+        # keep settings of this run
+        settings = {
+            "profiler": self.profiler,
+            "checkpoint_every": self.checkpoint_every,
+            "checkpoint_path": self.checkpoint_path,
+            "fast_forward": self.fast_forward,
+            "print_action": self.print_action,
+        }
+        prices = self._token_prices
+        self.__dict__.update(saved.__dict__)
+        self.__dict__.update(settings)
+        self._token_prices = prices
+        market_datas = MarketDict()
+        for k, v in self._broker.markets.items():
+            market_datas[k] = v.data
+        market_datas.set_default_key(self._broker.markets.get_default_key())
+        self._strategy.data = market_datas
+        self._strategy.prices = self._token_prices
 
     def get_test_range(self):
         longest_data = max(map(lambda m: len(m.data.index.get_level_values(0).unique()), self._broker.markets.values()))
@@ -370,7 +568,7 @@ class Actuator(object):
             market._resample(self.interval)
         return pd.Series(0, index=index_array).resample(self.interval).first().index
 
-    def run(self, print_result: bool = True):
+    def run(self, print_result: bool = True, resume_from: str | None = None):
         """
         Start back test, the whole process including:
 
@@ -388,89 +586,188 @@ class Actuator(object):
         * run strategy.finalize()
         * output result if required
 
+        | If checkpoint_every and checkpoint_path are set, state of back test will be saved periodically.
+        | To resume, set up markets, data and prices the same as the original actuator, then run with resume_from.
+        | Balances, positions, strategy, triggers, account status and actions will be loaded from checkpoint.
+
         :param print_result: If true, print backtest result to console.
         :type print_result: bool
+        :param resume_from: path of a checkpoint to resume from
+        :type resume_from: str
+        """
+        state = self._start_run(resume_from)
+        with tqdm(total=len(state.cursor), initial=state.row_id, ncols=150) as pbar:
+            while state.row_id < len(state.cursor):
+                pbar.update(self._run_row(state, state.cursor.price(state.row_id)))
+        self._finish_run(print_result)
+
+    def _start_run(self, resume_from: str | None = None, cursor: BarCursor | None = None) -> "RunState":
+        """
+        Prepare a back test, initialize strategy or load state from checkpoint.
+
+        :param resume_from: path of a checkpoint to resume from
+        :type resume_from: str
+        :param cursor: aligned data shared with other actuators, if it's set, index and data will not be prepared again
+        :type cursor: BarCursor
+        :return: state of main loop
+        :rtype: RunState
         """
-        self.__start_time = time.time()  # 1681718968.267463
-        self.reset()
+        start_time = time.time()  # 1681718968.267463
+        checkpoint = load_checkpoint(resume_from) if resume_from is not None else None
+        if checkpoint is None:
+            self.reset()
 
         self._check_backtest()
-        index_array: pd.DatetimeIndex = (
-            self.get_test_range()
-        )  # list(self._broker.markets.values())[0].data.index.get_level_values(0).unique()
-        if self.interval != "1min":
-            self.logger.info(f"Interval is {self.interval}, resampling data...")
-            index_array = self.switch_interval(index_array)
+        if cursor is None:
+            index_array: pd.DatetimeIndex = (
+                self.get_test_range()
+            )  # list(self._broker.markets.values())[0].data.index.get_level_values(0).unique()
+            if self.interval != "1min":
+                self.logger.info(f"Interval is {self.interval}, resampling data...")
+                index_array = self.switch_interval(index_array)
+        else:
+            index_array = cursor.index
         self.logger.info(f"Qute token is {self.broker.quote_token}")
-        self.logger.info("init strategy...")
-
-        # set initial status for strategy, so user can run some calculation in initial function.
-        self.__set_market_timestamp(index_array[0], False)
-        self._currents.timestamp = index_array[0].to_pydatetime()
-        # keep initial balance for evaluating
-        self.init_account_status = self._broker.get_account_status(
-            self._token_prices.head(1).iloc[0], index_array[0].to_pydatetime()
-        )
-        self.init_strategy()
-        row_id = 0
-        data_length = len(index_array)
+        if checkpoint is None:
+            self.logger.info("init strategy...")
+            # line up data of markets and prices, so rows can be read by position in main loop
+            if cursor is None:
+                cursor = BarCursor(index_array, self._token_prices, self._broker.markets)
+            # set initial status for strategy, so user can run some calculation in initial function.
+            self.__set_market_timestamp(cursor, 0, cursor.price(0), False)
+            self._currents.timestamp = cursor.datetimes[0]
+            # keep initial balance for evaluating
+            self.init_account_status = self._broker.get_account_status(
+                self._token_prices.head(1).iloc[0], cursor.datetimes[0]
+            )
+            sink = self.result_sink
+            bounded = sink is not None and not sink.keep_in_memory
+            self._account_status_list = AccountStatusRecorder(sink.chunk_size + 1 if bounded else len(cursor))
+            self.__sink_rows = self.__sink_actions = 0
+            if sink is not None:
+                sink.open()
+            self.__initial_columns = {k: set(m.data.columns) for k, m in self._broker.markets.items()}
+            self.init_strategy()
+            # columns might be replaced in initialize, e.g. indicators
+            cursor.refresh()
+            scheduler = TriggerScheduler(self._strategy)
+            start_row = 0
+        else:
+            self.logger.info(f"resume from {checkpoint.timestamp}...")
+            self.__restore(checkpoint)
+            if cursor is None:
+                cursor = BarCursor(index_array, self._token_prices, self._broker.markets)
+            if checkpoint.row_id > len(cursor) or (
+                checkpoint.row_id < len(cursor) and cursor.datetimes[checkpoint.row_id] != checkpoint.timestamp
+            ):
+                raise DemeterError("Checkpoint doesn't match test range of market data")
+            scheduler = checkpoint.scheduler
+            start_row = checkpoint.row_id
+            if self.result_sink is not None:
+                self.result_sink.resume()
+        self.__start_time = start_time
+        if self.profiler is not None:
+            self.profiler.reset()
         self.logger.info("start main loop...")
-        with tqdm(total=data_length, ncols=150) as pbar:
-            for timestamp_index in index_array:
-                current_price = self._token_prices.loc[timestamp_index]
-                # prepare data of a row
-
-                self.__set_market_timestamp(timestamp_index, False)
-                # execute strategy, and some calculate
-                self._currents.timestamp = timestamp_index.to_pydatetime()
-                row_data = self.__get_row_data(timestamp_index, row_id, current_price)
-                if self._strategy.triggers:
-                    for trigger in self._strategy.triggers:
-                        if trigger.when(row_data):
-                            trigger.do(row_data)
-                # remove outdate triggers
-                self._strategy.triggers = [
-                    x for x in self._strategy.triggers if not x.is_out_date(self._currents.timestamp)
-                ]
-                for market in self.broker.markets.values():
-                    if market.is_open and market.open is not None:
-                        market.open(row_data)
-
-                self._strategy.on_bar(row_data)
-
-                # important, take uniswap market for example,
-                # if liquidity has changed in the head of this minute,
-                # this will add the new liquidity to total_liquidity in current minute.
-                self.__set_market_timestamp(timestamp_index, True)
-
-                # update broker status, e.g. re-calculate fee
-                # and read the latest status from broker
-                for market in self._broker.markets.values():
-                    market.update()
-
-                row_data = self.__get_row_data(timestamp_index, row_id, current_price)
-                self._strategy.after_bar(row_data)
-
-                self._account_status_list.append(
-                    self._broker.get_account_status(current_price, timestamp_index.to_pydatetime())
-                )
-                # notify actions in current loop
-                self.notify(self.strategy, self._currents.actions)
-                self._currents.actions = []
-                # move forward for process bar and index
-                pbar.update()
-                row_id += 1
+        return RunState(cursor, scheduler, start_row, start_row + self.checkpoint_every)
+
+    def _run_row(self, state: "RunState", current_price: BarRow) -> int:
+        """
+        Process a row in main loop, then move state to next row
+
+        :param state: state of main loop
+        :type state: RunState
+        :param current_price: token prices of current row
+        :type current_price: BarRow
+        :return: count of rows processed, it's larger than 1 if idle rows are skipped
+        :rtype: int
+        """
+        cursor = state.cursor
+        scheduler = state.scheduler
+        row_id = state.row_id
+        # profiler calls are guarded by None check, so it costs nothing when disabled
+        profiler = self.profiler
+        current_time = cursor.datetimes[row_id]
+        if profiler is not None:
+            profiler.start_row(row_id, current_time)
+        # prepare data of a row
+
+        self.__set_market_timestamp(cursor, row_id, current_price, False, profiler)
+        # execute strategy, and some calculate
+        self._currents.timestamp = current_time
+        row_data = self.__get_row_data(current_time, row_id, current_price)
+        if profiler is not None:
+            profiler.lap("row_data")
+        # run due triggers, and remove outdate triggers
+        scheduler.run(row_data)
+        if profiler is not None:
+            profiler.lap("triggers")
+        for market_key, market in self.broker.markets.items():
+            if market.is_open and market.open is not None:
+                market.open(row_data)
+                if profiler is not None:
+                    profiler.lap("open", market_key.name)
+
+        self._strategy.on_bar(row_data)
+        if profiler is not None:
+            profiler.lap("on_bar")
+
+        # important, take uniswap market for example,
+        # if liquidity has changed in the head of this minute,
+        # this will add the new liquidity to total_liquidity in current minute.
+        self.__set_market_timestamp(cursor, row_id, current_price, True, profiler)
+
+        # update broker status, e.g. re-calculate fee
+        # and read the latest status from broker
+        for market_key, market in self._broker.markets.items():
+            market.update()
+            if profiler is not None:
+                profiler.lap("update", market_key.name)
+
+        row_data = self.__get_row_data(current_time, row_id, current_price)
+        self._strategy.after_bar(row_data)
+        if profiler is not None:
+            profiler.lap("after_bar")
+
+        self._account_status_list.append(self._broker.get_account_status(current_price, current_time))
+        if profiler is not None:
+            profiler.lap("account_status")
+        # notify actions in current loop
+        self.notify(self.strategy, self._currents.actions)
+        self._currents.actions = []
+        if profiler is not None:
+            profiler.lap("notify")
+        # move forward for process bar and index
+        skipped = self.__fast_forward(cursor, row_id, row_data, scheduler) if self.fast_forward else 0
+        if profiler is not None and self.fast_forward:
+            profiler.lap("fast_forward")
+        if self.result_sink is not None:
+            self.__write_sink(False)
+            if profiler is not None:
+                profiler.lap("sink")
+        if profiler is not None:
+            profiler.end_row()
+        state.row_id = row_id + 1 + skipped
+        if 0 < self.checkpoint_every and state.next_checkpoint <= state.row_id < len(cursor):
+            self.__save_checkpoint(cursor, state.row_id, scheduler)
+            state.next_checkpoint = state.row_id + self.checkpoint_every
+        return 1 + skipped
+
+    def _finish_run(self, print_result: bool):
+        """
+        Collect result after main loop finished, then finalize strategy
 
+        :param print_result: If true, print backtest result to console.
+        :type print_result: bool
+        """
         self.logger.info("main loop finished")
-        self._account_status_df: pd.DataFrame = AccountStatus.to_dataframe(self._account_status_list)
-
-        tmp_price_df = (
-            self._token_prices.drop(columns=[USD.name])
-            .loc[self._account_status_df.index[0] : self._account_status_df.index[-1]]
-            .reindex(self._account_status_df.index)
-        )
-        to_multi_index_df(tmp_price_df, "price")
-        self._account_status_df = pd.concat([self._account_status_df, tmp_price_df], axis=1)
+        if self.result_sink is not None:
+            self.__write_sink(True)
+            self.result_sink.close()
+        if self.result_sink is not None and not self.result_sink.keep_in_memory:
+            self._account_status_df = self.result_sink.read_account_status()
+        else:
+            self._account_status_df = self.__with_price(self._account_status_list.to_dataframe())
 
         self._strategy.finalize()
         self.__backtest_finished = True
@@ -548,6 +845,12 @@ class Actuator(object):
 
         file_list.append(pkl_name)
 
+        # save timing report
+        if self.profiler is not None and self.profiler.rows > 0:
+            profile_name = os.path.join(path, file_name_head + ".profile.csv")
+            self.profiler.report().to_csv(profile_name)
+            file_list.append(profile_name)
+
         self.logger.info(f"files have saved to {','.join(file_list)}")
         return file_list
 
@@ -595,6 +898,27 @@ class Actuator(object):
         )
 
 
+@dataclass
+class RunState:
+    """
+    State of main loop in a back test
+
+    :param cursor: aligned data of this back test
+    :type cursor: BarCursor
+    :param scheduler: trigger scheduler
+    :type scheduler: TriggerScheduler
+    :param row_id: position of next row to process
+    :type row_id: int
+    :param next_checkpoint: position of row to save next checkpoint
+    :type next_checkpoint: int
+    """
+
+    cursor: BarCursor
+    scheduler: TriggerScheduler
+    row_id: int
+    next_checkpoint: int
+
+
 @dataclass
 class Currents:
     """
@@ -0,0 +1,142 @@
+import io
+import os
+import pickle
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict
+
+import pandas as pd
+
+from .._typing import DemeterError
+
+CHECKPOINT_VERSION = 1
+
+
+@contextmanager
+def detached_data(actuator):
+    """
+    Temporarily remove market data and token prices from actuator and its strategy,
+    so actuator can be pickled in a small size. They will be restored after leaving this context.
+
+    :param actuator: actuator to detach
+    :type actuator: Actuator
+    """
+    markets = actuator.broker.markets
+    market_data = {k: m._data for k, m in markets.items()}
+    prices = actuator._token_prices
+    strategy = actuator._strategy
+    strategy_data = (strategy.data, strategy.prices) if strategy is not None else None
+    try:
+        for market in markets.values():
+            market._data = None
+        actuator._token_prices = None
+        if strategy is not None:
+            strategy.data = None
+            strategy.prices = None
+        yield
+    finally:
+        for k, m in markets.items():
+            m._data = market_data[k]
+        actuator._token_prices = prices
+        if strategy is not None:
+            strategy.data, strategy.prices = strategy_data
+
+
+class _FloatPickler(pickle.Pickler):
+    """
+    Pickler which saves Decimal as float, so the object can work in fast numeric backend after it's unpickled.
+    """
+
+    def reducer_override(self, obj):
+        if isinstance(obj, Decimal):
+            return float, (float(obj),)
+        return NotImplemented
+
+
+def pickle_without_data(actuator, to_float: bool = False) -> bytes:
+    """
+    Pickle actuator without market data, token prices and strategy, it can be used as a template of actuators.
+    Data should be attached after it is unpickled.
+
+    :param actuator: actuator to pickle
+    :type actuator: Actuator
+    :param to_float: save Decimal values(e.g. balances) as float, so the template can run in fast numeric backend
+    :type to_float: bool
+    :return: pickled actuator
+    :rtype: bytes
+    """
+    with detached_data(actuator):
+        strategy = actuator._strategy
+        try:
+            actuator._strategy = None
+            if not to_float:
+                return pickle.dumps(actuator, protocol=pickle.HIGHEST_PROTOCOL)
+            buffer = io.BytesIO()
+            _FloatPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(actuator)
+            return buffer.getvalue()
+        finally:
+            actuator._strategy = strategy
+
+
+@dataclass
+class Checkpoint:
+    """
+    | State of a back test at the beginning of a row, it's saved by actuator periodically to resume back test.
+    | Market data and prices are not included, they will be taken from the actuator which resumes.
+
+    :param actuator: actuator without data, includes broker, markets, strategy, triggers, account status and actions
+    :type actuator: Actuator
+    :param scheduler: trigger scheduler
+    :type scheduler: TriggerScheduler
+    :param row_id: position of next row to process
+    :type row_id: int
+    :param timestamp: time of next row to process
+    :type timestamp: datetime
+    :param added_columns: columns added to market data during back test(e.g. by strategy.add_column), key is market name
+    :type added_columns: Dict[str, pd.DataFrame]
+    """
+
+    actuator: object
+    scheduler: object
+    row_id: int
+    timestamp: datetime
+    added_columns: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    version: int = CHECKPOINT_VERSION
+
+
+def save_checkpoint(checkpoint: Checkpoint, path: str):
+    """
+    Save checkpoint to file. It's written to a temporary file first, so the last checkpoint is kept if writing fails.
+
+    :param checkpoint: checkpoint to save
+    :type checkpoint: Checkpoint
+    :param path: file path
+    :type path: str
+    """
+    folder = os.path.dirname(path)
+    if folder != "" and not os.path.exists(folder):
+        os.makedirs(folder)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    """
+    Load checkpoint from file
+
+    :param path: file path
+    :type path: str
+    :return: checkpoint
+    :rtype: Checkpoint
+    """
+    if not os.path.exists(path):
+        raise DemeterError(f"checkpoint {path} doesn't exist")
+    with open(path, "rb") as f:
+        checkpoint = pickle.load(f)
+    if not isinstance(checkpoint, Checkpoint) or checkpoint.version != CHECKPOINT_VERSION:
+        raise DemeterError(f"{path} is not a valid checkpoint")
+    return checkpoint
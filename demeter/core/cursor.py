@@ -0,0 +1,196 @@
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .._typing import DemeterError
+from ..broker import MarketInfo, MarketDict, Market, MarketStatus, BarRow
+
+
+class _AlignedFrame:
+    """
+    | Rows of a dataframe, aligned to the test index.
+    | Columns are kept as views of dataframe, so the frame is not copied, and values changed in place can be read.
+    | Rows are read as BarRow, or pd.Series if columns are MultiIndex(e.g. aave market).
+    """
+
+    def __init__(self, df: pd.DataFrame, index: pd.DatetimeIndex):
+        self.columns = df.columns
+        self.arrays: List[np.ndarray] = [df.iloc[:, i].to_numpy() for i in range(len(df.columns))]
+        dtypes = {a.dtype for a in self.arrays}
+        self.dtype = dtypes.pop() if len(dtypes) == 1 else np.dtype(object)
+        # numbers in numpy array are read as python scalar, if they are put in a row of object
+        self._to_scalar = [self.dtype == object and a.dtype.kind in "biuf" for a in self.arrays]
+        # position of each test timestamp in df, -1 if timestamp is not in df
+        self.positions: np.ndarray = df.index.get_indexer(index)
+        self.lightweight = not isinstance(df.columns, pd.MultiIndex)
+        self.loc: Dict[str, int] = {c: i for i, c in enumerate(df.columns)} if self.lightweight else {}
+
+    def is_view_of(self, df: pd.DataFrame) -> bool:
+        """
+        Check if columns are still views of df, they will be not if columns are added or replaced.
+        """
+        if df.columns is not self.columns:
+            return False
+        for i, array in enumerate(self.arrays):
+            current = df.iloc[:, i].to_numpy()
+            if current.dtype != array.dtype or current.ctypes.data != array.ctypes.data:
+                return False
+        return True
+
+    def column(self, name: str, positions: np.ndarray) -> np.ndarray:
+        """
+        Read values of a column at positions
+        """
+        i = self.columns.get_loc(name)
+        values = self.arrays[i][positions]
+        return values.astype(object) if self._to_scalar[i] else values
+
+    def row(self, row_id: int, timestamp) -> BarRow | pd.Series | None:
+        """
+        Read a row, values are copied from columns.
+        """
+        pos = self.positions[row_id]
+        if pos < 0:
+            return None
+        values = np.empty(len(self.arrays), dtype=self.dtype)
+        values[:] = [a[pos].item() if s else a[pos] for a, s in zip(self.arrays, self._to_scalar)]
+        if self.lightweight:
+            return BarRow(values, self.loc, self.columns, timestamp)
+        return pd.Series(values, index=self.columns, name=timestamp, copy=False)
+
+
+class BarCursor:
+    """
+    | Pre-aligned data of a back test.
+    | Before main loop starts, data of every market and token prices are lined up on test index,
+    | then row of each iteration can be read by its position. This is much faster than looking up by timestamp label.
+    | Markets whose data is not indexed by a unique DatetimeIndex(e.g. deribit option market) are not aligned,
+    | those markets will read data by timestamp themselves.
+
+    :param index: timestamps of back test
+    :type index: pd.DatetimeIndex
+    :param prices: price of tokens
+    :type prices: pd.DataFrame
+    :param markets: markets in this back test
+    :type markets: MarketDict[Market]
+    """
+
+    def __init__(self, index: pd.DatetimeIndex, prices: pd.DataFrame, markets: MarketDict[Market]):
+        self._index: pd.DatetimeIndex = index
+        self.timestamps: List[pd.Timestamp] = list(index)
+        self.datetimes: List[datetime] = list(index.to_pydatetime())
+        if not prices.index.is_unique:
+            raise DemeterError("Index of price dataframe has duplicated timestamps")
+        self._prices = _AlignedFrame(prices, index)
+        missing = np.flatnonzero(self._prices.positions < 0)
+        if len(missing) > 0:
+            raise DemeterError(f"Price of {self.timestamps[missing[0]]} is not found")
+        self._prices_df = prices
+        self._markets: MarketDict[Market] = markets
+        self._frames: Dict[MarketInfo, _AlignedFrame | None] = {}
+        for market_key, market in markets.items():
+            self._frames[market_key] = self.__align_market(market)
+        # rows of last read position, they are shared by all the reads of the same row
+        self._row_id = -1
+        self._price_row: BarRow | None = None
+        self._rows: Dict[MarketInfo, BarRow | pd.Series | None] = {}
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """
+        Timestamps of back test
+        """
+        return self._index
+
+    def __align_market(self, market: Market) -> _AlignedFrame | None:
+        data = market.data
+        if (
+            not isinstance(data, pd.DataFrame)
+            or not isinstance(data.index, pd.DatetimeIndex)
+            or not data.index.is_unique
+        ):
+            return None
+        return _AlignedFrame(data, self._index)
+
+    def refresh(self):
+        """
+        | Align data again if columns are replaced after cursor is created, e.g. indicators are set in strategy.initialize.
+        | Values changed in place can be read without refreshing.
+        """
+        changed = False
+        if not self._prices.is_view_of(self._prices_df):
+            self._prices = _AlignedFrame(self._prices_df, self._index)
+            changed = True
+        for market_key, frame in self._frames.items():
+            data = self._markets[market_key].data
+            if frame is None or not frame.is_view_of(data):
+                self._frames[market_key] = self.__align_market(self._markets[market_key])
+                changed = changed or frame is not None or self._frames[market_key] is not None
+        if changed:
+            self._row_id = -1
+
+    def __move_to(self, row_id: int):
+        if row_id != self._row_id:
+            self._row_id = row_id
+            self._price_row = self._prices.row(row_id, self.timestamps[row_id])
+            self._rows = {}
+
+    def price(self, row_id: int) -> BarRow:
+        """
+        Get token prices of a row, the row is read once and shared, so it should not be modified.
+
+        :param row_id: position of row
+        :type row_id: int
+        :return: price of all tokens
+        :rtype: BarRow
+        """
+        self.__move_to(row_id)
+        return self._price_row
+
+    def price_array(self, token_name: str, start: int, stop: int) -> np.ndarray:
+        """
+        Get price of a token in a range of rows
+
+        :param token_name: name of token
+        :type token_name: str
+        :param start: position of first row
+        :type start: int
+        :param stop: position after last row
+        :type stop: int
+        :return: price array of this token
+        :rtype: np.ndarray
+        """
+        return self._prices.column(token_name, self._prices.positions[start:stop])
+
+    def market_status(self, market_key: MarketInfo, row_id: int) -> MarketStatus:
+        """
+        | Get market status of a row. If market data is not aligned, data in market status will be None,
+        | and market will read data by timestamp.
+        | Row is read once for all the calls on the same row, and every market status gets a copy of it,
+        | because markets may modify row data (e.g. uniswap market adds virtual liquidity to currentLiquidity)
+
+        :param market_key: key of market
+        :type market_key: MarketInfo
+        :param row_id: position of row
+        :type row_id: int
+        :return: market status
+        :rtype: MarketStatus
+        """
+        self.__move_to(row_id)
+        timestamp = self.timestamps[row_id]
+        frame = self._frames[market_key]
+        if frame is not None and frame.columns is not self._markets[market_key].data.columns:
+            # columns were added during back test(e.g. by strategy.add_column), align again
+            frame = self._frames[market_key] = self.__align_market(self._markets[market_key])
+            self._rows.pop(market_key, None)
+        if frame is None:
+            return MarketStatus(timestamp, None)
+        if market_key not in self._rows:
+            self._rows[market_key] = frame.row(row_id, timestamp)
+        row = self._rows[market_key]
+        return MarketStatus(timestamp, None if row is None else row.copy())
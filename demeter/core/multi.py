@@ -0,0 +1,80 @@
+import pickle
+from typing import List
+
+from tqdm import tqdm  # process bar
+
+from .actuator import Actuator
+from .checkpoint import pickle_without_data
+from .cursor import BarCursor
+from .._typing import DemeterError
+from ..strategy import Strategy
+
+
+class MultiActuator:
+    """
+    | Run several strategies on the same markets and data in one pass.
+    | Every strategy gets its own actuator, which is a copy of the template actuator(markets, balances, settings),
+    | so brokers, positions, account status and actions are isolated.
+    | Market data and prices are shared by all the actuators. Data is aligned once,
+    | and in each bar, price row and market rows are read once from the shared cursor, then every actuator processes the bar.
+    | Every actuator still gets its own copy of market rows, because markets modify them(e.g. virtual liquidity of uniswap),
+    | and its own row data, which builds pd.Series only if the strategy reads it.
+    | Actuators can be customized before run, e.g. set a different result sink for each of them.
+    | Note: market data is shared, so columns added by one strategy(e.g. by add_column) are visible to others.
+
+    :param actuator: template actuator with markets, data, balance and prices(or prices can be got from uniswap market)
+    :type actuator: Actuator
+    :param strategies: strategies to run, one actuator will be created for each strategy
+    :type strategies: List[Strategy]
+    """
+
+    def __init__(self, actuator: Actuator, strategies: List[Strategy]):
+        if len(actuator.broker.markets) < 1:
+            raise DemeterError("No market assigned")
+        if len(strategies) < 1:
+            raise DemeterError("No strategy assigned")
+        # set prices from market if necessary, and resample data once before sharing.
+        actuator._check_backtest()
+        index = actuator.get_test_range()
+        if actuator.interval != "1min":
+            index = actuator.switch_interval(index)
+        self._index = index
+        self._template = actuator
+        template = pickle_without_data(actuator)
+        self._actuators: List[Actuator] = []
+        for strategy in strategies:
+            copied: Actuator = pickle.loads(template)
+            for market_key, market in copied.broker.markets.items():
+                market._data = actuator.broker.markets[market_key].data
+            copied._token_prices = actuator.token_prices
+            copied.strategy = strategy
+            self._actuators.append(copied)
+
+    @property
+    def actuators(self) -> List[Actuator]:
+        """
+        Actuators of each strategy, in the same order of strategies
+        """
+        return self._actuators
+
+    def run(self, print_result: bool = False):
+        """
+        Run all the strategies bar by bar. Result of each strategy can be found in its actuator after run.
+
+        :param print_result: If true, print backtest result of every strategy to console.
+        :type print_result: bool
+        """
+        template = self._template
+        cursor = BarCursor(self._index, template.token_prices, template.broker.markets)
+        states = [a._start_run(cursor=cursor) for a in self._actuators]
+        with tqdm(total=len(cursor), ncols=150) as pbar:
+            for row_id in range(len(cursor)):
+                # rows are cached in cursor, actuators of this bar share them
+                current_price = cursor.price(row_id)
+                for actuator, state in zip(self._actuators, states):
+                    # actuator may skip rows in fast-forward mode
+                    if state.row_id == row_id:
+                        actuator._run_row(state, current_price)
+                pbar.update()
+        for actuator in self._actuators:
+            actuator._finish_run(print_result)
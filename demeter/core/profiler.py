@@ -0,0 +1,124 @@
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+# key of a timer, (phase, market name), market name is empty if this phase is not related to a market
+PhaseKey = Tuple[str, str]
+
+
+class LoopProfiler:
+    """
+    | Cumulative timers for phases of back test main loop, e.g. triggers, on_bar, market update, account status.
+    | Time is measured as laps, each lap is the time since the previous lap in this row,
+    | so the loop only needs to call lap() at the end of each phase.
+    | If on_sample is set, it will be called every sample_every rows with time spent in each phase of that row.
+
+    :param sample_every: call on_sample every n rows, 0 to disable sampling
+    :type sample_every: int
+    :param on_sample: sampling hook, args are row id, timestamp and seconds spent in each phase of the row
+    :type on_sample: Callable[[int, datetime, Dict[PhaseKey, float]], None]
+    """
+
+    def __init__(
+        self,
+        sample_every: int = 0,
+        on_sample: Callable[[int, datetime, Dict[PhaseKey, float]], None] | None = None,
+    ):
+        self.sample_every = sample_every
+        self.on_sample = on_sample
+        self._totals: Dict[PhaseKey, int] = {}  # nanoseconds
+        self._counts: Dict[PhaseKey, int] = {}
+        self._rows = 0
+        self._last = 0
+        self._sampling = False
+        self._row_id = 0
+        self._timestamp: datetime | None = None
+        self._row_laps: Dict[PhaseKey, float] = {}
+
+    def reset(self):
+        """
+        Clear all the timers
+        """
+        self._totals = {}
+        self._counts = {}
+        self._rows = 0
+
+    def start_row(self, row_id: int, timestamp: datetime):
+        """
+        Start timing a row
+
+        :param row_id: position of row
+        :type row_id: int
+        :param timestamp: time of row
+        :type timestamp: datetime
+        """
+        self._rows += 1
+        self._sampling = self.on_sample is not None and self.sample_every > 0 and row_id % self.sample_every == 0
+        if self._sampling:
+            self._row_id = row_id
+            self._timestamp = timestamp
+            self._row_laps = {}
+        self._last = time.perf_counter_ns()
+
+    def lap(self, phase: str, market: str = ""):
+        """
+        Add time since last lap to a phase
+
+        :param phase: name of phase
+        :type phase: str
+        :param market: name of market, if this phase is run by a market
+        :type market: str
+        """
+        now = time.perf_counter_ns()
+        key = (phase, market)
+        elapsed = now - self._last
+        if key in self._totals:
+            self._totals[key] += elapsed
+            self._counts[key] += 1
+        else:
+            self._totals[key] = elapsed
+            self._counts[key] = 1
+        if self._sampling:
+            self._row_laps[key] = self._row_laps.get(key, 0) + elapsed / 1e9
+        # exclude time spent in profiler
+        self._last = time.perf_counter_ns()
+
+    def end_row(self):
+        """
+        Finish timing a row, sampling hook will be called if this row is sampled.
+        """
+        if self._sampling:
+            self.on_sample(self._row_id, self._timestamp, self._row_laps)
+
+    @property
+    def rows(self) -> int:
+        """
+        Count of rows timed
+        """
+        return self._rows
+
+    def report(self) -> pd.DataFrame:
+        """
+        | Timing report, indexed by phase and market, columns are:
+        | calls: count of laps
+        | total: total seconds
+        | mean_us: average microseconds of a lap
+        | percent: percent of all timed phases
+
+        :return: timing report
+        :rtype: pd.DataFrame
+        """
+        keys: List[PhaseKey] = list(self._totals.keys())
+        total_ns = sum(self._totals.values())
+        df = pd.DataFrame(
+            {
+                "calls": [self._counts[k] for k in keys],
+                "total": [self._totals[k] / 1e9 for k in keys],
+                "mean_us": [self._totals[k] / self._counts[k] / 1e3 for k in keys],
+                "percent": [self._totals[k] / total_ns * 100 if total_ns > 0 else 0.0 for k in keys],
+            },
+            index=pd.MultiIndex.from_tuples(keys, names=["phase", "market"]),
+        )
+        return df
@@ -0,0 +1,228 @@
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .._typing import DemeterError, TokenInfo
+from ..broker import AccountStatus, AssetDict, MarketDict, MarketInfo, MarketBalance
+
+DEFAULT_CHUNK_SIZE = 4096
+
+# values which can be kept in a typed numpy array, other values(e.g. Decimal) will be kept in object array
+# bool should be checked before int, because bool is subclass of int
+_TYPED_COLUMNS = [
+    ((bool, np.bool_), np.bool_),
+    ((int, np.integer), np.int64),
+    ((float, np.floating), np.float64),
+]
+
+
+def _typed_column(value) -> Tuple[tuple, type] | None:
+    for types, dtype in _TYPED_COLUMNS:
+        if isinstance(value, types):
+            return types, dtype
+    return None
+
+
+def _to_python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class AccountStatusRecorder(Sequence):
+    """
+    | Keep account status of every bar in columns.
+    | Column layout is learned from the first account status(the same to AccountStatus.get_names()),
+    | after that, every account status is written to numpy arrays, one array for a column.
+    | Arrays are allocated in chunks, and will be converted to dataframe without copy.
+    | It can still be visited like List[AccountStatus], an AccountStatus object will be rebuilt on access.
+    | Rows can be released after they are saved(see release()), index of rows will not change,
+    | but released rows can not be accessed any more.
+
+    :param capacity: rows allocated at the beginning, if it's unknown, one chunk will be allocated
+    :type capacity: int
+    :param chunk_size: rows allocated every time when arrays are full
+    :type chunk_size: int
+    """
+
+    def __init__(self, capacity: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self._chunk_size = chunk_size
+        self._capacity = capacity if capacity is not None and capacity > 0 else chunk_size
+        self._length = 0  # rows in memory
+        self._offset = 0  # rows released
+        self._timestamps: np.ndarray = np.empty(self._capacity, dtype="datetime64[ns]")
+        self._columns: List[Tuple[str, str]] = []
+        self._arrays: List[np.ndarray] = []
+        self._types: List[tuple | None] = []  # accepted types of typed array, None for object array
+        self._tokens: Dict[TokenInfo, int] = {}  # token => column id
+        self._markets: List[Tuple[MarketInfo, type, List[str], int]] = []  # key, balance class, fields, first column
+        self._default_market: MarketInfo | None = None
+
+    def __len__(self) -> int:
+        return self._offset + self._length
+
+    def __getitem__(self, item: int | slice) -> AccountStatus | List[AccountStatus]:
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if item < 0 or item >= len(self):
+            raise IndexError("account status index out of range")
+        if item < self._offset:
+            raise IndexError(f"account status {item} has been released")
+        return self.__get_status(item - self._offset)
+
+    @property
+    def timestamps(self) -> pd.DatetimeIndex:
+        """
+        Timestamps of rows in memory
+        """
+        return pd.DatetimeIndex(self._timestamps[: self._length])
+
+    def __add_column(self, name: Tuple[str, str], value) -> int:
+        # column added after first row will contain nan, keep it in object array
+        typed_column = _typed_column(value) if self._length == 0 else None
+        if typed_column is None:
+            accepted_types = None
+            array = np.empty(self._capacity, dtype=object)
+            # fill rows before this column appears, the same to DataFrame created from list of dict
+            array[: self._length] = np.nan
+        else:
+            accepted_types, dtype = typed_column
+            array = np.empty(self._capacity, dtype=dtype)
+        self._columns.append(name)
+        self._arrays.append(array)
+        self._types.append(accepted_types)
+        return len(self._columns) - 1
+
+    def __init_layout(self, status: AccountStatus):
+        self.__add_column(("net_value", ""), status.net_value)
+        for token, balance in status.asset_balances.items():
+            self._tokens[token] = self.__add_column(("tokens", token.name), balance)
+        for market_key, market_balance in status.market_status.items():
+            first_column = len(self._columns)
+            fields = []
+            for k, v in vars(market_balance).items():
+                self.__add_column((market_key.name, k), v)
+                fields.append(k)
+            self._markets.append((market_key, type(market_balance), fields, first_column))
+        self._default_market = status.market_status.get_default_key()
+
+    def __grow(self):
+        self._capacity += self._chunk_size
+        self._timestamps = np.resize(self._timestamps, self._capacity)
+        for i, array in enumerate(self._arrays):
+            new_array = np.empty(self._capacity, dtype=array.dtype)
+            new_array[: self._length] = array[: self._length]
+            self._arrays[i] = new_array
+
+    def __write(self, column: int, row: int, value):
+        accepted_types = self._types[column]
+        if accepted_types is not None and not isinstance(value, accepted_types):
+            # value type is changed, keep this column in object array from now on
+            self._arrays[column] = self._arrays[column].astype(object)
+            self._types[column] = None
+        self._arrays[column][row] = value
+
+    def append(self, status: AccountStatus):
+        """
+        Record an account status
+
+        :param status: account status of a bar
+        :type status: AccountStatus
+        """
+        if self._length == 0 and len(self._columns) == 0:
+            self.__init_layout(status)
+        if self._length == self._capacity:
+            self.__grow()
+        row = self._length
+        self._timestamps[row] = status.timestamp
+        self.__write(0, row, status.net_value)
+        for token, balance in status.asset_balances.items():
+            if token not in self._tokens:
+                self._tokens[token] = self.__add_column(("tokens", token.name), balance)
+            self.__write(self._tokens[token], row, balance)
+        for market_key, balance_type, fields, first_column in self._markets:
+            for column, value in enumerate(vars(status.market_status[market_key]).values(), first_column):
+                self.__write(column, row, value)
+        self._length += 1
+
+    def repeat_last(self, timestamps: Sequence[datetime], net_values: np.ndarray):
+        """
+        Record rows in bulk, all the balances are the same to the last row, only timestamp and net value change.
+        It's used when account is idle, e.g. there is no position in any market.
+
+        :param timestamps: timestamps of new rows
+        :type timestamps: Sequence[datetime]
+        :param net_values: net value of each row
+        :type net_values: np.ndarray
+        """
+        count = len(timestamps)
+        if count < 1:
+            return
+        if self._length < 1:
+            raise DemeterError("no account status to repeat")
+        while self._length + count > self._capacity:
+            self.__grow()
+        start, stop = self._length, self._length + count
+        self._timestamps[start:stop] = np.array(timestamps, dtype="datetime64[ns]")
+        for column in range(1, len(self._arrays)):
+            self._arrays[column][start:stop] = self._arrays[column][start - 1]
+        net_values = np.asarray(net_values)
+        if self._types[0] is None or net_values.dtype == self._arrays[0].dtype:
+            self._arrays[0][start:stop] = net_values
+        else:
+            for row, value in enumerate(net_values, start):
+                self.__write(0, row, value)
+        self._length = stop
+
+    def __get_status(self, row: int) -> AccountStatus:
+        timestamp: datetime = pd.Timestamp(self._timestamps[row]).to_pydatetime()
+        status = AccountStatus(timestamp=timestamp, net_value=_to_python(self._arrays[0][row]))
+        status.asset_balances = AssetDict()
+        for token, column in self._tokens.items():
+            value = self._arrays[column][row]
+            if self._types[column] is not None or not (isinstance(value, float) and np.isnan(value)):
+                status.asset_balances[token] = _to_python(value)
+        status.market_status = MarketDict()
+        for market_key, balance_type, fields, first_column in self._markets:
+            values = {k: _to_python(self._arrays[first_column + i][row]) for i, k in enumerate(fields)}
+            balance: MarketBalance = balance_type(**values)
+            status.market_status[market_key] = balance
+        status.market_status.set_default_key(self._default_market)
+        return status
+
+    def release(self, keep: int = 1):
+        """
+        Release rows from memory, e.g. after they are saved to disk. The last rows will be kept.
+
+        :param keep: count of rows to keep
+        :type keep: int
+        """
+        released = self._length - keep
+        if released <= 0:
+            return
+        self._timestamps[:keep] = self._timestamps[released : self._length]
+        for array in self._arrays:
+            array[:keep] = array[released : self._length]
+        self._offset += released
+        self._length = keep
+
+    def to_dataframe(self, start: int | None = None) -> pd.DataFrame:
+        """
+        Convert recorded rows to dataframe. Columns are the same to AccountStatus.to_dataframe().
+        Arrays are not copied, so the dataframe shares memory with this recorder.
+
+        :param start: index of first row, default is the first row in memory
+        :type start: int
+        :return: account status dataframe
+        :rtype: pd.DataFrame
+        """
+        begin = 0 if start is None else max(start - self._offset, 0)
+        if self._length <= begin:
+            return pd.DataFrame()
+        data = {i: array[begin : self._length] for i, array in enumerate(self._arrays)}
+        df = pd.DataFrame(data, index=pd.DatetimeIndex(self._timestamps[begin : self._length]), copy=False)
+        df.columns = pd.MultiIndex.from_tuples(self._columns, names=["l1", "l2"])
+        return df
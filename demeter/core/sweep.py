@@ -0,0 +1,169 @@
+import itertools
+import os
+import pickle
+import tempfile
+from numbers import Number
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Type
+
+import numpy as np
+import pandas as pd
+
+from .actuator import Actuator
+from .checkpoint import pickle_without_data
+from .._typing import DemeterError
+from ..result import performance_metrics
+from ..strategy import Strategy
+from ..utils import NumericBackend, set_numeric_backend
+
+_PRICE_KEY = "__prices__"
+
+# state of worker process, set by _init_worker
+_worker_template: bytes | None = None
+_worker_frames: Dict[str, pd.DataFrame] = {}
+# resampled market data, shared by variants in a worker, see UniLpMarket._resample
+_worker_aggregates: Dict[str, Dict[str, pd.DataFrame]] = {}
+
+
+def _dump_frame(df: pd.DataFrame, folder: str):
+    """
+    Save dataframe to folder. Numeric columns are saved as .npy files, so they can be memory-mapped by workers.
+    Columns of Decimal are saved as float64, because sweep runs in fast numeric backend,
+    other columns(e.g. str) and index are pickled.
+    """
+    os.makedirs(folder, exist_ok=True)
+    numeric_columns = []
+    object_columns = []
+    for i, (column, dtype) in enumerate(df.dtypes.items()):
+        values = df.iloc[:, i]
+        if dtype == object and all(isinstance(x, Number) for x in values):
+            values = values.astype(np.float64)
+        if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biufM":
+            np.save(os.path.join(folder, f"{i}.npy"), values.to_numpy())
+            numeric_columns.append(i)
+        else:
+            object_columns.append(i)
+    meta = {
+        "columns": df.columns,
+        "numeric_columns": numeric_columns,
+        "objects": df.iloc[:, object_columns],
+    }
+    with open(os.path.join(folder, "meta.pkl"), "wb") as f:
+        pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_frame(folder: str) -> pd.DataFrame:
+    """
+    Load dataframe saved by _dump_frame, numeric columns are memory-mapped in read only mode.
+    """
+    with open(os.path.join(folder, "meta.pkl"), "rb") as f:
+        meta = pickle.load(f)
+    objects: pd.DataFrame = meta["objects"]
+    arrays = {i: np.load(os.path.join(folder, f"{i}.npy"), mmap_mode="r") for i in meta["numeric_columns"]}
+    object_position = 0
+    data = {}
+    for i in range(len(meta["columns"])):
+        if i in arrays:
+            data[i] = arrays[i]
+        else:
+            data[i] = objects.iloc[:, object_position].to_numpy()
+            object_position += 1
+    df = pd.DataFrame(data, index=objects.index, copy=False)
+    df.columns = meta["columns"]
+    return df
+
+
+def _init_worker(template: bytes, folder: str, frame_keys: List[str]):
+    global _worker_template, _worker_frames
+    set_numeric_backend(NumericBackend.fast)
+    _worker_template = template
+    _worker_frames = {key: _load_frame(os.path.join(folder, str(i))) for i, key in enumerate(frame_keys)}
+
+
+def _run_variant(strategy_class: Type[Strategy], params: Dict[str, Any]) -> Dict[str, Any]:
+    actuator: Actuator = pickle.loads(_worker_template)
+    for market_key, market in actuator.broker.markets.items():
+        # shallow copy, so columns added by strategy will not affect other variants
+        market._data = _worker_frames[market_key.name].copy(deep=False)
+        if hasattr(market, "_aggregates"):
+            market._aggregates_source = market._data
+            market._aggregates = _worker_aggregates.setdefault(market_key.name, {})
+    actuator._token_prices = _worker_frames[_PRICE_KEY].copy(deep=False)
+    actuator.strategy = strategy_class(**params)
+    actuator.run(print_result=False)
+    metrics = performance_metrics(actuator.account_status_df["net_value"])
+    return {**params, **{k.name: v for k, v in metrics.items()}}
+
+
+class ParameterSweep:
+    """
+    | Run a strategy with a grid of parameters in parallel.
+    | Market data and prices are taken from a prepared actuator, it should have markets with data loaded,
+    | initial balance and prices set (or prices can be got from uniswap market),
+    | then data is saved to a temporary folder once, and numeric columns are memory-mapped by every worker process.
+    | Variants always run in fast numeric backend, Decimal data and balances are converted to float,
+    | so data can be shared by workers instead of being copied to each of them.
+    | Markets in actuator should support fast backend.
+    | Each combination of parameters will be passed to strategy class as keyword arguments.
+
+    :param actuator: actuator with markets, data, balance and prices set
+    :type actuator: Actuator
+    :param strategy_class: class of strategy, it will be initialized with parameters, e.g. strategy_class(**params)
+    :type strategy_class: Type[Strategy]
+    :param param_grid: parameter name and values to try, e.g. {"width": [100, 200], "rebalance": [True, False]}
+    :type param_grid: Dict[str, List]
+    :param max_workers: count of worker process, default is count of cpu
+    :type max_workers: int
+    """
+
+    def __init__(
+        self,
+        actuator: Actuator,
+        strategy_class: Type[Strategy],
+        param_grid: Dict[str, List],
+        max_workers: int | None = None,
+    ):
+        self.actuator = actuator
+        self.strategy_class = strategy_class
+        self.param_grid = param_grid
+        self.max_workers = max_workers
+
+    @property
+    def params(self) -> List[Dict[str, Any]]:
+        """
+        All combinations of parameters
+        """
+        keys = list(self.param_grid.keys())
+        return [dict(zip(keys, values)) for values in itertools.product(*self.param_grid.values())]
+
+    def run(self) -> pd.DataFrame:
+        """
+        Run all the parameter combinations.
+
+        :return: a table with parameters and performance metrics, each row is a combination of parameters
+        :rtype: pd.DataFrame
+        """
+        if len(self.actuator.broker.markets) < 1:
+            raise DemeterError("No market assigned")
+        for market in self.actuator.broker.markets.values():
+            if not market.support_fast_backend:
+                raise DemeterError(f"{type(market).__name__} does not support fast numeric backend, it can't be swept")
+        # set prices from market if necessary, and ensure data is ready before sharing.
+        self.actuator._check_backtest()
+        params = self.params
+        frames = {k.name: m.data for k, m in self.actuator.broker.markets.items()}
+        frames[_PRICE_KEY] = self.actuator.token_prices
+        # data will be attached in worker process
+        template = pickle_without_data(self.actuator, to_float=True)
+
+        with tempfile.TemporaryDirectory(prefix="demeter-sweep-") as folder:
+            for i, df in enumerate(frames.values()):
+                _dump_frame(df, os.path.join(folder, str(i)))
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(template, folder, list(frames.keys())),
+            ) as executor:
+                futures = [executor.submit(_run_variant, self.strategy_class, p) for p in params]
+                results = [f.result() for f in futures]
+        return pd.DataFrame(results)
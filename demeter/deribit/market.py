@@ -2,7 +2,7 @@ import json
 import logging
 import os
 from _decimal import Decimal
-from datetime import date, timedelta
+from datetime import date
 from typing import List, Dict, Tuple
 import copy
 
@@ -38,6 +38,7 @@ from ..utils import (
     get_formatted_from_dict,
     console_text,
 )
+from ..utils.loader import iter_days, load_daily_files
 
 DEFAULT_DATA_PATH = "./data"
 BASIC_INTERVAL = pd.Timedelta("1h")
@@ -113,6 +114,13 @@ class DeribitOptionMarket(Market):
             type(self).__name__, self._market_info.name, self.token.name, list(self.positions.keys())
         )
 
+    @property
+    def is_idle(self) -> bool:
+        """
+        Market is idle when there is no option position
+        """
+        return len(self.positions) == 0
+
     def load_pkl_data(self, path):
         if not os.path.exists(path):
             raise DemeterError(f"{path} doesn't exist")
@@ -132,32 +140,31 @@ class DeribitOptionMarket(Market):
         :type end_date: date
         """
         self.logger.info(f"start load files from {start_date} to {end_date}...")
-        day = start_date
-        df = pd.DataFrame()
         from tqdm import tqdm
 
-        with tqdm(total=(end_date - start_date).days + 1, ncols=150) as pbar:
-            while day <= end_date:
-                path = os.path.join(
-                    self.data_path,
-                    f"Deribit-option-book-{self.token.name}-{day.strftime('%Y%m%d')}.csv",
-                )
-                if not os.path.exists(path):
-                    logging.warning(f"resource file {path} not found")
-                    day += timedelta(days=1)
-                    pbar.update()
-                    continue
+        paths = []
+        for day in iter_days(start_date, end_date):
+            path = os.path.join(
+                self.data_path,
+                f"Deribit-option-book-{self.token.name}-{day.strftime('%Y%m%d')}.csv",
+            )
+            if not os.path.exists(path):
+                logging.warning(f"resource file {path} not found")
+                continue
+            paths.append(path)
+
+        def read_file(path: str) -> pd.DataFrame:
+            day_df = pd.read_csv(
+                str(path),
+                parse_dates=["time", "expiry_time"],
+                index_col=["time", "instrument_name"],
+                converters={"asks": order_converter, "bids": order_converter},
+            )
+            day_df.drop(columns=["actual_time", "min_price", "max_price"], inplace=True)
+            return day_df
 
-                day_df = pd.read_csv(
-                    str(path),
-                    parse_dates=["time", "expiry_time"],
-                    index_col=["time", "instrument_name"],
-                    converters={"asks": order_converter, "bids": order_converter},
-                )
-                day_df.drop(columns=["actual_time", "min_price", "max_price"], inplace=True)
-                df = pd.concat([df, day_df])
-                day += timedelta(days=1)
-                pbar.update()
+        with tqdm(total=len(paths), ncols=150) as pbar:
+            df = load_daily_files(paths, read_file, on_loaded=lambda path: pbar.update())
 
         self._data = df
         self.logger.info("data has been prepared")
@@ -1,3 +1,4 @@
 from .metrics import *
 from .utils import get_positions
 from ._typing import BackTestDescription
+from .sink import ResultSink, CsvSink, ParquetSink, FeatherSink
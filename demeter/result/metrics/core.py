@@ -19,7 +19,7 @@ def performance_metrics(
     :param benchmark: benchmark, if set to None, some metrics depends on this will not be calculated
     :return: a dict with metric enum and their value.
     """
-    values = values.apply(lambda x: float(x))
+    values = values.astype(float)
     init = values.iloc[0]
     final = values.iloc[-1]
 
@@ -31,7 +31,7 @@ def performance_metrics(
     duration_in_day = (end - start + interval).value / 1e9 / 86400
 
     if benchmark is not None:
-        benchmark = benchmark.apply(lambda x: float(x))
+        benchmark = benchmark.astype(float)
         alpha, beta = alpha_beta(values, benchmark, duration_in_day)
         benchmark_init = benchmark.iloc[0]
         benchmark_final = benchmark.iloc[-1]
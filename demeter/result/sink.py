@@ -0,0 +1,268 @@
+import os
+import shutil
+from abc import ABC, abstractmethod
+from typing import List
+
+import orjson
+import pandas as pd
+
+from .._typing import DemeterError
+from ..broker import BaseAction
+from ..utils.application import orjson_default
+
+ACCOUNT = "account"
+ACTION = "action"
+# separator of two level column names, e.g. ("tokens", "ETH") will be saved as "tokens.ETH"
+COLUMN_SEPARATOR = "."
+
+
+def _flatten_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Flatten account status dataframe, columns are joined by separator, and index is saved as timestamp column
+    """
+    df = df.copy(deep=False)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [COLUMN_SEPARATOR.join([str(x) for x in c if x != ""]) for c in df.columns]
+    df.index.name = "timestamp"
+    return df.reset_index()
+
+
+def _restore_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.set_index("timestamp")
+    df.index = pd.to_datetime(df.index)
+    df.index.name = None
+    columns = [tuple(c.split(COLUMN_SEPARATOR, 1)) if COLUMN_SEPARATOR in c else (c, "") for c in df.columns]
+    df.columns = pd.MultiIndex.from_tuples(columns, names=["l1", "l2"])
+    return df
+
+
+def _actions_to_df(actions: List[BaseAction]) -> pd.DataFrame:
+    """
+    Convert actions to a table with fixed columns, fields of different action types are kept in detail as json.
+    """
+    details = []
+    for action in actions:
+        try:
+            details.append(orjson.dumps(action, default=orjson_default, option=orjson.OPT_SERIALIZE_NUMPY).decode())
+        except TypeError as e:
+            raise DemeterError(f"can not save {type(action).__name__} to result sink, {e}")
+    return pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime([a.timestamp for a in actions]),
+            "market": [a.market.name for a in actions],
+            "action_type": [a.action_type.name if a.action_type is not None else "" for a in actions],
+            "comment": [a.comment for a in actions],
+            "detail": details,
+        }
+    )
+
+
+class ResultSink(ABC):
+    """
+    | Write account status and actions to disk while back test is running.
+    | Rows are buffered in actuator, and written every chunk_size rows as a part file,
+    | so finished parts can be read while back test is still running.
+    | Files are saved in folder path/file_name.account and path/file_name.action, one file for each chunk.
+    | This is an abstract class, use CsvSink, ParquetSink or FeatherSink instead.
+    | If keep_in_memory is false, only account status is released from memory, actions are always kept,
+    | as they are used by strategy and saved in result.
+
+    :param path: folder to save results
+    :type path: str
+    :param file_name: prefix of result folders
+    :type file_name: str
+    :param chunk_size: rows in a part file
+    :type chunk_size: int
+    :param keep_in_memory: If false, account status rows will be released from memory after written, so memory usage is bounded. After back test, account_status_df will be read from files
+    :type keep_in_memory: bool
+    """
+
+    extension: str = ""
+
+    def __init__(self, path: str, file_name: str = "backtest", chunk_size: int = 10000, keep_in_memory: bool = True):
+        if chunk_size < 1:
+            raise DemeterError("chunk size should be larger than 0")
+        self.path = path
+        self.file_name = file_name
+        self.chunk_size = chunk_size
+        self.keep_in_memory = keep_in_memory
+        self._parts = {ACCOUNT: 0, ACTION: 0}
+
+    def folder(self, kind: str) -> str:
+        """
+        Folder of part files
+
+        :param kind: account or action
+        :type kind: str
+        :return: folder path
+        :rtype: str
+        """
+        return os.path.join(self.path, f"{self.file_name}.{kind}")
+
+    def open(self):
+        """
+        Prepare folders, files of last back test will be removed.
+        """
+        for kind in self._parts.keys():
+            folder = self.folder(kind)
+            if os.path.exists(folder):
+                shutil.rmtree(folder)
+            os.makedirs(folder)
+            self._parts[kind] = 0
+
+    def resume(self):
+        """
+        Continue writing after back test is resumed from a checkpoint,
+        parts written after the checkpoint are removed, they will be written again.
+        """
+        for kind, parts in self._parts.items():
+            folder = self.folder(kind)
+            os.makedirs(folder, exist_ok=True)
+            for f in os.listdir(folder):
+                if f.startswith("part-") and int(f[5:11]) >= parts:
+                    os.remove(os.path.join(folder, f))
+
+    def close(self):
+        """
+        Called after back test is finished
+        """
+        pass
+
+    def write_account_status(self, df: pd.DataFrame):
+        """
+        Write a chunk of account status
+
+        :param df: account status, the same format as Actuator.account_status_df
+        :type df: pd.DataFrame
+        """
+        if len(df.index) > 0:
+            self.__write_part(ACCOUNT, _flatten_columns(df))
+
+    def write_actions(self, actions: List[BaseAction]):
+        """
+        Write a chunk of actions
+
+        :param actions: actions
+        :type actions: List[BaseAction]
+        """
+        if len(actions) > 0:
+            self.__write_part(ACTION, _actions_to_df(actions))
+
+    def read_account_status(self) -> pd.DataFrame:
+        """
+        Read account status which has been written
+
+        :return: account status
+        :rtype: pd.DataFrame
+        """
+        df = self.__read_parts(ACCOUNT)
+        return _restore_columns(df) if df is not None else pd.DataFrame()
+
+    def read_actions(self) -> pd.DataFrame:
+        """
+        Read actions which have been written, columns are timestamp, market, action_type, comment and detail(json)
+
+        :return: actions
+        :rtype: pd.DataFrame
+        """
+        df = self.__read_parts(ACTION)
+        return df if df is not None else _actions_to_df([])
+
+    def __write_part(self, kind: str, df: pd.DataFrame):
+        file_path = os.path.join(self.folder(kind), f"part-{self._parts[kind]:06d}.{self.extension}")
+        # write to temporary file first, so readers will not get an incomplete part
+        tmp_path = file_path + ".tmp"
+        self._write(df, tmp_path)
+        os.replace(tmp_path, file_path)
+        self._parts[kind] += 1
+
+    def __read_parts(self, kind: str) -> pd.DataFrame | None:
+        folder = self.folder(kind)
+        if not os.path.exists(folder):
+            return None
+        files = sorted(f for f in os.listdir(folder) if f.endswith("." + self.extension))
+        if len(files) < 1:
+            return None
+        return pd.concat([self._read(os.path.join(folder, f)) for f in files], ignore_index=True)
+
+    # region for subclass to override
+    @abstractmethod
+    def _write(self, df: pd.DataFrame, file_path: str):
+        pass
+
+    @abstractmethod
+    def _read(self, file_path: str) -> pd.DataFrame:
+        pass
+
+    # endregion
+
+
+class CsvSink(ResultSink):
+    """
+    Save results in csv files. Decimal values are saved in full precision.
+    """
+
+    extension = "csv"
+
+    def _write(self, df: pd.DataFrame, file_path: str):
+        df.to_csv(file_path, index=False)
+
+    def _read(self, file_path: str) -> pd.DataFrame:
+        return pd.read_csv(file_path)
+
+
+def _to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Columnar formats can not save Decimal with unlimited precision, convert them to float
+    """
+    df = df.copy(deep=False)
+    for column in df.columns:
+        if df[column].dtype == object and column not in ("market", "action_type", "comment", "detail"):
+            try:
+                df[column] = df[column].astype(float)
+            except (TypeError, ValueError):
+                df[column] = df[column].astype(str)
+    return df
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise DemeterError(f"pyarrow is required to save parquet or feather files, {e}")
+
+
+class ParquetSink(ResultSink):
+    """
+    Save results in parquet files, pyarrow is required. Decimal values are converted to float.
+    """
+
+    extension = "parquet"
+
+    def open(self):
+        _require_pyarrow()
+        super().open()
+
+    def _write(self, df: pd.DataFrame, file_path: str):
+        _to_columnar(df).to_parquet(file_path, index=False)
+
+    def _read(self, file_path: str) -> pd.DataFrame:
+        return pd.read_parquet(file_path)
+
+
+class FeatherSink(ResultSink):
+    """
+    Save results in feather files, pyarrow is required. Decimal values are converted to float.
+    """
+
+    extension = "feather"
+
+    def open(self):
+        _require_pyarrow()
+        super().open()
+
+    def _write(self, df: pd.DataFrame, file_path: str):
+        _to_columnar(df).to_feather(file_path)
+
+    def _read(self, file_path: str) -> pd.DataFrame:
+        return pd.read_feather(file_path)
@@ -36,6 +36,8 @@ from ..utils import (
     STYLE,
     get_formatted_from_dict,
     console_text,
+    iter_days,
+    load_daily_files,
 )
 
 
@@ -200,21 +202,22 @@ class SqueethMarket(Market):
         :type end_date: date
         """
         self.logger.info(f"start load files from {start_date} to {end_date}...")
-        df = pd.DataFrame()
-        day = start_date
         if start_date > end_date:
             raise DemeterError(f"start date {start_date} should earlier than end date {end_date}")
-        while day <= end_date:
-            path = os.path.join(
+        paths = [
+            os.path.join(
                 self.data_path,
                 f"{self._network.chain.name.lower()}-squeeth-controller-{day.strftime('%Y-%m-%d')}.minute.csv",
             )
-            day_df = pd.read_csv(
+            for day in iter_days(start_date, end_date)
+        ]
+        df = load_daily_files(
+            paths,
+            lambda path: pd.read_csv(
                 path,
                 converters={"norm_factor": to_decimal, "WETH": to_decimal, "OSQTH": to_decimal},
-            )
-            df = pd.concat([df, day_df])
-            day = day + timedelta(days=1)
+            ),
+        )
         self.logger.info("load file complete, preparing...")
 
         df["block_timestamp"] = pd.to_datetime(df["block_timestamp"])
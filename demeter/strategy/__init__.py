@@ -13,4 +13,6 @@ from .trigger import (
     AtTimesTrigger,
     AtTimeTrigger,
     PriceTrigger,
+    TriggerList,
 )
+from .scheduler import TriggerScheduler
@@ -0,0 +1,179 @@
+import heapq
+from datetime import datetime
+from typing import List, Tuple
+
+from .trigger import Trigger, _MINUTE
+from .. import RowData
+
+
+def _is_scheduled(trigger: Trigger) -> bool:
+    """
+    If a trigger knows when to be checked. Otherwise, it has to be checked in every iteration.
+    """
+    return type(trigger).next_check_time is not Trigger.next_check_time
+
+
+class TriggerScheduler:
+    """
+    | Decide which triggers should be checked in an iteration.
+    | Time based triggers(e.g. AtTimeTrigger, PeriodTrigger) are kept in a min-heap ordered by their next check time,
+    | so only triggers which are due will be checked. Other triggers are checked in every iteration.
+    | Due triggers are checked in the same order as in strategy.triggers,
+    | and triggers out of date are removed from strategy.triggers.
+    | strategy.triggers can be changed at any time, e.g. append, remove or replace the list,
+    | new triggers will be scheduled and removed triggers will be dropped in next check.
+    | Changes are found by counters of TriggerList, so iterations without changes don't go through the list.
+
+    :param strategy: strategy which keeps triggers
+    :type strategy: Strategy
+    """
+
+    def __init__(self, strategy):
+        self._strategy = strategy
+        self._triggers: List[Trigger] | None = None  # trigger list in strategy, which has been scheduled
+        self._version: int | None = None  # version of trigger list when it's scheduled
+        self._rewrites: int | None = None
+        self._scheduled: List[Trigger] = []  # copy of trigger list when it's scheduled, to find changes
+        self._seqs: List[int] = []  # sequence of each trigger in list, used to keep order of triggers
+        self._seq = 0
+        self._heap: List[Tuple[datetime, int, Trigger]] = []
+        self._always: List[Tuple[int, Trigger]] = []
+        self._expired: set = set()  # sequence of triggers to remove
+        self._checked: set = set()  # sequence of triggers checked in current iteration
+
+    def __schedule(self, seq: int, trigger: Trigger, after: datetime, timestamp: datetime):
+        """
+        put trigger to heap, according to the next time it should be checked after a time.
+        If it will never be checked again, and it's out of date, remove it.
+        """
+        next_time = trigger.next_check_time(after)
+        if next_time is not None:
+            heapq.heappush(self._heap, (next_time, seq, trigger))
+        elif trigger.is_out_date(timestamp):
+            self._expired.add(seq)
+
+    def __add(self, seq: int, trigger: Trigger, timestamp: datetime):
+        if _is_scheduled(trigger):
+            # check from current iteration
+            self.__schedule(seq, trigger, timestamp - _MINUTE, timestamp)
+        else:
+            self._always.append((seq, trigger))
+
+    def __sync(self, timestamp: datetime):
+        """
+        schedule triggers newly added to strategy.triggers, and drop triggers removed from it.
+        """
+        triggers = self._strategy.triggers
+        version = getattr(triggers, "version", None)
+        scheduled = self._scheduled
+        appended = False
+        if triggers is self._triggers:
+            if version is not None:
+                # TriggerList counts its changes, so the list needn't to be compared
+                if version == self._version:
+                    return
+                appended = triggers.rewrites == self._rewrites
+            elif triggers == scheduled:
+                return
+            else:
+                appended = len(triggers) > len(scheduled) and triggers[: len(scheduled)] == scheduled
+        if appended:
+            added = triggers[len(scheduled) :]
+            for trigger in added:
+                self._seqs.append(self._seq)
+                self.__add(self._seq, trigger, timestamp)
+                self._seq += 1
+            scheduled.extend(added)
+        else:
+            # list is replaced or changed in place, number triggers again in the order of list.
+            # Triggers which are kept stay in heap, so they will not be checked twice in an iteration.
+            old_seqs = {id(t): seq for t, seq in zip(scheduled, self._seqs)}
+            mapping = {}
+            added = []
+            self._seqs = []
+            for trigger in triggers:
+                old_seq = old_seqs.pop(id(trigger), None)
+                if old_seq is None:
+                    added.append((self._seq, trigger))
+                else:
+                    mapping[old_seq] = self._seq
+                self._seqs.append(self._seq)
+                self._seq += 1
+            self._heap = [(t, mapping[seq], trigger) for t, seq, trigger in self._heap if seq in mapping]
+            heapq.heapify(self._heap)
+            self._always = [(mapping[seq], trigger) for seq, trigger in self._always if seq in mapping]
+            self._expired = {mapping[seq] for seq in self._expired if seq in mapping}
+            self._checked = {mapping[seq] for seq in self._checked if seq in mapping}
+            for seq, trigger in added:
+                self.__add(seq, trigger, timestamp)
+            self._scheduled = list(triggers)
+        self.__keep_list(triggers)
+
+    def __keep_list(self, triggers: List[Trigger]):
+        self._triggers = triggers
+        self._version = getattr(triggers, "version", None)
+        self._rewrites = getattr(triggers, "rewrites", None)
+
+    def __pop_due(self, timestamp: datetime) -> List[Tuple[int, Trigger]]:
+        due = []
+        while self._heap and self._heap[0][0] <= timestamp:
+            next_time, seq, trigger = heapq.heappop(self._heap)
+            due.append((seq, trigger))
+        due.extend(x for x in self._always if x[0] not in self._checked)
+        due.sort(key=lambda x: x[0])
+        return due
+
+    def __remove_expired(self):
+        if len(self._expired) < 1:
+            return
+        triggers = []
+        seqs = []
+        for seq, trigger in zip(self._seqs, self._triggers):
+            if seq not in self._expired:
+                seqs.append(seq)
+                triggers.append(trigger)
+        self._always = [x for x in self._always if x[0] not in self._expired]
+        self._expired = set()
+        self._strategy.triggers = triggers
+        self.__keep_list(self._strategy.triggers)
+        self._scheduled = list(triggers)
+        self._seqs = seqs
+
+    def next_check_time(self, timestamp: datetime) -> datetime | None:
+        """
+        Earliest time after timestamp when a trigger should be checked.
+
+        :param timestamp: time of current iteration
+        :type timestamp: datetime
+        :return: time of next check, None if there is no trigger waiting
+        :rtype: datetime | None
+        """
+        self.__sync(timestamp)
+        if len(self._always) > 0:
+            return timestamp + _MINUTE
+        return self._heap[0][0] if len(self._heap) > 0 else None
+
+    def run(self, row_data: RowData):
+        """
+        check due triggers, and run their actions if conditions are met.
+
+        :param row_data: data of current iteration
+        :type row_data: RowData
+        """
+        timestamp = row_data.timestamp
+        self._checked = set()
+        while True:
+            self.__sync(timestamp)
+            due = self.__pop_due(timestamp)
+            if len(due) < 1:
+                break
+            for seq, trigger in due:
+                if trigger.when(row_data):
+                    trigger.do(row_data)
+            for seq, trigger in due:
+                self._checked.add(seq)
+                if _is_scheduled(trigger):
+                    self.__schedule(seq, trigger, timestamp, timestamp)
+                elif trigger.is_out_date(timestamp):
+                    self._expired.add(seq)
+        self.__remove_expired()
@@ -1,8 +1,9 @@
-from typing import List, Callable
+from datetime import datetime
+from typing import List, Callable, Sequence
 
 import pandas as pd
 
-from .trigger import Trigger
+from .trigger import Trigger, TriggerList
 from .. import Broker, MarketDict, AccountStatus, AssetDict, Asset, RowData
 from .._typing import DemeterError
 from ..broker import MarketInfo, BaseAction, Market
@@ -19,13 +20,27 @@ class Strategy(object):
         self.markets: MarketDict[Market] = MarketDict()
         self.prices: pd.DataFrame | None = None
         self.triggers: [Trigger] = []
-        self.account_status: List[AccountStatus] = []
+        self.account_status: Sequence[AccountStatus] = []
         self.account_status_df: pd.DataFrame | None = None
         self.comment_last_action: Callable = lambda msg: msg
         self.assets: AssetDict[Asset] = AssetDict()
         self.actions: List[BaseAction] = []
         self.log: Callable = lambda t, msg, info: msg
 
+    @property
+    def triggers(self) -> List[Trigger]:
+        """
+        Triggers of this strategy. Any list can be set, it will be kept as a TriggerList,
+        so changes of the list can be found by trigger scheduler at little cost.
+        """
+        if "_triggers" not in self.__dict__:
+            self._triggers = TriggerList()
+        return self._triggers
+
+    @triggers.setter
+    def triggers(self, value: List[Trigger]):
+        self._triggers = value if isinstance(value, TriggerList) else TriggerList(value)
+
     def initialize(self):
         """
         Initialize your strategy, this will be called before iteration start
@@ -51,6 +66,24 @@ class Strategy(object):
         """
         pass
 
+    def idle_until(self, row_data: RowData) -> datetime | None:
+        """
+        | Used in fast-forward mode(Actuator.fast_forward=True), called after account status of this iteration is recorded.
+        | Return a time before which this strategy needs no on_bar/after_bar callback.
+        | If there is no position in any market, actuator will skip iterations until this time(or a trigger is due),
+        | account status of skipped iterations will be filled by token balances and prices.
+        | Return None if strategy should be called in next iteration.
+        | By default, if neither on_bar nor after_bar is overridden, strategy is idle forever, or it's never idle.
+
+        :param row_data: data in this iteration
+        :type row_data: RowData
+        :return: time of next iteration which needs callback
+        :rtype: datetime | None
+        """
+        if type(self).on_bar is Strategy.on_bar and type(self).after_bar is Strategy.after_bar:
+            return datetime.max
+        return None
+
     def finalize(self):
         """
         this will run after all the data processed. You can access broker.account_status, broker.market.status to do some calculation
@@ -1,3 +1,4 @@
+import bisect
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Callable, Any, List
@@ -7,6 +8,9 @@ import pandas as pd
 from .. import RowData
 from .._typing import DemeterError
 
+# minimal interval between two iterations
+_MINUTE = timedelta(minutes=1)
+
 
 def to_minute(time: datetime) -> datetime:
     """
@@ -61,6 +65,19 @@ class Trigger:
     def is_out_date(self, t) -> bool:
         return False
 
+    def next_check_time(self, t: datetime) -> datetime | None:
+        """
+        | Earliest time after t when this trigger should be checked, used by scheduler to skip needless checks.
+        | Return None if this trigger will never be met.
+        | If a trigger does not override this function, it will be checked in every iteration.
+
+        :param t: time of last check
+        :type t: datetime
+        :return: time of next check
+        :rtype: datetime | None
+        """
+        return t + _MINUTE
+
 
 class AtTimeTrigger(Trigger):
     """
@@ -84,6 +101,9 @@ class AtTimeTrigger(Trigger):
     def is_out_date(self, t) -> bool:
         return t >= self._time
 
+    def next_check_time(self, t: datetime) -> datetime | None:
+        return self._time if t < self._time else None
+
 
 class AtTimesTrigger(Trigger):
     """
@@ -99,14 +119,19 @@ class AtTimesTrigger(Trigger):
     """
 
     def __init__(self, time: List[datetime], do, **kwargs):
-        self._time = [to_minute(t) for t in time]
+        self._time = sorted(set(to_minute(t) for t in time))
+        self._time_set = set(self._time)
         super().__init__(do, **kwargs)
 
     def when(self, row_data: RowData) -> bool:
-        return self._time in row_data.timestamp
+        return row_data.timestamp in self._time_set
 
     def is_out_date(self, t) -> bool:
-        return t >= max(self._time)
+        return t >= self._time[-1]
+
+    def next_check_time(self, t: datetime) -> datetime | None:
+        i = bisect.bisect_right(self._time, t)
+        return self._time[i] if i < len(self._time) else None
 
 
 @dataclass
@@ -141,6 +166,10 @@ class TimeRangeTrigger(Trigger):
     def is_out_date(self, t) -> bool:
         return t >= self._time_range.end
 
+    def next_check_time(self, t: datetime) -> datetime | None:
+        # keep checking until end, so it can be removed once out of date
+        return max(self._time_range.start, t + _MINUTE) if t < self._time_range.end else None
+
 
 class TimeRangesTrigger(Trigger):
     """
@@ -167,6 +196,13 @@ class TimeRangesTrigger(Trigger):
     def is_out_date(self, t) -> bool:
         return t >= max([x.end for x in self._time_range])
 
+    def next_check_time(self, t: datetime) -> datetime | None:
+        candidates = [max(r.start, t + _MINUTE) for r in self._time_range if t + _MINUTE < r.end]
+        if len(candidates) > 0:
+            return min(candidates)
+        end = max([x.end for x in self._time_range])
+        return end if t < end else None
+
 
 def _check_time_delta(delta: timedelta):
     if delta.total_seconds() % 60 != 0:
@@ -211,6 +247,11 @@ class PeriodTrigger(Trigger):
 
         return False
 
+    def next_check_time(self, t: datetime) -> datetime | None:
+        if self._next_match is None:
+            return t + _MINUTE
+        return self._next_match if self._next_match > t else None
+
 
 class PeriodsTrigger(Trigger):
     """
@@ -255,6 +296,12 @@ class PeriodsTrigger(Trigger):
 
         return False
 
+    def next_check_time(self, t: datetime) -> datetime | None:
+        if self._next_matches[0] is None:
+            return t + _MINUTE
+        matches = [m for m in self._next_matches if m > t]
+        return min(matches) if len(matches) > 0 else None
+
 
 class PriceTrigger(Trigger):
     """
@@ -294,3 +341,40 @@ class CustomizedTrigger(Trigger):
 
     def when(self, row_data: RowData) -> bool:
         return self._condition(row_data)
+
+
+def _count_change(method, append_only=False):
+    def wrapper(self, *args, **kwargs):
+        self.version += 1
+        if not append_only:
+            self.rewrites += 1
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+class TriggerList(list):
+    """
+    | List of triggers kept by strategy.
+    | It works like a normal list, but counts its changes, version is increased by every change,
+    | and rewrites is increased by changes except appending(append, extend, +=).
+    | So trigger scheduler can find out how the list is changed without comparing all the triggers.
+    """
+
+    version = 0
+    rewrites = 0
+
+    append = _count_change(list.append, True)
+    extend = _count_change(list.extend, True)
+    __iadd__ = _count_change(list.__iadd__, True)
+    insert = _count_change(list.insert)
+    remove = _count_change(list.remove)
+    pop = _count_change(list.pop)
+    clear = _count_change(list.clear)
+    sort = _count_change(list.sort)
+    reverse = _count_change(list.reverse)
+    __setitem__ = _count_change(list.__setitem__)
+    __delitem__ = _count_change(list.__delitem__)
+    __imul__ = _count_change(list.__imul__)
@@ -6,6 +6,8 @@ from ._typing import (
     UniV3Pool,
     UniV3PoolStatus,
     Position,
+    PositionTable,
+    PositionSnapshot,
     UniLpBalance,
     PositionInfo,
     SellAction,
@@ -13,15 +15,24 @@ from ._typing import (
     RemoveLiquidityAction,
     CollectFeeAction,
     AddLiquidityAction,
+    BatchLiquidityAction,
+    BatchAddLiquidityAction,
+    BatchRemoveLiquidityAction,
+    BatchCollectFeeAction,
     UniswapMarketStatus,
     UniDescription,
 )
 from .core import V3CoreLib
 from .data import LineTypeEnum, UniLPData
 from .market import UniLpMarket
+from .position_index import PositionIndex
+from .liquidity_book import LiquidityBook, SwapResult
+from .range_analysis import RangeAnalysis, range_grid, heatmap
+from .analytics import LpAnalytics, delta_gamma
 from .helper import (
     nearest_usable_tick,
     tick_to_base_unit_price,
+    ticks_to_base_unit_price,
     tick_to_sqrt_price_x96,
     sqrt_price_x96_to_tick,
     sqrt_price_x96_to_base_unit_price,
@@ -31,4 +42,7 @@ from .helper import (
     base_unit_price_to_sqrt_price_x96,
     get_swap_value,
     get_swap_value_with_part_balance_used,
+    clear_tick_cache,
+    find_tick_range_at_rate,
+    find_tick_ranges_at_rate,
 )
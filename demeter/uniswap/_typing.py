@@ -1,13 +1,13 @@
 import pandas as pd
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, NamedTuple, Union
+from typing import Dict, List, NamedTuple, Tuple, Union
 
 from .._typing import TokenInfo, UnitDecimal, MarketDescription
 from ..broker import BaseAction, ActionTypeEnum, MarketBalance, MarketStatus
 from ..utils import console_text
-from ..utils import get_formatted_from_dict
+from ..utils import get_formatted_from_dict, is_fast_backend
 from ..utils.console_text import get_action_str, ForColorEnum
 
 
@@ -70,13 +70,21 @@ class UniV3Pool(object):
         self.quote_token = quote_token
         self.tick_spacing = int(fee * 200)
         self.fee: Decimal = fee * Decimal(10000)
-        self.fee_rate: Decimal = Decimal(fee) / Decimal(100)
+        self._fee_rate: Decimal = Decimal(fee) / Decimal(100)
+        self._fee_rate_float: float = float(self._fee_rate)
+
+    @property
+    def fee_rate(self) -> Decimal | float:
+        """
+        fee rate of this pool, e.g. 0.0005. It's float in fast numeric backend.
+        """
+        return self._fee_rate_float if is_fast_backend() else self._fee_rate
 
     def __str__(self):
         return (
             "PoolBaseInfo(Token0: {},".format(self.token0)
             + "Token1: {},".format(self.token1)
-            + "fee: {}%,".format(self.fee_rate * Decimal(100))
+            + "fee: {}%,".format(self._fee_rate * Decimal(100))
             + "base token: {})".format(self.token0.name if self.is_token0_quote else self.token1.name)
         )
 
@@ -203,10 +211,15 @@ class UniLpBalance(MarketBalance):
 #         return self.balance * Decimal(10**self.decimal)
 
 
-@dataclass
+_POSITION_VALUES = ("pending_amount0", "pending_amount1", "liquidity", "lower_price", "upper_price", "transferred")
+
+
+@dataclass(slots=True)
 class Position(object):
     """
-    keeps variables for get_position
+    | keeps variables for get_position.
+    | Attributes are kept in slots, so a position is small and fast to create.
+    | If position is in a PositionTable, changes of attributes are counted by the table.
     """
 
     pending_amount0: Decimal
@@ -215,23 +228,185 @@ class Position(object):
     lower_price: Decimal
     upper_price: Decimal
     transferred: bool = False  # this position(nft) has been transferred, so owner is not current user.
+    # (table, key) of this position in PositionTable
+    _owner: tuple | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        owner = getattr(self, "_owner", None)
+        if owner is not None and name != "_owner":
+            owner[0].position_changed(owner[1], name)
+
+    def __getstate__(self):
+        return [getattr(self, name) for name in _POSITION_VALUES]
+
+    def __setstate__(self, state):
+        for name, value in zip(_POSITION_VALUES, state):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_owner", None)
+
+
+class PositionSnapshot(NamedTuple):
+    """
+    Immutable state of a position, see PositionTable.snapshot
+    """
+
+    position: PositionInfo
+    pending_amount0: Decimal
+    pending_amount1: Decimal
+    liquidity: int
+    lower_price: Decimal
+    upper_price: Decimal
+    transferred: bool
+
+
+class PositionTable(dict):
+    """
+    | Positions of UniLpMarket, key is PositionInfo and value is Position, it can be used as a dict.
+    | Values of a position are numbers, which are immutable,
+    | so snapshot only copies references of values, and positions can be restored from a snapshot later.
+    | Changes are counted, version is increased by any change of table or its positions,
+    | and structure_version is increased when positions are added, removed or replaced.
+    | Positions whose liquidity is changed are kept in liquidity_changed, until they are synced by market.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.version = 0
+        self.structure_version = 0
+        self.liquidity_changed: set = set()
+        self.update(*args, **kwargs)
+
+    def __reduce__(self):
+        return type(self), (dict(self),), self.__dict__
+
+    def __structure_changed(self):
+        self.version += 1
+        self.structure_version += 1
+
+    @staticmethod
+    def __release(position: Position | None):
+        if position is not None:
+            object.__setattr__(position, "_owner", None)
+
+    def position_changed(self, key: PositionInfo, name: str):
+        """
+        Called by position after its attribute is changed
+
+        :param key: key of position
+        :type key: PositionInfo
+        :param name: attribute name
+        :type name: str
+        """
+        self.version += 1
+        if name == "liquidity":
+            self.liquidity_changed.add(key)
+
+    def __setitem__(self, key: PositionInfo, value: Position):
+        old = dict.get(self, key)
+        if old is not value:
+            self.__release(old)
+        super().__setitem__(key, value)
+        object.__setattr__(value, "_owner", (self, key))
+        self.__structure_changed()
+
+    def __delitem__(self, key: PositionInfo):
+        self.__release(dict.get(self, key))
+        super().__delitem__(key)
+        self.__structure_changed()
+
+    def pop(self, key: PositionInfo, *args):
+        if key in self:
+            self.__release(dict.get(self, key))
+            self.__structure_changed()
+        return super().pop(key, *args)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.__release(value)
+        self.__structure_changed()
+        return key, value
+
+    def clear(self):
+        for position in self.values():
+            self.__release(position)
+        super().clear()
+        self.__structure_changed()
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key: PositionInfo, default: Position = None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def snapshot(self) -> Tuple[PositionSnapshot, ...]:
+        """
+        Take a snapshot of all the positions
+
+        :return: state of positions
+        :rtype: Tuple[PositionSnapshot, ...]
+        """
+        return tuple(
+            PositionSnapshot(
+                k, v.pending_amount0, v.pending_amount1, v.liquidity, v.lower_price, v.upper_price, v.transferred
+            )
+            for k, v in self.items()
+        )
+
+    def restore(self, snapshot: Tuple[PositionSnapshot, ...]):
+        """
+        Replace all the positions with a snapshot
+
+        :param snapshot: result of snapshot
+        :type snapshot: Tuple[PositionSnapshot, ...]
+        """
+        self.clear()
+        for s in snapshot:
+            self[s.position] = Position(
+                s.pending_amount0, s.pending_amount1, s.liquidity, s.lower_price, s.upper_price, s.transferred
+            )
+
+    def total_liquidity(self) -> int:
+        """
+        Sum of liquidity of all positions
+
+        :return: total liquidity
+        :rtype: int
+        """
+        return sum(v.liquidity for v in self.values())
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Positions in a dataframe, columns are lower_tick, upper_tick, pending0, pending1, liquidity and transferred
+
+        :return: positions
+        :rtype: pd.DataFrame
+        """
+        return pd.DataFrame(
+            {
+                "lower_tick": [k.lower_tick for k in self.keys()],
+                "upper_tick": [k.upper_tick for k in self.keys()],
+                "pending0": [v.pending_amount0 for v in self.values()],
+                "pending1": [v.pending_amount1 for v in self.values()],
+                "liquidity": [v.liquidity for v in self.values()],
+                "transferred": [v.transferred for v in self.values()],
+            },
+            columns=["lower_tick", "upper_tick", "pending0", "pending1", "liquidity", "transferred"],
+        )
 
 
 def position_dict_to_dataframe(positions: Dict[PositionInfo, Position]) -> pd.DataFrame:
-    pos_dict = {
-        "lower_tick": [],
-        "upper_tick": [],
-        "pending0": [],
-        "pending1": [],
-        "liquidity": [],
-    }
-    for k, v in positions.items():
-        pos_dict["lower_tick"].append(k.lower_tick)
-        pos_dict["upper_tick"].append(k.upper_tick)
-        pos_dict["pending0"].append(console_text.format_value(v.pending_amount0))
-        pos_dict["pending1"].append(console_text.format_value(v.pending_amount1))
-        pos_dict["liquidity"].append(v.liquidity)
-    return pd.DataFrame(pos_dict)
+    """
+    Positions in a dataframe for printing, the same as PositionTable.to_dataframe, but pending fees are formatted,
+    and transferred column is dropped.
+    """
+    df = PositionTable.to_dataframe(positions).drop(columns="transferred")
+    df["pending0"] = df["pending0"].map(console_text.format_value)
+    df["pending1"] = df["pending1"].map(console_text.format_value)
+    return df
 
 
 @dataclass
@@ -398,6 +573,76 @@ class CollectFeeAction(UniLpBaseAction):
         )
 
 
+@dataclass
+class BatchLiquidityAction(UniLpBaseAction):
+    """
+    Parent class of batch operations on positions, one action is recorded for a batch.
+
+    :param positions: positions operated
+    :type positions: List[PositionInfo]
+    :param liquidity: liquidity added or removed of each position
+    :type liquidity: List[int]
+    :param base_amount: total base token amount deposited or collected
+    :type base_amount: UnitDecimal
+    :param quote_amount: total quote token amount deposited or collected
+    :type quote_amount: UnitDecimal
+    """
+
+    positions: List[PositionInfo]
+    liquidity: List[int]
+    base_amount: UnitDecimal
+    quote_amount: UnitDecimal
+
+    def get_output_str(self) -> str:
+        """
+        get colored and formatted string to output in console
+
+        :return: formatted string
+        :rtype: str
+        """
+        sign = "-" if self.action_type == ActionTypeEnum.uni_lp_batch_add_liquidity else "+"
+        return get_action_str(
+            self,
+            ForColorEnum.blue,
+            {
+                "positions": len(self.positions),
+                "liquidity": sum(self.liquidity),
+                "balance": f"{self.base_balance_after.to_str()}({sign}{self.base_amount.to_str()}), {self.quote_balance_after.to_str()}({sign}{self.quote_amount.to_str()})",
+            },
+        )
+
+
+@dataclass
+class BatchAddLiquidityAction(BatchLiquidityAction):
+    """
+    Add liquidity to many positions
+    """
+
+    def set_type(self):
+        self.action_type = ActionTypeEnum.uni_lp_batch_add_liquidity
+
+
+@dataclass
+class BatchRemoveLiquidityAction(BatchLiquidityAction):
+    """
+    Remove liquidity from many positions, base_amount and quote_amount are collected amounts if collect is true,
+    otherwise they are token amounts moved into positions' pending fee.
+    """
+
+    def set_type(self):
+        self.action_type = ActionTypeEnum.uni_lp_batch_remove_liquidity
+
+
+@dataclass
+class BatchCollectFeeAction(BatchLiquidityAction):
+    """
+    Collect fee and tokens of many positions, liquidity is remaining liquidity of each position
+    """
+
+    def set_type(self):
+        self.action_type = ActionTypeEnum.uni_lp_batch_collect
+
+
 @dataclass
 class RemoveLiquidityAction(UniLpBaseAction):
     """
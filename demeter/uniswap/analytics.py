@@ -0,0 +1,262 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ._typing import (
+    UniV3Pool,
+    AddLiquidityAction,
+    RemoveLiquidityAction,
+    BatchAddLiquidityAction,
+    BatchRemoveLiquidityAction,
+)
+from .._typing import DemeterError
+from ..broker import BaseAction, MarketInfo
+
+ANALYTICS_COLUMNS = [
+    "base_in_position",
+    "quote_in_position",
+    "delta",
+    "gamma",
+    "position_value",
+    "hodl_value",
+    "impermanent_loss",
+    "base_fee",
+    "quote_fee",
+    "fee_value",
+    "fee_apr",
+]
+
+YEAR = pd.Timedelta(days=365)
+
+
+def _sqrt_price(pool: UniV3Pool, price: np.ndarray) -> np.ndarray:
+    # price is base/quote in human unit, convert to sqrt price of token1/token0 in atomic unit
+    pool_price = 1 / price if pool.is_token0_quote else price
+    return np.sqrt(pool_price / 10 ** (pool.token0.decimal - pool.token1.decimal))
+
+
+def _amounts(pool: UniV3Pool, sqrt_price, lower, upper, liquidity) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Token amounts of positions in base/quote and human unit, arrays are broadcast.
+    """
+    sqrt_lower = 1.0001 ** (np.asarray(lower) / 2)
+    sqrt_upper = 1.0001 ** (np.asarray(upper) / 2)
+    sp = np.clip(sqrt_price, sqrt_lower, sqrt_upper)
+    amount0 = liquidity * (sqrt_upper - sp) / (sp * sqrt_upper) / 10**pool.token0.decimal
+    amount1 = liquidity * (sp - sqrt_lower) / 10**pool.token1.decimal
+    return (amount1, amount0) if pool.is_token0_quote else (amount0, amount1)
+
+
+def delta_gamma(
+    pool: UniV3Pool,
+    price: np.ndarray,
+    lower_ticks: np.ndarray,
+    upper_ticks: np.ndarray,
+    liquidity: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    | Vectorized helper.get_delta_gamma, delta and gamma of positions at every price.
+    | Delta is the amount of base token in position, gamma is its derivative by price, which is 0 out of range.
+    | Positions are summed up.
+
+    :param pool: pool info
+    :type pool: UniV3Pool
+    :param price: price of base token in quote token, shape (bars,)
+    :type price: np.ndarray
+    :param lower_ticks: lower tick of positions, shape (positions,)
+    :type lower_ticks: np.ndarray
+    :param upper_ticks: upper tick of positions, shape (positions,)
+    :type upper_ticks: np.ndarray
+    :param liquidity: liquidity of positions, shape (positions,) if it's constant, or (bars, positions)
+    :type liquidity: np.ndarray
+    :return: delta and gamma, shape (bars,)
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    price = np.asarray(price, dtype=float)[:, None]
+    liquidity = np.asarray(liquidity, dtype=float)
+    sqrt_price = _sqrt_price(pool, price)
+    base, _ = _amounts(pool, sqrt_price, lower_ticks, upper_ticks, liquidity)
+    in_range = (sqrt_price > 1.0001 ** (np.asarray(lower_ticks) / 2)) & (
+        sqrt_price < 1.0001 ** (np.asarray(upper_ticks) / 2)
+    )
+    decimal_sum = pool.token0.decimal + pool.token1.decimal
+    gamma = np.where(in_range, -0.5 * liquidity / 10 ** (decimal_sum / 2) / price**1.5, 0.0)
+    return base.sum(axis=1), gamma.sum(axis=1)
+
+
+class LpAnalytics:
+    """
+    | Analyze LP positions over the whole pool data without running back test.
+    | Positions are given as liquidity of each tick range in every bar, so they can change over time,
+    | e.g. liquidity replayed from actions of a back test, see liquidity_from_actions.
+    | Calculation is done in float on arrays of (bar, position), result may be slightly different from back test in Decimal.
+    | Rules are the same as UniLpMarket:
+    | * liquidity of a bar is the liquidity after actions in this bar, so a position added in a bar earns fee of this bar
+    | * fee is earned in a bar if close tick is in range, or price crossed the range, or moved out of range, see V3CoreLib.update_fee
+    | * share of fee is liquidity / (pool liquidity + total liquidity of positions)
+    | Impermanent loss is value of positions compared with holding the tokens deposited.
+    | Tokens are held when liquidity is added, and the held tokens are reduced proportionally when liquidity is removed.
+
+    :param pool: pool info
+    :type pool: UniV3Pool
+    :param data: pool data, the same as UniLpMarket.data, columns closeTick, currentLiquidity, inAmount0, inAmount1 and price are required
+    :type data: pd.DataFrame
+    """
+
+    def __init__(self, pool: UniV3Pool, data: pd.DataFrame):
+        for col in ["closeTick", "currentLiquidity", "inAmount0", "inAmount1", "price"]:
+            if col not in data.columns:
+                raise DemeterError(f"column {col} is required in pool data")
+        self.pool = pool
+        self.data = data
+        self._tick = np.asarray(data["closeTick"], dtype=float)
+        self._liquidity = np.asarray(data["currentLiquidity"], dtype=float)
+        self._amount0 = np.asarray(data["inAmount0"], dtype=float) / 10**pool.token0.decimal
+        self._amount1 = np.asarray(data["inAmount1"], dtype=float) / 10**pool.token1.decimal
+        self._price = np.asarray(data["price"], dtype=float)
+        self._sqrt_price = _sqrt_price(pool, self._price)
+        self._fee_rate = float(pool.fee_rate)
+
+    def liquidity_from_actions(self, actions: List[BaseAction], market: MarketInfo | None = None) -> pd.DataFrame:
+        """
+        Replay liquidity of positions from actions of a back test, e.g. actuator.actions.
+
+        :param actions: actions, add/remove liquidity actions and their batch versions are used
+        :type actions: List[BaseAction]
+        :param market: only use actions of this market, if there are more than one uniswap market
+        :type market: MarketInfo
+        :return: liquidity of positions in every bar, columns are (lower_tick, upper_tick)
+        :rtype: pd.DataFrame
+        """
+        changes = {}
+        for action in actions:
+            if market is not None and action.market != market:
+                continue
+            if isinstance(action, AddLiquidityAction):
+                items = [(action.position, action.liquidity)]
+            elif isinstance(action, RemoveLiquidityAction):
+                items = [(action.position, -action.removed_liquidity)]
+            elif isinstance(action, BatchAddLiquidityAction):
+                items = zip(action.positions, action.liquidity)
+            elif isinstance(action, BatchRemoveLiquidityAction):
+                items = zip(action.positions, [-x for x in action.liquidity])
+            else:
+                continue
+            # actions between bars are applied to next bar
+            row = self.data.index.searchsorted(action.timestamp)
+            if row >= len(self.data.index):
+                continue
+            for position, liquidity in items:
+                key = (position.lower_tick, position.upper_tick)
+                # liquidity is kept in int, as it may be larger than precision of float
+                changes.setdefault(key, np.zeros(len(self.data.index), dtype=object))[row] += int(liquidity)
+        keys = list(changes.keys())
+        return pd.DataFrame(
+            np.cumsum(np.column_stack([changes[k] for k in keys]), axis=0) if len(keys) > 0 else None,
+            index=self.data.index,
+            columns=pd.MultiIndex.from_tuples(keys, names=["lower_tick", "upper_tick"]),
+        )
+
+    def _liquidity_matrix(self, positions) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if isinstance(positions, pd.DataFrame):
+            liquidity = positions.astype(float).reindex(self.data.index).ffill().fillna(0)
+            lower = np.asarray(liquidity.columns.get_level_values(0), dtype=np.int64)
+            upper = np.asarray(liquidity.columns.get_level_values(1), dtype=np.int64)
+            matrix = liquidity.to_numpy(dtype=float)
+        else:
+            positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+            lower, upper = positions[:, 0].astype(np.int64), positions[:, 1].astype(np.int64)
+            matrix = np.broadcast_to(positions[:, 2], (len(self.data.index), len(positions)))
+        if np.any(lower >= upper):
+            raise DemeterError("lower tick should be less than upper tick")
+        return lower, upper, matrix
+
+    def _hodl_amounts(self, lower, upper, matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tokens held if not deposited, they are step functions which only change when liquidity is changed.
+        """
+        base = np.zeros(matrix.shape)
+        quote = np.zeros(matrix.shape)
+        bars = matrix.shape[0]
+        for j in range(matrix.shape[1]):
+            liquidity = matrix[:, j]
+            rows = np.flatnonzero(np.diff(liquidity, prepend=0.0) != 0)
+            held_base = held_quote = 0.0
+            last = 0.0
+            for k, row in enumerate(rows):
+                if liquidity[row] > last:
+                    b, q = _amounts(self.pool, self._sqrt_price[row], lower[j], upper[j], liquidity[row] - last)
+                    held_base, held_quote = held_base + b, held_quote + q
+                else:
+                    ratio = liquidity[row] / last
+                    held_base, held_quote = held_base * ratio, held_quote * ratio
+                end = rows[k + 1] if k + 1 < len(rows) else bars
+                base[row:end, j] = held_base
+                quote[row:end, j] = held_quote
+                last = liquidity[row]
+        return base, quote
+
+    def _fees(self, lower, upper, matrix) -> Tuple[np.ndarray, np.ndarray]:
+        tick = self._tick[:, None]
+        last_tick = np.concatenate([self._tick[:1], self._tick[:-1]])[:, None]
+        earning = (
+            ((upper >= tick) & (tick >= lower))
+            | ((last_tick > upper) & (tick < lower))
+            | ((tick > upper) & (last_tick < lower))
+            | ((upper >= last_tick) & (last_tick >= lower) & ((tick > upper) | (tick < lower)))
+        )
+        total = self._liquidity + matrix.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(earning & (matrix > 0), matrix / total[:, None], 0.0) * self._fee_rate
+        fee0 = (share * self._amount0[:, None]).sum(axis=1)
+        fee1 = (share * self._amount1[:, None]).sum(axis=1)
+        return (fee1, fee0) if self.pool.is_token0_quote else (fee0, fee1)
+
+    def analyze(self, positions: pd.DataFrame | Sequence[Tuple[int, int, int]]) -> pd.DataFrame:
+        """
+        Analyze positions in every bar, positions are summed up.
+
+        | Columns of result:
+        | base_in_position, quote_in_position: token amounts in positions
+        | delta, gamma: see delta_gamma
+        | position_value: value of positions, fee is not included
+        | hodl_value: value of tokens if they were held instead of deposited
+        | impermanent_loss: position_value / hodl_value - 1
+        | base_fee, quote_fee: fee earned in this bar
+        | fee_value: value of fee earned in this bar
+        | fee_apr: realized fee apr since the beginning, cumulative fee value / time weighted position value
+
+        :param positions: liquidity of positions in every bar, e.g. result of liquidity_from_actions,
+            or (lower tick, upper tick, liquidity) of positions which are held during the whole data
+        :type positions: pd.DataFrame | Sequence[Tuple[int, int, int]]
+        :return: analytics of every bar
+        :rtype: pd.DataFrame
+        """
+        lower, upper, matrix = self._liquidity_matrix(positions)
+        base, quote = _amounts(self.pool, self._sqrt_price[:, None], lower, upper, matrix)
+        delta, gamma = delta_gamma(self.pool, self._price, lower, upper, matrix)
+        hodl_base, hodl_quote = self._hodl_amounts(lower, upper, matrix)
+        base_fee, quote_fee = self._fees(lower, upper, matrix)
+
+        df = pd.DataFrame(
+            {
+                "base_in_position": base.sum(axis=1),
+                "quote_in_position": quote.sum(axis=1),
+                "delta": delta,
+                "gamma": gamma,
+            },
+            index=self.data.index,
+        )
+        df["position_value"] = df["base_in_position"] * self._price + df["quote_in_position"]
+        df["hodl_value"] = hodl_base.sum(axis=1) * self._price + hodl_quote.sum(axis=1)
+        df["impermanent_loss"] = (df["position_value"] / df["hodl_value"]).where(df["hodl_value"] > 0) - 1
+        df["base_fee"] = base_fee
+        df["quote_fee"] = quote_fee
+        df["fee_value"] = base_fee * self._price + quote_fee
+
+        index = self.data.index
+        bar_length = index[1] - index[0] if len(index) > 1 else pd.Timedelta(minutes=1)
+        capital_time = (df["position_value"] * (bar_length / YEAR)).cumsum()
+        df["fee_apr"] = (df["fee_value"].cumsum() / capital_time).where(capital_time > 0)
+        return df[ANALYTICS_COLUMNS]
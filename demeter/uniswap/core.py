@@ -1,8 +1,15 @@
 from decimal import Decimal
+from typing import List
+
+import numpy as np
 
 from ._typing import UniV3Pool, Position, UniV3PoolStatus, PositionInfo
 from .helper import base_unit_price_to_tick, from_atomic_unit
 from .liquitidy_math import get_amounts, get_liquidity
+from ..utils import is_fast_backend, to_number
+
+# fee of positions is calculated on arrays if there are at least this number of positions earning fee
+_VECTORIZE_MIN_POSITIONS = 32
 
 
 class V3CoreLib(object):
@@ -127,7 +134,10 @@ class V3CoreLib(object):
 
         # in most cases, tick will not cross to on_bar one, which means L will not change.
         def calc_amounts():
-            share = Decimal(position.liquidity) / Decimal(state.currentLiquidity)
+            if is_fast_backend():
+                share = position.liquidity / state.currentLiquidity
+            else:
+                share = Decimal(position.liquidity) / Decimal(state.currentLiquidity)
             position.pending_amount0 += from_atomic_unit(state.inAmount0, pool.token0.decimal) * share * pool.fee_rate
             position.pending_amount1 += from_atomic_unit(state.inAmount1, pool.token1.decimal) * share * pool.fee_rate
 
@@ -144,3 +154,77 @@ class V3CoreLib(object):
 
         if condition_in_position or condition_over_position or condition_in_to_out_position:
             calc_amounts()
+
+    @staticmethod
+    def liquidity_array(positions: List[Position]) -> np.ndarray:
+        """
+        Liquidity of positions in number type of current backend, it's float array for fast backend,
+        and object array of Decimal for exact backend, as liquidity may exceed int64.
+
+        :param positions: positions
+        :return: liquidity array
+        """
+        dtype = float if is_fast_backend() else object
+        return np.array([to_number(p.liquidity) for p in positions], dtype=dtype)
+
+    @staticmethod
+    def update_fees(
+        last_tick: int,
+        pool: UniV3Pool,
+        lower_ticks: np.ndarray,
+        upper_ticks: np.ndarray,
+        positions: List[Position],
+        state: UniV3PoolStatus,
+        liquidity: np.ndarray | None = None,
+    ):
+        """
+        | Update fee of many positions, the same as calling update_fee on every position.
+        | Range conditions are evaluated on tick arrays at once, share of liquidity and fees are
+        | calculated on liquidity array at once, then fees are added to pending amounts of positions which earn fee.
+
+        :param last_tick: tick of last bar
+        :param pool: operation on which pool
+        :param lower_ticks: lower tick of positions
+        :param upper_ticks: upper tick of positions
+        :param positions: positions, in the same order of tick arrays
+        :param state: UniV3PoolStatus
+        :param liquidity: liquidity of positions, see liquidity_array. If it's None, it will be read from positions
+        :return: count of positions which earned fee
+        """
+        close_tick = state.closeTick
+        # in position
+        earning = (upper_ticks >= close_tick) & (close_tick >= lower_ticks)
+        if last_tick:
+            # crossed the whole position
+            earning |= ((last_tick > upper_ticks) & (close_tick < lower_ticks)) | (
+                (close_tick > upper_ticks) & (last_tick < lower_ticks)
+            )
+            # moved from in position to out of position
+            earning |= (
+                (upper_ticks >= last_tick)
+                & (last_tick >= lower_ticks)
+                & ((close_tick > upper_ticks) | (close_tick < lower_ticks))
+            )
+        matched = np.flatnonzero(earning)
+        if len(matched) < 1:
+            return 0
+        if liquidity is None:
+            liquidity = V3CoreLib.liquidity_array(positions)
+        fee_rate = pool.fee_rate
+        amount0 = from_atomic_unit(state.inAmount0, pool.token0.decimal)
+        amount1 = from_atomic_unit(state.inAmount1, pool.token1.decimal)
+        current_liquidity = to_number(state.currentLiquidity)
+        if len(matched) < _VECTORIZE_MIN_POSITIONS:
+            # numpy calls on small arrays cost more than a short loop
+            shares = [x / current_liquidity for x in liquidity[matched].tolist()]
+            fees0 = [amount0 * x * fee_rate for x in shares]
+            fees1 = [amount1 * x * fee_rate for x in shares]
+        else:
+            share = liquidity[matched] / current_liquidity
+            fees0 = (share * amount0 * fee_rate).tolist()
+            fees1 = (share * amount1 * fee_rate).tolist()
+        for i, fee0, fee1 in zip(matched.tolist(), fees0, fees1):
+            position = positions[i]
+            position.pending_amount0 += fee0
+            position.pending_amount1 += fee1
+        return len(matched)
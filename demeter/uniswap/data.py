@@ -2,8 +2,9 @@ from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import Dict
+from typing import Dict, List
 
+import numpy as np
 import pandas as pd
 from pandas import _typing as pd_typing
 
@@ -11,6 +12,8 @@ from ..broker import Rule
 
 DEFAULT_AGG_METHOD = "first"
 EMPTY_RULE = Rule(None, None, None)
+# intervals of minutely data aggregated in advance, see build_aggregates
+AGGREGATE_INTERVALS = ["5min", "15min", "1h", "1d"]
 
 
 @dataclass
@@ -85,6 +88,13 @@ LINE_RULES = {
     LineTypeEnum.currentLiquidity.name: Rule("first", "ffill", None),
 }
 
+_TICK_COLUMNS = {
+    LineTypeEnum.closeTick.name,
+    LineTypeEnum.openTick.name,
+    LineTypeEnum.lowestTick.name,
+    LineTypeEnum.highestTick.name,
+}
+
 
 def get_line_rules_safe(key: str) -> Rule:
     """
@@ -148,6 +158,94 @@ def resample(
     return df_new
 
 
+def _fixed_length(freq: str) -> pd.Timedelta | None:
+    try:
+        return pd.Timedelta(pd.tseries.frequencies.to_offset(freq))
+    except (ValueError, TypeError):
+        # e.g. month is not a fixed length
+        return None
+
+
+def resample_aggregated(df: pd.DataFrame, freq: str, aggregates: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    | Resample minutely data with default rules, aggregated data in aggregates is reused.
+    | Aggregate methods of predefined columns are sum/first/last/min/max, so they can be aggregated again,
+    | and data is resampled from the largest aggregated interval which can divide freq.
+    | Intervals in AGGREGATE_INTERVALS which can divide freq are built first, then they can be reused by other intervals.
+    | Result is saved to aggregates.
+
+    :param df: minutely data
+    :type df: pd.DataFrame
+    :param freq: resample rule, e.g. 1h
+    :type freq: str
+    :param aggregates: aggregated data of df, interval => data
+    :type aggregates: Dict[str, pd.DataFrame]
+    :return: resampled data
+    :rtype: pd.DataFrame
+    """
+    if freq in aggregates:
+        return aggregates[freq]
+    length = _fixed_length(freq)
+    source = df
+    if length is not None:
+        finer = {}
+        for interval in list(aggregates.keys()) + AGGREGATE_INTERVALS:
+            interval_length = _fixed_length(interval)
+            if interval_length is not None and interval_length < length and length % interval_length == pd.Timedelta(0):
+                finer[interval] = interval_length
+        for interval, interval_length in sorted(finer.items(), key=lambda x: x[1]):
+            source = resample_aggregated(df, interval, aggregates)
+    aggregates[freq] = resample(source, freq)
+    return aggregates[freq]
+
+
+def build_aggregates(df: pd.DataFrame, intervals: List[str] | None = None) -> Dict[str, pd.DataFrame]:
+    """
+    Resample minutely data to several intervals in advance, each interval is aggregated from a finer one.
+
+    :param df: minutely data
+    :type df: pd.DataFrame
+    :param intervals: intervals to aggregate, default is AGGREGATE_INTERVALS
+    :type intervals: List[str]
+    :return: interval => aggregated data
+    :rtype: Dict[str, pd.DataFrame]
+    """
+    aggregates = {}
+    for freq in AGGREGATE_INTERVALS if intervals is None else intervals:
+        resample_aggregated(df, freq, aggregates)
+    return aggregates
+
+
+def join_aggregates(aggregates: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Join aggregated data to one dataframe, so it can be saved like prepared data. Index is (interval, timestamp).
+
+    :param aggregates: interval => aggregated data
+    :type aggregates: Dict[str, pd.DataFrame]
+    :return: joined data
+    :rtype: pd.DataFrame
+    """
+    return pd.concat(aggregates, names=["interval", "timestamp"])
+
+
+def split_aggregates(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Split result of join_aggregates
+
+    :param df: joined data
+    :type df: pd.DataFrame
+    :return: interval => aggregated data
+    :rtype: Dict[str, pd.DataFrame]
+    """
+    aggregates = {}
+    for interval in df.index.get_level_values(0).unique():
+        part = df.xs(interval, level=0)
+        part.index.name = None
+        part.index.freq = interval
+        aggregates[interval] = part
+    return aggregates
+
+
 def fillna(
     df: pd.DataFrame,
     value: object | pd_typing.ArrayLike | None = None,
@@ -155,13 +253,18 @@ def fillna(
     axis: pd_typing.Axis | None = None,
     inplace: bool = False,
     limit=None,
+    vectorized: bool = True,
 ) -> pd.DataFrame | None:
     """
     fill empty item. param is the same to pandas.Series.fillna
 
     if column name is predefined, method and value will be omitted, and data will be filled as predefined
 
+    | If vectorized, and no other parameters are set, columns are filled by numpy kernels on their values,
+    | and new dataframe is built once. Result is the same, Decimal amounts in exact numeric backend are kept.
     """
+    if vectorized and value is None and method is None and axis in (None, 0) and not inplace and limit is None:
+        return _fillna_by_kernels(df)
     new_df = df.copy(False)
 
     # fill close tick first, it will be used later.
@@ -207,6 +310,78 @@ def fillna(
     return new_df
 
 
+def _ffill_values(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Forward fill values where mask is true, leading missing values are kept. It works for any dtype.
+    """
+    positions = np.where(mask, 0, np.arange(len(values)))
+    np.maximum.accumulate(positions, out=positions)
+    return values[positions]
+
+
+def _bfill_values(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    return _ffill_values(values[::-1], mask[::-1])[::-1]
+
+
+def _fillna_by_kernels(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The same as fillna with default parameters, columns are filled on numpy arrays.
+
+    | Tick columns are filled as float64, ticks are integers which float64 keeps exactly, and NaN is kept for
+    | leading rows which can not be filled.
+    | Amount and liquidity columns keep their dtype. They are float64 in fast numeric backend,
+    | and Decimal objects in exact backend, as liquidity(uint128) and raw amounts do not fit in float64 or int64.
+    | Kernels only work on int64 positions, so an object column is gathered once and Decimal is never computed.
+    """
+    columns = {}
+    close_name = LineTypeEnum.closeTick.name
+    if close_name in df.columns:
+        close = df[close_name].to_numpy(dtype=np.float64)
+        columns[close_name] = _ffill_values(close, np.isnan(close))
+    for column_name in df.columns:
+        if column_name == close_name:
+            continue
+        rule = get_line_rules_safe(column_name)
+        if rule.fillna_method is None and rule.fillna_value is None:
+            raise ValueError("None is not supported, use bfill or ffill")
+        if column_name in _TICK_COLUMNS:
+            values = df[column_name].to_numpy(dtype=np.float64)
+        else:
+            values = df[column_name].to_numpy()
+        mask = pd.isna(values)
+        if not mask.any():
+            columns[column_name] = values
+        elif column_name in _TICK_COLUMNS and close_name in df.columns:
+            # all tick related field will be filled with close_tick.
+            columns[column_name] = np.where(mask, columns[close_name], values)
+        elif rule.fillna_value is not None:
+            values = values.copy()
+            values[mask] = rule.fillna_value
+            columns[column_name] = values
+        elif rule.fillna_method == "ffill":
+            columns[column_name] = _ffill_values(values, mask)
+        else:
+            columns[column_name] = _bfill_values(values, mask)
+    return pd.DataFrame(columns, index=df.index, columns=df.columns)
+
+
+def bfill(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Backward fill all the columns, the same as DataFrame.bfill, but columns are filled on numpy arrays.
+
+    :param df: data
+    :type df: pd.DataFrame
+    :return: filled data
+    :rtype: pd.DataFrame
+    """
+    columns = {}
+    for column_name in df.columns:
+        values = df[column_name].to_numpy()
+        mask = pd.isna(values)
+        columns[column_name] = _bfill_values(values, mask) if mask.any() else values
+    return pd.DataFrame(columns, index=df.index, columns=df.columns)
+
+
 def df_fill_na(
     df: pd.DataFrame,
     value=None,
@@ -1,9 +1,20 @@
 import math
 from decimal import Decimal, getcontext
+from functools import lru_cache
 from typing import Tuple, NamedTuple
 
-from .liquitidy_math import get_sqrt_ratio_at_tick, get_liquidity, get_amounts
+import numpy as np
+import pandas as pd
+
+from .liquitidy_math import (
+    get_sqrt_ratio_at_tick,
+    get_liquidity,
+    get_amounts,
+    _sqrt_ratio_at_tick,
+    SQRT_RATIO_CACHE_SIZE,
+)
 from .. import DemeterError
+from ..utils import is_fast_backend
 
 Q96 = Decimal(2**96)
 SQRT_1p0001 = math.sqrt(Decimal(1.0001))
@@ -45,6 +56,9 @@ def sqrt_price_x96_to_base_unit_price(
     :param is_token0_quote: is token 0 the quote token
     :return: price in base unit, e.g. 1234.56 eth/usdc
     """
+    if is_fast_backend():
+        pool_price = (sqrt_price_x96 / 2**96) ** 2 * 10 ** (token_0_decimal - token_1_decimal)
+        return 1 / pool_price if is_token0_quote else pool_price
     sqrt_price = _from_x96(sqrt_price_x96)
     pool_price = sqrt_price**2 * Decimal(10 ** (token_0_decimal - token_1_decimal))
 
@@ -66,6 +80,8 @@ def base_unit_price_to_sqrt_price_x96(
     # quote price->add decimal pool price->sqrt_price ->ticker
 
     price = 1 / price if is_token0_quote else price
+    if is_fast_backend():
+        return int(math.sqrt(price / 10 ** (token_0_decimal - token_1_decimal)) * 2**96)
     atomic_unit_price = price / Decimal(10 ** (token_0_decimal - token_1_decimal))
     sqrt_price = Decimal.sqrt(atomic_unit_price)
     return _to_x96(sqrt_price)
@@ -113,12 +129,49 @@ def tick_to_base_unit_price(tick: int, token_0_decimal: int, token_1_decimal: in
     :param is_token0_quote: quote on token0
     :return: quote price
     """
+    # fast backend and decimal precision are part of key, as they change the result
+    return _tick_to_base_unit_price(
+        int(tick), token_0_decimal, token_1_decimal, is_token0_quote, is_fast_backend(), getcontext().prec
+    )
+
+
+@lru_cache(maxsize=SQRT_RATIO_CACHE_SIZE)
+def _tick_to_base_unit_price(
+    tick: int, token_0_decimal: int, token_1_decimal: int, is_token0_quote: bool, fast: bool, prec: int
+):
     sqrt_price_x96 = get_sqrt_ratio_at_tick(tick)
+    if fast:
+        pool_price = (sqrt_price_x96 / 2**96) ** 2 * 10 ** (token_0_decimal - token_1_decimal)
+        return 1 / pool_price if is_token0_quote else pool_price
     atomic_unit_price = _from_x96(sqrt_price_x96) ** 2
     pool_price = atomic_unit_price * Decimal(10 ** (token_0_decimal - token_1_decimal))
     return Decimal(1 / pool_price) if is_token0_quote else pool_price
 
 
+def ticks_to_base_unit_price(
+    ticks: np.ndarray, token_0_decimal: int, token_1_decimal: int, is_token0_quote: bool
+) -> np.ndarray:
+    """
+    get quote price of many ticks at once, calculation is done in float.
+
+    :param ticks: tick array
+    :param token_0_decimal: token0 decimal
+    :param token_1_decimal: token1 decimal
+    :param is_token0_quote: quote on token0
+    :return: quote price array
+    """
+    pool_price = np.power(1.0001, np.asarray(ticks, dtype=float)) * 10.0 ** (token_0_decimal - token_1_decimal)
+    return 1 / pool_price if is_token0_quote else pool_price
+
+
+def clear_tick_cache():
+    """
+    Clear cached sqrt ratio and price of ticks, to release memory after back test
+    """
+    _sqrt_ratio_at_tick.cache_clear()
+    _tick_to_base_unit_price.cache_clear()
+
+
 def base_unit_price_to_tick(price: Decimal, token_0_decimal: int, token_1_decimal: int, is_token0_quote: bool) -> int:
     """
     quote price to tick price
@@ -132,6 +185,8 @@ def base_unit_price_to_tick(price: Decimal, token_0_decimal: int, token_1_decima
 
     # quote price->add decimal pool price->sqrt_price ->tick
     price = 1 / price if is_token0_quote else price
+    if is_fast_backend():
+        return _sqrt_price_to_tick(math.sqrt(price / 10 ** (token_0_decimal - token_1_decimal)))
     atomic_unit_price = price / Decimal(10 ** (token_0_decimal - token_1_decimal))
     sqrt_price = Decimal.sqrt(atomic_unit_price)
     return _sqrt_price_to_tick(sqrt_price)
@@ -145,6 +200,8 @@ def from_atomic_unit(atomic_unit_amount: int, decimal: int) -> Decimal:
     :param decimal: decimal of token
     :return: token amount in base unit
     """
+    if is_fast_backend():
+        return int(atomic_unit_amount) / 10**decimal
     return Decimal(int(atomic_unit_amount)) / Decimal(10**decimal)
 
 
@@ -341,6 +398,54 @@ class TickResult(NamedTuple):
     lower_delta: int
 
 
+MAX_TICK = 887272
+# count of upper ticks estimated together in find_tick_range_at_rate and find_tick_ranges_at_rate
+_UPPER_BLOCK = 1024
+
+
+def _rate_of_range(sqrt_price, price, lower, upper, token0_amount, token1_amount, decimal0, decimal1, is_0_quote):
+    liq = get_liquidity(sqrt_price, lower, upper, token0_amount, token1_amount, decimal0, decimal1)
+    amount0, amount1 = get_amounts(sqrt_price, lower, upper, liq, decimal0, decimal1)
+    if is_0_quote:
+        val0, val1 = amount0, amount1 * price
+    else:
+        val0, val1 = amount0 * price, amount1
+    return val1 / val0
+
+
+def _lower_step_guess(center_tick, upper_delta, tick_spacing, target, price, decimal0, decimal1, is_0_quote):
+    """
+    | Estimate in float, how many tick spacings lower tick should be below -upper_delta to reach target rate.
+    | Rate only depends on sqrt price of lower tick(A) when center(P) and upper(B) are fixed: rate = (P - A) * g
+    | works with numbers and numpy arrays.
+    """
+    sqrt_p = np.power(1.0001, center_tick / 2)
+    sqrt_b = np.power(1.0001, (center_tick + upper_delta) / 2)
+    scale = 10.0 ** (decimal0 - decimal1) * sqrt_p * sqrt_b / (sqrt_b - sqrt_p)
+    g = scale * price if is_0_quote else scale / price
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lower_tick = 2 * np.log(sqrt_p - target / g) / math.log(1.0001)
+    # nan if target can not be reached, as lower sqrt price should be above 0
+    return (center_tick - lower_tick - upper_delta) / tick_spacing
+
+
+def _upper_delta_candidates(
+    center_tick, upper_deltas, tick_spacing, low, high, price, decimal0, decimal1, is_0_quote
+) -> np.ndarray:
+    """
+    | Estimate in float, whether a lower tick can make rate fall in [low, high) for each upper delta.
+    | For an upper delta, steps of lower tick whose rate is in range are between the closed form solutions of low and high.
+    | Works with numbers and numpy arrays, returns a bool mask.
+    """
+    max_step = np.floor((center_tick + MAX_TICK - upper_deltas) / tick_spacing)
+    first = np.ceil(_lower_step_guess(center_tick, upper_deltas, tick_spacing, low, price, decimal0, decimal1, is_0_quote))
+    last = _lower_step_guess(center_tick, upper_deltas, tick_spacing, high, price, decimal0, decimal1, is_0_quote)
+    # nan means rate can't be reached, for low it's not solvable, for high all the steps are below it
+    first = np.maximum(np.nan_to_num(first, nan=np.inf), 1)
+    last = np.nan_to_num(last, nan=np.inf)
+    return (first <= max_step) & (first <= last)
+
+
 def find_tick_range_at_rate(
     price: Decimal,
     rate: Decimal,
@@ -351,7 +456,13 @@ def find_tick_range_at_rate(
     error=Decimal("0.00001"),
 ):
     """
-    Find iteratively, for a specific price, what tick range can make the quantities of two tokens exactly equal to a specific ratio.
+    | For a specific price, find what tick range can make the quantities of two tokens exactly equal to a specific ratio.
+    | Upper ticks which may have a solution are found in closed form for a block of upper ticks at a time,
+    | then for those upper ticks, lower tick is searched.
+    | As rate increases with distance of lower tick, lower tick is found by bisection,
+    | started from a closed form estimation, and verified by liquidity math.
+    | Result is the first range in order of upper distance, then lower distance, the lower tick is always further than upper tick.
+
     :param price: center price, it will be trimed according to tick space
     :param rate: the rate you want. amount1/amount0
     :param tick_spacing: tick spacing of the pool
@@ -363,7 +474,6 @@ def find_tick_range_at_rate(
     """
     center_tick = base_unit_price_to_tick(price, decimal0, decimal1, is_0_quote)
     center_tick = nearest_usable_tick(center_tick, tick_spacing)
-    idx = tick_spacing
 
     sqrt_price = tick_to_sqrt_price_x96(center_tick)
     price = sqrt_price_x96_to_base_unit_price(sqrt_price, decimal0, decimal1, is_0_quote)
@@ -373,31 +483,167 @@ def find_tick_range_at_rate(
         token1_amount, token0_amount = price, Decimal(1)
 
     rate = rate.quantize(error)
+    target = float(rate - error / 2)
+    # range of candidates is a little wider, so float error will not miss a solution
+    candidate_low = float(rate - error * Decimal("0.6"))
+    candidate_high = float(rate + error * Decimal("0.6"))
 
-    while center_tick + idx <= 887272:
-        print("trying", center_tick + idx)
+    def solve(idx: int) -> TickResult | None:
         upper = center_tick + idx
-        lower_idx = idx
-        val1, val0 = 0, 1
-        while val1 / val0 <= rate:
-            lower_idx += tick_spacing
-            lower = center_tick - lower_idx
-            liq = get_liquidity(sqrt_price, lower, upper, token0_amount, token1_amount, decimal0, decimal1)
-            amount0, amount1 = get_amounts(sqrt_price, lower, upper, liq, decimal0, decimal1)
-            if is_0_quote:
-                val0, val1 = amount0, amount1 * price
-            else:
-                val0, val1 = amount0 * price, amount1
-
-            if (val1 / val0).quantize(error) == rate:
-                return TickResult(
-                    final_price=tick_to_base_unit_price(center_tick, decimal0, decimal1, is_0_quote),
-                    rate=val1 / val0,
-                    center_tick=center_tick,
-                    upper=upper,
-                    lower=lower,
-                    upper_delta=upper - center_tick,
-                    lower_delta=lower - center_tick,
+        # lower tick is center_tick - idx - step * tick_spacing, step >= 1
+        max_step = (center_tick + MAX_TICK - idx) // tick_spacing
+        rates = {}
+
+        def rate_at(step: int) -> Decimal:
+            if step not in rates:
+                rates[step] = _rate_of_range(
+                    sqrt_price,
+                    price,
+                    center_tick - idx - step * tick_spacing,
+                    upper,
+                    token0_amount,
+                    token1_amount,
+                    decimal0,
+                    decimal1,
+                    is_0_quote,
                 )
-        idx += tick_spacing
+            return rates[step]
+
+        if max_step < 1 or rate_at(max_step).quantize(error) < rate:
+            return None
+        # find the first step whose quantized rate reaches target
+        low, high = 1, max_step
+        guess = _lower_step_guess(center_tick, idx, tick_spacing, target, float(price), decimal0, decimal1, is_0_quote)
+        if not math.isnan(guess):
+            guess = min(max(math.ceil(guess), low), high)
+            if rate_at(guess).quantize(error) >= rate:
+                high = guess
+                if guess > low and rate_at(guess - 1).quantize(error) < rate:
+                    low = guess
+            else:
+                low = guess + 1
+        while low < high:
+            mid = (low + high) // 2
+            if rate_at(mid).quantize(error) >= rate:
+                high = mid
+            else:
+                low = mid + 1
+        if rate_at(low).quantize(error) != rate:
+            return None
+        lower = center_tick - idx - low * tick_spacing
+        return TickResult(
+            final_price=tick_to_base_unit_price(center_tick, decimal0, decimal1, is_0_quote),
+            rate=rate_at(low),
+            center_tick=center_tick,
+            upper=upper,
+            lower=lower,
+            upper_delta=upper - center_tick,
+            lower_delta=lower - center_tick,
+        )
+
+    block = _UPPER_BLOCK * tick_spacing
+    for start in range(tick_spacing, MAX_TICK - center_tick + 1, block):
+        deltas = np.arange(start, min(start + block, MAX_TICK - center_tick + 1), tick_spacing)
+        candidates = _upper_delta_candidates(
+            center_tick, deltas, tick_spacing, candidate_low, candidate_high, float(price), decimal0, decimal1, is_0_quote
+        )
+        for idx in deltas[candidates]:
+            result = solve(int(idx))
+            if result is not None:
+                return result
     return None
+
+
+def find_tick_ranges_at_rate(
+    prices: np.ndarray,
+    rates: np.ndarray,
+    tick_spacing: int,
+    decimal0: int,
+    decimal1: int,
+    is_0_quote: bool,
+    error: float = 0.00001,
+) -> pd.DataFrame:
+    """
+    | Vectorized find_tick_range_at_rate for many (price, rate) pairs, calculation is done in float.
+    | All the pairs are solved together, a block of upper ticks are checked at a time for pairs which are not solved yet,
+    | and lower tick is solved in closed form. Result may be different from find_tick_range_at_rate
+    | when a rate is very close to the edge of error.
+
+    :param prices: center prices
+    :type prices: np.ndarray
+    :param rates: rates of amount1/amount0 in value
+    :type rates: np.ndarray
+    :param tick_spacing: tick spacing of the pool
+    :type tick_spacing: int
+    :param decimal0: decimal 0
+    :type decimal0: int
+    :param decimal1: decimal 1
+    :type decimal1: int
+    :param is_0_quote: token 0 is the quote token
+    :type is_0_quote: bool
+    :param error: error of rate
+    :type error: float
+    :return: one row for each pair, columns are the same as TickResult, rows which can not be solved are NA
+    :rtype: pd.DataFrame
+    """
+    prices = np.asarray(prices, dtype=float)
+    rate_units = np.round(np.asarray(rates, dtype=float) / error)
+    count = len(prices)
+    # the same as base_unit_price_to_tick and nearest_usable_tick
+    pool_prices = 1 / prices if is_0_quote else prices
+    ticks = np.trunc(np.log(np.sqrt(pool_prices / 10 ** (decimal0 - decimal1))) / math.log(math.sqrt(1.0001)))
+    center = np.round(ticks / tick_spacing) * tick_spacing
+    center = np.where(center < -MAX_TICK, center + tick_spacing, np.where(center > MAX_TICK, center - tick_spacing, center))
+    center_prices = ticks_to_base_unit_price(center, decimal0, decimal1, is_0_quote)
+    target = (rate_units - 0.5) * error
+
+    upper_delta = np.full(count, np.nan)
+    lower_delta = np.full(count, np.nan)
+    result_rate = np.full(count, np.nan)
+    pending = np.arange(count)
+    # pairs are rows, and a block of upper deltas are columns
+    block = np.arange(1, _UPPER_BLOCK + 1) * tick_spacing
+    start = 0
+    while len(pending) > 0:
+        idx = start + block
+        pending = pending[center[pending] + idx[0] <= MAX_TICK]
+        if len(pending) < 1:
+            break
+        c = center[pending][:, None]
+        p = center_prices[pending][:, None]
+        max_step = np.floor((c + MAX_TICK - idx) / tick_spacing)
+        step = np.ceil(_lower_step_guess(c, idx, tick_spacing, target[pending][:, None], p, decimal0, decimal1, is_0_quote))
+        valid = (step <= max_step) & (max_step >= 1) & (c + idx <= MAX_TICK)
+        step = np.clip(np.nan_to_num(step, nan=1.0), 1, np.maximum(max_step, 1))
+
+        sqrt_p = np.power(1.0001, c / 2)
+        sqrt_a = np.power(1.0001, (c - idx - step * tick_spacing) / 2)
+        sqrt_b = np.power(1.0001, (c + idx) / 2)
+        amount0 = (sqrt_b - sqrt_p) / (sqrt_p * sqrt_b) / 10**decimal0
+        amount1 = (sqrt_p - sqrt_a) / 10**decimal1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = amount1 * p / amount0 if is_0_quote else amount1 / (amount0 * p)
+        solved = valid & (np.round(rate / error) == rate_units[pending][:, None])
+
+        # first upper delta solved in each row
+        has_solution = solved.any(axis=1)
+        column = solved.argmax(axis=1)[has_solution]
+        rows = pending[has_solution]
+        upper_delta[rows] = idx[column]
+        lower_delta[rows] = -(idx[column] + step[has_solution, column] * tick_spacing)
+        result_rate[rows] = rate[has_solution, column]
+        pending = pending[~has_solution]
+        start += _UPPER_BLOCK * tick_spacing
+
+    found = ~np.isnan(upper_delta)
+    return pd.DataFrame(
+        {
+            "final_price": np.where(found, center_prices, np.nan),
+            "rate": result_rate,
+            "center_tick": pd.Series(np.where(found, center, np.nan)).astype("Int64"),
+            "upper": pd.Series(center + upper_delta).astype("Int64"),
+            "lower": pd.Series(center + lower_delta).astype("Int64"),
+            "upper_delta": pd.Series(upper_delta).astype("Int64"),
+            "lower_delta": pd.Series(lower_delta).astype("Int64"),
+        }
+    )
@@ -0,0 +1,383 @@
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterable, List, NamedTuple, Sequence, Tuple
+
+import pandas as pd
+
+from ._typing import UniV3Pool
+from .helper import sqrt_price_x96_to_tick
+from .liquitidy_math import get_sqrt_ratio_at_tick
+from .._typing import DemeterError
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+Q96 = 2**96
+FEE_DENOMINATOR = 1_000_000
+
+
+class SwapResult(NamedTuple):
+    """
+    Result of a swap in liquidity book, amounts are in atomic unit(e.g. wei)
+    """
+
+    amount_in: int
+    """amount of token paid to pool, fee is not included"""
+    amount_out: int
+    """amount of token got from pool"""
+    fee: int
+    """fee paid, in token in"""
+    sqrt_price_x96: int
+    """sqrt price after swap"""
+    tick: int
+    """tick after swap"""
+    liquidity: int
+    """active liquidity after swap"""
+    crossed_ticks: List[int]
+    """initialized ticks crossed during swap, in order"""
+
+
+def _div_rounding_up(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+def _amount0_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator = (liquidity << 96) * (sqrt_b - sqrt_a)
+    if round_up:
+        return _div_rounding_up(_div_rounding_up(numerator, sqrt_b), sqrt_a)
+    return numerator // sqrt_b // sqrt_a
+
+
+def _amount1_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    if round_up:
+        return _div_rounding_up(liquidity * (sqrt_b - sqrt_a), Q96)
+    return liquidity * (sqrt_b - sqrt_a) // Q96
+
+
+def _next_sqrt_price_from_amount0(sqrt_price: int, liquidity: int, amount: int, add: bool) -> int:
+    if amount == 0:
+        return sqrt_price
+    numerator = liquidity << 96
+    product = amount * sqrt_price
+    denominator = numerator + product if add else numerator - product
+    return _div_rounding_up(numerator * sqrt_price, denominator)
+
+
+def _next_sqrt_price_from_amount1(sqrt_price: int, liquidity: int, amount: int, add: bool) -> int:
+    if add:
+        return sqrt_price + (amount << 96) // liquidity
+    return sqrt_price - _div_rounding_up(amount << 96, liquidity)
+
+
+def compute_swap_step(
+    sqrt_price: int, sqrt_target: int, liquidity: int, amount_remaining: int, fee_pips: int
+) -> Tuple[int, int, int, int]:
+    """
+    | Swap within a single tick range, the same as SwapMath.computeSwapStep of uniswap v3 core.
+    | amount_remaining is positive for exact input, negative for exact output.
+
+    :return: next sqrt price, amount in, amount out, fee
+    :rtype: Tuple[int, int, int, int]
+    """
+    zero_for_one = sqrt_price >= sqrt_target
+    exact_in = amount_remaining >= 0
+    if exact_in:
+        amount_less_fee = amount_remaining * (FEE_DENOMINATOR - fee_pips) // FEE_DENOMINATOR
+        if zero_for_one:
+            amount_in = _amount0_delta(sqrt_target, sqrt_price, liquidity, True)
+        else:
+            amount_in = _amount1_delta(sqrt_price, sqrt_target, liquidity, True)
+        if amount_less_fee >= amount_in:
+            sqrt_next = sqrt_target
+        elif zero_for_one:
+            sqrt_next = _next_sqrt_price_from_amount0(sqrt_price, liquidity, amount_less_fee, True)
+        else:
+            sqrt_next = _next_sqrt_price_from_amount1(sqrt_price, liquidity, amount_less_fee, True)
+    else:
+        if zero_for_one:
+            amount_out = _amount1_delta(sqrt_target, sqrt_price, liquidity, False)
+        else:
+            amount_out = _amount0_delta(sqrt_price, sqrt_target, liquidity, False)
+        if -amount_remaining >= amount_out:
+            sqrt_next = sqrt_target
+        elif zero_for_one:
+            sqrt_next = _next_sqrt_price_from_amount1(sqrt_price, liquidity, -amount_remaining, False)
+        else:
+            sqrt_next = _next_sqrt_price_from_amount0(sqrt_price, liquidity, -amount_remaining, False)
+
+    is_max = sqrt_target == sqrt_next
+    if zero_for_one:
+        if not (is_max and exact_in):
+            amount_in = _amount0_delta(sqrt_next, sqrt_price, liquidity, True)
+        if not (is_max and not exact_in):
+            amount_out = _amount1_delta(sqrt_next, sqrt_price, liquidity, False)
+    else:
+        if not (is_max and exact_in):
+            amount_in = _amount1_delta(sqrt_price, sqrt_next, liquidity, True)
+        if not (is_max and not exact_in):
+            amount_out = _amount0_delta(sqrt_price, sqrt_next, liquidity, False)
+
+    if not exact_in and amount_out > -amount_remaining:
+        amount_out = -amount_remaining
+    if exact_in and sqrt_next != sqrt_target:
+        fee = amount_remaining - amount_in
+    else:
+        fee = _div_rounding_up(amount_in * fee_pips, FEE_DENOMINATOR - fee_pips)
+    return sqrt_next, amount_in, amount_out, fee
+
+
+def tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """
+    Greatest tick whose sqrt ratio is not greater than sqrt price, the same as TickMath.getTickAtSqrtRatio
+
+    :param sqrt_price_x96: sqrt price
+    :type sqrt_price_x96: int
+    :return: tick
+    :rtype: int
+    """
+    tick = min(max(sqrt_price_x96_to_tick(sqrt_price_x96), MIN_TICK), MAX_TICK)
+    while tick > MIN_TICK and get_sqrt_ratio_at_tick(tick) > sqrt_price_x96:
+        tick -= 1
+    while tick < MAX_TICK and get_sqrt_ratio_at_tick(tick + 1) <= sqrt_price_x96:
+        tick += 1
+    return tick
+
+
+class LiquidityBook:
+    """
+    | Liquidity of a pool at tick level, to simulate price impact of swaps.
+    | Initialized ticks and their liquidity net(liquidity added when price crosses the tick from left to right)
+    | are kept in sorted lists, next initialized tick is found by bisection,
+    | and active liquidity at any tick is found on prefix sums of liquidity net, so both are O(log n).
+    | Updating a tick is O(n), as a book is usually built once from a snapshot of pool, and only updated occasionally.
+    | Swap walks across initialized ticks the same as swap function of pool contract, all math is done on integers.
+    | Swap doesn't change the book, as price and liquidity of next bar are loaded from pool data.
+
+    :param pool: pool info, fee rate is used
+    :type pool: UniV3Pool
+    :param ticks: initialized ticks
+    :type ticks: Sequence[int]
+    :param liquidity_net: liquidity net of each tick
+    :type liquidity_net: Sequence[int]
+    """
+
+    def __init__(self, pool: UniV3Pool, ticks: Sequence[int] = (), liquidity_net: Sequence[int] = ()):
+        if len(ticks) != len(liquidity_net):
+            raise DemeterError("length of ticks and liquidity net should be the same")
+        self.pool = pool
+        self.fee_pips = int(pool.fee)
+        self._ticks: List[int] = []
+        self._liquidity_net: List[int] = []
+        self._prefix: List[int] | None = None
+        net = {}
+        for tick, value in zip(ticks, liquidity_net):
+            net[int(tick)] = net.get(int(tick), 0) + int(value)
+        for tick in sorted(net.keys()):
+            if net[tick] != 0:
+                self._ticks.append(tick)
+                self._liquidity_net.append(net[tick])
+
+    @staticmethod
+    def from_positions(pool: UniV3Pool, positions: Iterable[Tuple[int, int, int]]) -> "LiquidityBook":
+        """
+        Build book from positions in pool, e.g. positions replayed from mint and burn events.
+
+        :param pool: pool info
+        :type pool: UniV3Pool
+        :param positions: (lower tick, upper tick, liquidity)
+        :type positions: Iterable[Tuple[int, int, int]]
+        :return: liquidity book
+        :rtype: LiquidityBook
+        """
+        ticks, net = [], []
+        for lower, upper, liquidity in positions:
+            ticks += [lower, upper]
+            net += [liquidity, -liquidity]
+        return LiquidityBook(pool, ticks, net)
+
+    @staticmethod
+    def from_dataframe(
+        pool: UniV3Pool, df: pd.DataFrame, tick_column: str = "tick", net_column: str = "liquidityNet"
+    ) -> "LiquidityBook":
+        """
+        Build book from a snapshot of initialized ticks, e.g. ticks queried from pool contract or subgraph.
+
+        :param pool: pool info
+        :type pool: UniV3Pool
+        :param df: ticks and liquidity net
+        :type df: pd.DataFrame
+        :param tick_column: column of tick
+        :type tick_column: str
+        :param net_column: column of liquidity net
+        :type net_column: str
+        :return: liquidity book
+        :rtype: LiquidityBook
+        """
+        return LiquidityBook(pool, [int(t) for t in df[tick_column]], [int(n) for n in df[net_column]])
+
+    def __len__(self):
+        return len(self._ticks)
+
+    @property
+    def ticks(self) -> List[int]:
+        """
+        Initialized ticks in order
+        """
+        return self._ticks
+
+    def update(self, tick: int, liquidity_delta: int):
+        """
+        Change liquidity net of a tick, tick is removed if its liquidity net is 0.
+
+        :param tick: tick
+        :type tick: int
+        :param liquidity_delta: change of liquidity net
+        :type liquidity_delta: int
+        """
+        i = bisect_left(self._ticks, tick)
+        if i < len(self._ticks) and self._ticks[i] == tick:
+            self._liquidity_net[i] += liquidity_delta
+            if self._liquidity_net[i] == 0:
+                del self._ticks[i]
+                del self._liquidity_net[i]
+        elif liquidity_delta != 0:
+            self._ticks.insert(i, tick)
+            self._liquidity_net.insert(i, liquidity_delta)
+        self._prefix = None
+
+    def add_position(self, lower_tick: int, upper_tick: int, liquidity: int):
+        """
+        Add liquidity of a position to book, use negative liquidity to remove.
+
+        :param lower_tick: lower tick
+        :type lower_tick: int
+        :param upper_tick: upper tick
+        :type upper_tick: int
+        :param liquidity: liquidity
+        :type liquidity: int
+        """
+        self.update(lower_tick, liquidity)
+        self.update(upper_tick, -liquidity)
+
+    def liquidity_at(self, tick: int) -> int:
+        """
+        Active liquidity when current tick is tick, it's the sum of liquidity net of initialized ticks not greater than tick.
+
+        :param tick: tick
+        :type tick: int
+        :return: liquidity
+        :rtype: int
+        """
+        if self._prefix is None:
+            self._prefix = list(accumulate(self._liquidity_net))
+        i = bisect_right(self._ticks, tick)
+        return self._prefix[i - 1] if i > 0 else 0
+
+    def next_initialized_tick(self, tick: int, lte: bool) -> int | None:
+        """
+        Next initialized tick on the left(not greater than tick) or on the right(greater than tick)
+
+        :param tick: current tick
+        :type tick: int
+        :param lte: search on the left
+        :type lte: bool
+        :return: initialized tick, None if there is no more tick
+        :rtype: int | None
+        """
+        if lte:
+            i = bisect_right(self._ticks, tick)
+            return self._ticks[i - 1] if i > 0 else None
+        i = bisect_right(self._ticks, tick)
+        return self._ticks[i] if i < len(self._ticks) else None
+
+    def swap(
+        self,
+        amount: int,
+        zero_for_one: bool,
+        sqrt_price_x96: int,
+        liquidity: int | None = None,
+        exact_input: bool = True,
+        sqrt_price_limit_x96: int | None = None,
+    ) -> SwapResult:
+        """
+        | Simulate a swap from current price, amounts are in atomic unit.
+        | If liquidity is exhausted or limit price is reached, swap stops and only part of amount is filled.
+
+        :param amount: amount to pay if exact_input, else amount to get
+        :type amount: int
+        :param zero_for_one: swap token0 for token1
+        :type zero_for_one: bool
+        :param sqrt_price_x96: current sqrt price
+        :type sqrt_price_x96: int
+        :param liquidity: current active liquidity, e.g. currentLiquidity of pool data. If None, it's got from book
+        :type liquidity: int
+        :param exact_input: amount is input amount, or output amount
+        :type exact_input: bool
+        :param sqrt_price_limit_x96: price limit, default is the min/max price
+        :type sqrt_price_limit_x96: int
+        :return: swap result
+        :rtype: SwapResult
+        """
+        if amount < 0:
+            raise DemeterError("amount should not be negative")
+        if sqrt_price_limit_x96 is None:
+            sqrt_price_limit_x96 = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+        if (zero_for_one and sqrt_price_limit_x96 >= sqrt_price_x96) or (
+            not zero_for_one and sqrt_price_limit_x96 <= sqrt_price_x96
+        ):
+            raise DemeterError("price limit is on the wrong side of current price")
+
+        tick = tick_at_sqrt_ratio(sqrt_price_x96)
+        liquidity = self.liquidity_at(tick) if liquidity is None else int(liquidity)
+        remaining = amount if exact_input else -amount
+        amount_in = amount_out = fee = 0
+        crossed: List[int] = []
+        while remaining != 0 and sqrt_price_x96 != sqrt_price_limit_x96:
+            tick_next = self.next_initialized_tick(tick, zero_for_one)
+            initialized = tick_next is not None
+            if not initialized:
+                tick_next = MIN_TICK if zero_for_one else MAX_TICK
+            sqrt_next_tick = get_sqrt_ratio_at_tick(tick_next)
+            if zero_for_one:
+                sqrt_target = max(sqrt_next_tick, sqrt_price_limit_x96)
+            else:
+                sqrt_target = min(sqrt_next_tick, sqrt_price_limit_x96)
+
+            if liquidity > 0:
+                sqrt_price_x96, step_in, step_out, step_fee = compute_swap_step(
+                    sqrt_price_x96, sqrt_target, liquidity, remaining, self.fee_pips
+                )
+            else:
+                # no liquidity in this range, price jumps to next tick
+                sqrt_price_x96, step_in, step_out, step_fee = sqrt_target, 0, 0, 0
+            amount_in += step_in
+            amount_out += step_out
+            fee += step_fee
+            remaining = remaining - (step_in + step_fee) if exact_input else remaining + step_out
+
+            if sqrt_price_x96 == sqrt_next_tick:
+                if initialized:
+                    net = self._liquidity_net[bisect_left(self._ticks, tick_next)]
+                    liquidity += -net if zero_for_one else net
+                    crossed.append(tick_next)
+                elif liquidity == 0:
+                    break
+                tick = tick_next - 1 if zero_for_one else tick_next
+                if not initialized:
+                    break
+            else:
+                tick = tick_at_sqrt_ratio(sqrt_price_x96)
+        return SwapResult(
+            amount_in=amount_in,
+            amount_out=amount_out,
+            fee=fee,
+            sqrt_price_x96=sqrt_price_x96,
+            tick=tick,
+            liquidity=liquidity,
+            crossed_ticks=crossed,
+        )
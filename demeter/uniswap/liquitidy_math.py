@@ -1,5 +1,8 @@
 import math
 from decimal import Decimal
+from functools import lru_cache
+
+from ..utils import is_fast_backend, to_number
 
 # -*- coding: utf-8 -*-
 """
@@ -30,6 +33,8 @@ Created on Mon Jun 14 18:53:09 2021
 def get_amount0(sqrtA: int, sqrtB: int, liquidity: int, decimals: int) -> Decimal:
     if sqrtA > sqrtB:
         (sqrtA, sqrtB) = (sqrtB, sqrtA)
+    if is_fast_backend():
+        return liquidity * 2**96 * (sqrtB - sqrtA) / sqrtB / sqrtA / 10**decimals
     amount0 = (Decimal(liquidity * 2**96 * (sqrtB - sqrtA)) / sqrtB / sqrtA) / 10**decimals
     return amount0
 
@@ -37,6 +42,8 @@ def get_amount0(sqrtA: int, sqrtB: int, liquidity: int, decimals: int) -> Decima
 def get_amount1(sqrtA: int, sqrtB: int, liquidity: int, decimals: int) -> Decimal:
     if sqrtA > sqrtB:
         (sqrtA, sqrtB) = (sqrtB, sqrtA)
+    if is_fast_backend():
+        return liquidity * (sqrtB - sqrtA) / 2**96 / 10**decimals
     amount1 = Decimal(liquidity * (sqrtB - sqrtA)) / 2**96 / 10**decimals
     return amount1
 
@@ -62,14 +69,14 @@ def get_amounts(
 
     if sqrt <= sqrtA:
         amount0 = get_amount0(sqrtA, sqrtB, liquidity, decimal0)
-        return amount0, Decimal(0)
+        return amount0, to_number(0)
     elif sqrtB > sqrt > sqrtA:
         amount0 = get_amount0(sqrt, sqrtB, liquidity, decimal0)
         amount1 = get_amount1(sqrtA, sqrt, liquidity, decimal1)
         return amount0, amount1
     else:
         amount1 = get_amount1(sqrtA, sqrtB, liquidity, decimal1)
-        return Decimal(0), amount1
+        return to_number(0), amount1
 
 
 """get token amounts relation"""
@@ -152,11 +159,21 @@ def get_liquidity(
         return liquidity1
 
 
+# max count of ticks whose sqrt ratio is cached, a pool seldom uses more ticks than this in a back test
+SQRT_RATIO_CACHE_SIZE = 65536
+
+
 def get_sqrt_ratio_at_tick(tick: int) -> int:
     """
     (sqrt(1.0001) ** tick) * (2**96)
+
+    Result is cached by tick, see helper.clear_tick_cache
     """
-    tick = int(tick)
+    return _sqrt_ratio_at_tick(int(tick))
+
+
+@lru_cache(maxsize=SQRT_RATIO_CACHE_SIZE)
+def _sqrt_ratio_at_tick(tick: int) -> int:
     abs_tick = tick if tick >= 0 else -tick
     assert abs_tick <= 887272
 
@@ -3,14 +3,19 @@ import os
 import pandas as pd
 from datetime import date, timedelta, datetime, time
 from decimal import Decimal
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 import orjson
 from ._typing import (
     UniV3Pool,
     TokenInfo,
     Position,
+    PositionTable,
+    PositionSnapshot,
     UniLpBalance,
     AddLiquidityAction,
+    BatchAddLiquidityAction,
+    BatchRemoveLiquidityAction,
+    BatchCollectFeeAction,
     RemoveLiquidityAction,
     CollectFeeAction,
     BuyAction,
@@ -22,9 +27,10 @@ from ._typing import (
     SwapAction,
 )
 from .core import V3CoreLib
-from .data import fillna, resample
+from .data import fillna, bfill, resample_aggregated, build_aggregates, join_aggregates, split_aggregates
 from .helper import (
     tick_to_base_unit_price,
+    ticks_to_base_unit_price,
     base_unit_price_to_tick,
     base_unit_price_to_sqrt_price_x96,
     tick_to_sqrt_price_x96,
@@ -32,7 +38,9 @@ from .helper import (
     MIN_ERROR,
     nearest_usable_tick,
 )
+from .liquidity_book import LiquidityBook, SwapResult
 from .liquitidy_math import get_sqrt_ratio_at_tick, estimate_ratio, get_liquidity
+from .position_index import PositionIndex
 from .._typing import DemeterError, DECIMAL_0, UnitDecimal
 from ..broker import MarketBalance, Market, MarketInfo, write_func
 from ..utils import (
@@ -42,6 +50,15 @@ from ..utils import (
     float_param_formatter,
     to_decimal,
     require,
+    to_number,
+    to_unit_number,
+    is_fast_backend,
+    data_cache_key,
+    data_cache_path,
+    read_data_cache,
+    write_data_cache,
+    iter_days,
+    load_daily_files,
 )
 
 
@@ -60,6 +77,8 @@ class UniLpMarket(Market):
     :type data_path: str
     """
 
+    support_fast_backend = True
+
     def __init__(
         self, market_info: MarketInfo, pool_info: UniV3Pool, data: pd.DataFrame = None, data_path: str = "./data"
     ):
@@ -70,13 +89,26 @@ class UniLpMarket(Market):
         # reference for super().assets dict.
         self.base_token, self.quote_token = self._convert_pair(self.pool_info.token0, self.pool_info.token1)
         # status
-        self._positions: Dict[PositionInfo, Position] = {}
+        self._positions: PositionTable = PositionTable()
+        # index of positions by tick range, it's rebuilt when structure version of positions is changed
+        self._position_index: PositionIndex | None = None
+        self._position_index_version = -1
+        # (key of inputs, balance), see get_market_balance
+        self._balance_cache: Tuple[tuple, UniLpBalance] | None = None
         # In order to distinguish price in pool and to u, we call former one "pool price"
         self._pool_price_unit = f"{self.base_token.name}/{self.quote_token.name}"
         # internal temporary variable
         # self.action_buffer = []
         # tick of last minute(previous minute), to compatible with old version, keep default as None
         self.last_tick: int = None
+        # optional tick level liquidity, if set, swaps without a specified price will walk through ticks
+        self.liquidity_book: LiquidityBook | None = None
+        # result of last swap in liquidity book, including ticks crossed
+        self.last_swap_result: SwapResult | None = None
+        # minutely data, and its resampled data of different intervals, see _resample
+        self._aggregates_source: pd.DataFrame | None = data
+        self._aggregates: Dict[str, pd.DataFrame] = {}
+        self._resampled: pd.DataFrame | None = None
 
     # region properties
 
@@ -100,15 +132,22 @@ class UniLpMarket(Market):
         )
 
     @property
-    def positions(self) -> Dict[PositionInfo, Position]:
+    def positions(self) -> PositionTable:
         """
-        current positions in broker
+        current positions in broker, it can be used as a dict
 
         :return: all positions
-        :rtype: dict[PositionInfo:Position]
+        :rtype: PositionTable
         """
         return self._positions
 
+    @property
+    def is_idle(self) -> bool:
+        """
+        Market is idle when there is no position
+        """
+        return len(self._positions) == 0
+
     @property
     def pool_info(self) -> UniV3Pool:
         """
@@ -141,7 +180,7 @@ class UniLpMarket(Market):
 
     @property
     def market_status(self) -> UniswapMarketStatus:
-        return self._market_status
+        return super().market_status
 
     # endregion
 
@@ -177,7 +216,7 @@ class UniLpMarket(Market):
         # update price tick
         super().set_market_status(market_status, price)
 
-        total_virtual_liq = sum([p.liquidity for p in self._positions.values()])
+        total_virtual_liq = self._positions.total_liquidity()
         self.last_tick = self._market_status.data.closeTick if "closeTick" in self._market_status.data.index else np.nan
 
         if market_status.data is None:
@@ -246,12 +285,53 @@ class UniLpMarket(Market):
 
         fee will be calculated by liquidity
         """
-        for position_info, position in self._positions.items():
-            V3CoreLib.update_fee(self.last_tick, self.pool_info, position_info, position, self.market_status.data)
+        if len(self._positions) < 1:
+            return
+        index = self.position_index
+        V3CoreLib.update_fees(
+            self.last_tick,
+            self.pool_info,
+            index.lower_ticks,
+            index.upper_ticks,
+            index.positions,
+            self._market_status.data,
+            index.liquidity,
+        )
+
+    @property
+    def position_index(self) -> PositionIndex:
+        """
+        Index of positions by tick range, it's rebuilt after positions are added, removed or replaced,
+        and liquidity is synced after it's changed.
+        """
+        positions = self._positions
+        index = self._position_index
+        if index is None or self._position_index_version != positions.structure_version:
+            self._position_index = PositionIndex(positions, self._pool, index.amount_cache if index is not None else None)
+            self._position_index_version = positions.structure_version
+            positions.liquidity_changed.clear()
+        elif len(positions.liquidity_changed) > 0:
+            for key in positions.liquidity_changed:
+                index.update_liquidity(key)
+            positions.liquidity_changed.clear()
+        return self._position_index
+
+    def get_in_range_positions(self, tick: int | None = None) -> List[PositionInfo]:
+        """
+        Get positions whose range includes tick
+
+        :param tick: tick to query, default is current close tick
+        :type tick: int
+        :return: positions in range
+        :rtype: List[PositionInfo]
+        """
+        if tick is None:
+            tick = self._market_status.data.closeTick
+        return self.position_index.in_range(tick)
 
     def get_position_amount(self, position_info: PositionInfo) -> Tuple[Decimal, Decimal]:
         if position_info not in self.positions:
-            return DECIMAL_0, DECIMAL_0
+            return to_number(0), to_number(0)
         pool_price = self._market_status.data.price
         sqrt_price = base_unit_price_to_sqrt_price_x96(
             pool_price,
@@ -259,17 +339,22 @@ class UniLpMarket(Market):
             self._pool.token1.decimal,
             self._is_token0_quote,
         )
-        position = self.positions[position_info]
-        amount0, amount1 = V3CoreLib.get_token_amounts(self._pool, position_info, sqrt_price, position.liquidity)
-        return amount0, amount1
+        index = self.position_index
+        return index.get_token_amounts(index.rows[position_info], sqrt_price)
 
     def get_market_balance(self) -> MarketBalance:
         """
         get current status, including positions, balances
 
+        | Balance is cached until price, market state or positions are changed,
+        | changes made directly to positions (e.g. liquidity of a position) are also found.
+
         :return: MarketBalance
         """
-        pool_price = {self.quote_token.name: Decimal(1), self.base_token.name: self._market_status.data.price}
+        cache_key = (self._version, self._positions.version, self._market_status.data.price)
+        if self._balance_cache is not None and self._balance_cache[0] == cache_key:
+            return self._balance_cache[1]
+        pool_price = {self.quote_token.name: to_number(1), self.base_token.name: self._market_status.data.price}
 
         sqrt_price = base_unit_price_to_sqrt_price_x96(
             self._market_status.data.price,
@@ -277,17 +362,18 @@ class UniLpMarket(Market):
             self._pool.token1.decimal,
             self._is_token0_quote,
         )
-        base_fee_sum = Decimal(0)
-        quote_fee_sum = Decimal(0)
-        deposit_amount0 = Decimal(0)
-        deposit_amount1 = Decimal(0)
-        for position_info, position in self._positions.items():
+        base_fee_sum = to_number(0)
+        quote_fee_sum = to_number(0)
+        deposit_amount0 = to_number(0)
+        deposit_amount1 = to_number(0)
+        index = self.position_index
+        for i, position in enumerate(index.positions):
             if position.transferred:
                 continue
             base_fee, quote_fee = self._convert_pair(position.pending_amount0, position.pending_amount1)
             base_fee_sum += base_fee
             quote_fee_sum += quote_fee
-            amount0, amount1 = V3CoreLib.get_token_amounts(self._pool, position_info, sqrt_price, position.liquidity)
+            amount0, amount1 = index.get_token_amounts(i, sqrt_price)
             deposit_amount0 += amount0
             deposit_amount1 += amount1
 
@@ -299,12 +385,13 @@ class UniLpMarket(Market):
 
         val = UniLpBalance(
             net_value=net_value,
-            base_uncollected=UnitDecimal(base_fee_sum, self.base_token.name),
-            quote_uncollected=UnitDecimal(quote_fee_sum, self.quote_token.name),
-            base_in_position=UnitDecimal(base_deposit_amount, self.base_token.name),
-            quote_in_position=UnitDecimal(quote_deposit_amount, self.quote_token.name),
+            base_uncollected=to_unit_number(base_fee_sum, self.base_token.name),
+            quote_uncollected=to_unit_number(quote_fee_sum, self.quote_token.name),
+            base_in_position=to_unit_number(base_deposit_amount, self.base_token.name),
+            quote_in_position=to_unit_number(quote_deposit_amount, self.quote_token.name),
             position_count=len(list(filter(lambda p: not p.transferred, self._positions.values()))),
         )
+        self._balance_cache = (cache_key, val)
         return val
 
     def transfer_position_out(self, position_info: PositionInfo):
@@ -319,6 +406,26 @@ class UniLpMarket(Market):
         else:
             raise DemeterError("position not exist or has not transferred yet ")
 
+    def snapshot_positions(self) -> Tuple[PositionSnapshot, ...]:
+        """
+        | Take a snapshot of positions, e.g. to try some operations and roll back.
+        | It only copies references of position values, so it's cheap.
+
+        :return: state of positions
+        :rtype: Tuple[PositionSnapshot, ...]
+        """
+        return self._positions.snapshot()
+
+    def restore_positions(self, snapshot: Tuple[PositionSnapshot, ...]):
+        """
+        Restore positions from a snapshot, balance of broker is not changed.
+
+        :param snapshot: result of snapshot_positions
+        :type snapshot: Tuple[PositionSnapshot, ...]
+        """
+        self._positions.restore(snapshot)
+        self.has_update = True
+
     def tick_to_price(self, tick: int) -> Decimal:
         """
         convert tick to price
@@ -344,7 +451,7 @@ class UniLpMarket(Market):
         :return: Liquidity and how much token amount you can get if remove liquidity.
         """
         sqrt_price_x96 = base_unit_price_to_sqrt_price_x96(
-            self.market_status.data.price,
+            self._market_status.data.price,
             self.pool_info.token0.decimal,
             self.pool_info.token1.decimal,
             self.pool_info.is_token0_quote,
@@ -371,12 +478,12 @@ class UniLpMarket(Market):
         :param upper_tick: upper tick
         :return:
         """
-        current_price = self.market_status.data.price
+        current_price = self._market_status.data.price
         current_tick = base_unit_price_to_tick(
             current_price, self.pool_info.token0.decimal, self.pool_info.token1.decimal, self.pool_info.is_token0_quote
         )
         ratio_in_amount = estimate_ratio(current_tick, lower_tick, upper_tick)
-        ratio_in_amount = Decimal(
+        ratio_in_amount = to_number(
             ratio_in_amount * 10 ** (self.pool_info.token1.decimal - self.pool_info.token0.decimal)
         )
         ratio_in_value = (
@@ -427,7 +534,7 @@ class UniLpMarket(Market):
 
         if sqrt_price_x96 == -1:
             # self.current_tick must be initialed
-            sqrt_price_x96 = get_sqrt_ratio_at_tick(self.market_status.data.closeTick)
+            sqrt_price_x96 = get_sqrt_ratio_at_tick(self._market_status.data.closeTick)
         if lower_tick > upper_tick:
             raise DemeterError("lower tick should be less than upper tick")
 
@@ -446,7 +553,7 @@ class UniLpMarket(Market):
             upper_price = self.tick_to_price(upper_tick)
             if self.pool_info.is_token0_quote:
                 lower_price, upper_price = upper_price, lower_price
-            self._positions[position_info] = Position(DECIMAL_0, DECIMAL_0, liquidity, lower_price, upper_price)
+            self._positions[position_info] = Position(to_number(0), to_number(0), liquidity, lower_price, upper_price)
         self.broker.subtract_from_balance(self.token0, token0_used)
         self.broker.subtract_from_balance(self.token1, token1_used)
         return position_info, token0_used, token1_used, liquidity
@@ -457,7 +564,7 @@ class UniLpMarket(Market):
             int(sqrt_price_x96)
             if sqrt_price_x96 != -1
             else base_unit_price_to_sqrt_price_x96(
-                self.market_status.data.price,
+                self._market_status.data.price,
                 self.pool_info.token0.decimal,
                 self.pool_info.token1.decimal,
                 self.pool_info.is_token0_quote,
@@ -744,6 +851,234 @@ class UniLpMarket(Market):
             del self.positions[position]
         return base_get, quote_get
 
+    # region batch operations
+
+    @write_func
+    def add_liquidity_batch(
+        self,
+        specs: List[Tuple[int, int, Decimal | float, Decimal | float]],
+        sqrt_price_x96: int = -1,
+        tick: int = -1,
+        trim_tick: bool = True,
+    ) -> List[Tuple[PositionInfo, Decimal, Decimal, int]]:
+        """
+        | Add liquidity to many tick ranges, the same as calling add_liquidity_by_tick for every range, but
+        | price is calculated once, broker balances are updated once, and one BatchAddLiquidityAction is recorded.
+        | If balance is not enough for all the ranges, nothing will be added.
+
+        :param specs: list of (lower_tick, upper_tick, base_max_amount, quote_max_amount)
+        :type specs: List[Tuple[int, int, Decimal | float, Decimal | float]]
+        :param sqrt_price_x96: precise price. if set to -1, it will be calculated from current tick
+        :type sqrt_price_x96: int
+        :param tick: tick price. if set to -1, it will be calculated from current tick
+        :type tick: int
+        :param trim_tick: trim tick according to tick spacing, default is True
+        :type trim_tick: bool
+        :return: (position, base token used, quote token used, liquidity) of each range
+        :rtype: List[Tuple[PositionInfo, Decimal, Decimal, int]]
+        """
+        if sqrt_price_x96 == -1:
+            sqrt_price_x96 = get_sqrt_ratio_at_tick(self._market_status.data.closeTick if tick == -1 else tick)
+        sqrt_price_x96 = int(sqrt_price_x96)
+        added = []
+        total0, total1 = to_number(0), to_number(0)
+        for lower_tick, upper_tick, base_max_amount, quote_max_amount in specs:
+            if base_max_amount is None or quote_max_amount is None:
+                raise DemeterError("token amounts should be set in batch")
+            lower_tick, upper_tick = int(lower_tick), int(upper_tick)
+            if trim_tick:
+                lower_tick = nearest_usable_tick(lower_tick, self.pool_info.tick_spacing)
+                upper_tick = nearest_usable_tick(upper_tick, self.pool_info.tick_spacing)
+            if lower_tick > upper_tick:
+                lower_tick, upper_tick = upper_tick, lower_tick
+            require(
+                lower_tick % self.pool_info.tick_spacing == 0 and upper_tick % self.pool_info.tick_spacing == 0,
+                "tick should match tick space",
+            )
+            token0_amt, token1_amt = self._convert_pair(to_number(base_max_amount), to_number(quote_max_amount))
+            token0_used, token1_used, liquidity, position_info = V3CoreLib.new_position(
+                self._pool, token0_amt, token1_amt, lower_tick, upper_tick, sqrt_price_x96
+            )
+            added.append((position_info, token0_used, token1_used, liquidity))
+            total0 += token0_used
+            total1 += token1_used
+
+        # settle balance before changing positions, so positions are not changed if balance is not enough
+        self.broker.subtract_from_balance(self.token0, total0)
+        try:
+            self.broker.subtract_from_balance(self.token1, total1)
+        except Exception:
+            self.broker.add_to_balance(self.token0, total0)
+            raise
+        result = []
+        for position_info, token0_used, token1_used, liquidity in added:
+            if position_info in self._positions:
+                self._positions[position_info].liquidity += liquidity
+            else:
+                lower_price = self.tick_to_price(position_info.lower_tick)
+                upper_price = self.tick_to_price(position_info.upper_tick)
+                if self.pool_info.is_token0_quote:
+                    lower_price, upper_price = upper_price, lower_price
+                zero = to_number(0)
+                self._positions[position_info] = Position(zero, zero, liquidity, lower_price, upper_price)
+            base_used, quote_used = self._convert_pair(token0_used, token1_used)
+            result.append((position_info, base_used, quote_used, liquidity))
+
+        base_total, quote_total = self._convert_pair(total0, total1)
+        self._record_action(
+            BatchAddLiquidityAction(
+                market=self.market_info,
+                base_balance_after=self.broker.get_token_balance_with_unit(self.base_token),
+                quote_balance_after=self.broker.get_token_balance_with_unit(self.quote_token),
+                positions=[r[0] for r in result],
+                liquidity=[int(r[3]) for r in result],
+                base_amount=UnitDecimal(base_total, self.base_token.name),
+                quote_amount=UnitDecimal(quote_total, self.quote_token.name),
+            )
+        )
+        return result
+
+    @write_func
+    def remove_liquidity_batch(
+        self,
+        positions: List[PositionInfo] | None = None,
+        collect: bool = True,
+        sqrt_price_x96: int = -1,
+        remove_dry_pool: bool = True,
+    ) -> (Decimal, Decimal):
+        """
+        | Remove all the liquidity of many positions, the same as calling remove_liquidity for every position,
+        | but price is calculated once, broker balances are updated once,
+        | and one BatchRemoveLiquidityAction is recorded.
+
+        :param positions: positions to remove, if set to None, all the positions will be removed
+        :type positions: List[PositionInfo]
+        :param collect: collect tokens and fee to broker, if not, tokens will be kept in fee property of positions
+        :type collect: bool
+        :param sqrt_price_x96: precise price. if set to -1, it will be calculated from current price.
+        :type sqrt_price_x96: int
+        :param remove_dry_pool: remove positions whose liquidity and fee are 0, effect when collect==True
+        :type remove_dry_pool: bool
+        :return: (base_got, quote_get), total amounts collected if collect is true, else amounts removed from liquidity
+        :rtype: (Decimal, Decimal)
+        """
+        positions = list(self._positions.keys()) if positions is None else list(dict.fromkeys(positions))
+        if sqrt_price_x96 == -1:
+            sqrt_price_x96 = base_unit_price_to_sqrt_price_x96(
+                self._market_status.data.price,
+                self.pool_info.token0.decimal,
+                self.pool_info.token1.decimal,
+                self.pool_info.is_token0_quote,
+            )
+        sqrt_price_x96 = int(sqrt_price_x96)
+        total0, total1 = to_number(0), to_number(0)
+        removed = []
+        for position_info in positions:
+            position = self._positions[position_info]
+            token0_get, token1_get = V3CoreLib.close_position(
+                self._pool, position_info, position.liquidity, sqrt_price_x96
+            )
+            removed.append(int(position.liquidity))
+            position.liquidity = 0
+            position.pending_amount0 += token0_get
+            position.pending_amount1 += token1_get
+            total0 += token0_get
+            total1 += token1_get
+        if collect:
+            total0, total1 = self.__collect_fee_batch(positions, remove_dry_pool)
+        base_total, quote_total = self._convert_pair(total0, total1)
+        self._record_action(
+            BatchRemoveLiquidityAction(
+                market=self.market_info,
+                base_balance_after=self.broker.get_token_balance_with_unit(self.base_token),
+                quote_balance_after=self.broker.get_token_balance_with_unit(self.quote_token),
+                positions=positions,
+                liquidity=removed,
+                base_amount=UnitDecimal(base_total, self.base_token.name),
+                quote_amount=UnitDecimal(quote_total, self.quote_token.name),
+            )
+        )
+        return base_total, quote_total
+
+    @write_func
+    def collect_fee_batch(
+        self, positions: List[PositionInfo] | None = None, remove_dry_pool: bool = True
+    ) -> (Decimal, Decimal):
+        """
+        | Collect all the fee and tokens of many positions, the same as calling collect_fee for every position,
+        | but broker balances are updated once, and one BatchCollectFeeAction is recorded.
+
+        :param positions: positions to collect, if set to None, all the positions will be collected
+        :type positions: List[PositionInfo]
+        :param remove_dry_pool: remove positions whose liquidity and fee are 0
+        :type remove_dry_pool: bool
+        :return: (base_got, quote_get), total amounts collected
+        :rtype: (Decimal, Decimal)
+        """
+        positions = list(self._positions.keys()) if positions is None else list(dict.fromkeys(positions))
+        remain = [int(self._positions[p].liquidity) for p in positions]
+        total0, total1 = self.__collect_fee_batch(positions, remove_dry_pool)
+        base_total, quote_total = self._convert_pair(total0, total1)
+        self._record_action(
+            BatchCollectFeeAction(
+                market=self.market_info,
+                base_balance_after=self.broker.get_token_balance_with_unit(self.base_token),
+                quote_balance_after=self.broker.get_token_balance_with_unit(self.quote_token),
+                positions=positions,
+                liquidity=remain,
+                base_amount=UnitDecimal(base_total, self.base_token.name),
+                quote_amount=UnitDecimal(quote_total, self.quote_token.name),
+            )
+        )
+        return base_total, quote_total
+
+    def __collect_fee_batch(self, positions: List[PositionInfo], remove_dry_pool: bool) -> (Decimal, Decimal):
+        total0, total1 = to_number(0), to_number(0)
+        for position_info in positions:
+            position = self._positions[position_info]
+            total0 += position.pending_amount0
+            total1 += position.pending_amount1
+            position.pending_amount0 = to_number(0)
+            position.pending_amount1 = to_number(0)
+            if position.liquidity == 0 and remove_dry_pool:
+                del self._positions[position_info]
+        self.broker.add_to_balance(self.token0, total0)
+        self.broker.add_to_balance(self.token1, total1)
+        return total0, total1
+
+    # endregion
+
+    def _swap_in_book(
+        self, amount: Decimal | float, from_token: TokenInfo, exact_input: bool
+    ) -> Tuple[Decimal, Decimal, Decimal]:
+        """
+        Swap in liquidity book, from current pool price and liquidity.
+
+        :param amount: amount to pay if exact_input, else amount to get
+        :param from_token: token to pay
+        :param exact_input: amount is the amount to pay
+        :return: amount of from token paid(fee is included), fee in from token, amount of to token got
+        """
+        zero_for_one = from_token == self.token0
+        to_token = self.token1 if zero_for_one else self.token0
+        amount_token = from_token if exact_input else to_token
+        atomic_amount = int(to_decimal(amount) * 10**amount_token.decimal)
+        sqrt_price = base_unit_price_to_sqrt_price_x96(
+            self._market_status.data.price, self._pool.token0.decimal, self._pool.token1.decimal, self._is_token0_quote
+        )
+        result = self.liquidity_book.swap(
+            atomic_amount, zero_for_one, sqrt_price, int(self._market_status.data.currentLiquidity), exact_input
+        )
+        filled = result.amount_in + result.fee if exact_input else result.amount_out
+        if filled < atomic_amount:
+            raise DemeterError(f"liquidity in pool is not enough to swap {amount} {amount_token.name}")
+        self.last_swap_result = result
+        return (
+            to_number(Decimal(result.amount_in + result.fee) / 10**from_token.decimal),
+            to_number(Decimal(result.fee) / 10**from_token.decimal),
+            to_number(Decimal(result.amount_out) / 10**to_token.decimal),
+        )
+
     @float_param_formatter
     def swap(
         self,
@@ -758,14 +1093,18 @@ class UniLpMarket(Market):
         if from_token not in [self.quote_token, self.base_token] or to_token not in [self.quote_token, self.base_token]:
             raise DemeterError("from or to token not in pool")
 
-        if from_token == self.base_token:
-            # e.g. swap 1 eth for 3000 usdc
-            price = price if price else self.market_status.data.price
+        if not price and self.liquidity_book is not None:
+            _, fee_in_from, to_amount = self._swap_in_book(from_amount, from_token, True)
+            price = to_amount / (from_amount - fee_in_from)
         else:
-            # e.g. swap 3000 usdc for 1 eth
-            price = price if price else 1 / self.market_status.data.price
-        fee_in_from = from_amount * self.pool_info.fee_rate
-        to_amount = (from_amount - fee_in_from) * price
+            if from_token == self.base_token:
+                # e.g. swap 1 eth for 3000 usdc
+                price = price if price else self._market_status.data.price
+            else:
+                # e.g. swap 3000 usdc for 1 eth
+                price = price if price else 1 / self._market_status.data.price
+            fee_in_from = from_amount * self.pool_info.fee_rate
+            to_amount = (from_amount - fee_in_from) * price
         self.broker.subtract_from_balance(from_token, from_amount)
         self.broker.add_to_balance(to_token, to_amount)
         if throw_action:
@@ -794,11 +1133,19 @@ class UniLpMarket(Market):
         """
         if base_token_amount == 0:
             return DECIMAL_0, DECIMAL_0, DECIMAL_0
-        price = price if price else self.market_status.data.price
-        quote_amount_with_fee = base_token_amount * price / (1 - self._pool.fee_rate)
-        fee_in_quote, base_amount_got = self.swap(
-            quote_amount_with_fee, self.quote_token, self.base_token, 1 / price, False
-        )
+        if not price and self.liquidity_book is not None:
+            quote_amount_with_fee, fee_in_quote, base_amount_got = self._swap_in_book(
+                base_token_amount, self.quote_token, False
+            )
+            price = (quote_amount_with_fee - fee_in_quote) / base_amount_got
+            self.broker.subtract_from_balance(self.quote_token, quote_amount_with_fee)
+            self.broker.add_to_balance(self.base_token, base_amount_got)
+        else:
+            price = price if price else self._market_status.data.price
+            quote_amount_with_fee = base_token_amount * price / (1 - self._pool.fee_rate)
+            fee_in_quote, base_amount_got = self.swap(
+                quote_amount_with_fee, self.quote_token, self.base_token, 1 / price, False
+            )
         self._record_action(
             BuyAction(
                 market=self.market_info,
@@ -827,9 +1174,14 @@ class UniLpMarket(Market):
         """
         if base_token_amount == 0:
             return DECIMAL_0, DECIMAL_0, DECIMAL_0
-        price = price if price else self.market_status.data.price
-
-        fee_in_base, quote_amount_got = self.swap(base_token_amount, self.base_token, self.quote_token, price, False)
+        if not price and self.liquidity_book is not None:
+            fee_in_base, quote_amount_got = self.swap(base_token_amount, self.base_token, self.quote_token, None, False)
+            price = quote_amount_got / (base_token_amount - fee_in_base)
+        else:
+            price = price if price else self._market_status.data.price
+            fee_in_base, quote_amount_got = self.swap(
+                base_token_amount, self.base_token, self.quote_token, price, False
+            )
 
         self._record_action(
             SellAction(
@@ -873,7 +1225,7 @@ class UniLpMarket(Market):
             upper_tick = nearest_usable_tick(upper_tick, self.pool_info.tick_spacing)
         price = self._market_status.data.price
         tick = self._market_status.data.closeTick
-        price0, price1 = self._convert_pair(price, Decimal(1))
+        price0, price1 = self._convert_pair(price, to_number(1))
 
         quote_balance = self.broker.get_token_balance(self.quote_token)
         base_balance_value = self.broker.get_token_balance(self.base_token) * price
@@ -893,25 +1245,27 @@ class UniLpMarket(Market):
             # all base
             base_amount = value_to_use / self._market_status.data.price
             diff = base_amount - self.broker.get_token_balance(self.base_token)
-            fee_in_quote = Decimal(0)
+            fee_in_quote = to_number(0)
             if diff > MIN_ERROR:
                 fee_in_quote, to_amount = self.swap(diff * price, self.quote_token, self.base_token)
-            return self.add_liquidity_by_tick(lower_tick, upper_tick, base_amount - fee_in_quote / price, Decimal(0))
+            return self.add_liquidity_by_tick(lower_tick, upper_tick, base_amount - fee_in_quote / price, to_number(0))
 
         # price is lower than upper price
         if (self._is_token0_quote and tick < lower_tick) or (not self._is_token0_quote and tick > upper_tick):
             # all quote
             diff = value_to_use - self.broker.get_token_balance(self.quote_token)
-            fee_in_base = Decimal(0)
+            fee_in_base = to_number(0)
             if diff > 0:
                 fee_in_base, quote_got = self.swap(diff / price, self.base_token, self.quote_token)
-            return self.add_liquidity_by_tick(lower_tick, upper_tick, Decimal(0), value_to_use - fee_in_base * price)
+            return self.add_liquidity_by_tick(lower_tick, upper_tick, to_number(0), value_to_use - fee_in_base * price)
 
         # price is in tick range
 
         ratio = estimate_ratio(tick, lower_tick, upper_tick)
         ratio_in_amount = ratio * 10 ** (self.pool_info.token1.decimal - self.pool_info.token0.decimal)
-        ratio_in_value = Decimal(ratio_in_amount) / price if self._is_token0_quote else Decimal(ratio_in_amount) * price
+        ratio_in_value = (
+            to_number(ratio_in_amount) / price if self._is_token0_quote else to_number(ratio_in_amount) * price
+        )
 
         token1_value = value_to_use / (ratio_in_value + 1)
         token0_value = value_to_use - token1_value
@@ -962,12 +1316,12 @@ class UniLpMarket(Market):
         amount_quote = self.broker.get_token_balance(self.quote_token)
         amount_base = self.broker.get_token_balance(self.base_token)
 
-        delta_base = (amount_quote / price - amount_base) / (Decimal(2) + self.pool_info.fee_rate)
+        delta_base = (amount_quote / price - amount_base) / (to_number(2) + self.pool_info.fee_rate)
         if delta_base >= 0:
             self.buy(delta_base)
             return
 
-        delta_quote = (amount_base - amount_quote / price) / (Decimal(2) - self.pool_info.fee_rate)
+        delta_quote = (amount_base - amount_quote / price) / (to_number(2) - self.pool_info.fee_rate)
         if delta_quote >= 0:
             self.sell(delta_quote)
             return
@@ -983,7 +1337,7 @@ class UniLpMarket(Market):
         for position_key in keys:
             self.remove_liquidity(position_key)
 
-    def add_statistic_column(self, df: pd.DataFrame):
+    def add_statistic_column(self, df: pd.DataFrame, vectorized: bool | None = None):
         """
         add statistic column to data, new columns including:
 
@@ -994,22 +1348,41 @@ class UniLpMarket(Market):
         * volume0: swap volume for token 0
         * volume1: swap volume for token 1
 
+        | In vectorized mode, columns are calculated on whole arrays in float.
+        | Otherwise prices are calculated from tick in Decimal with integer sqrt math, it's precise but slower,
+        | each distinct tick is converted only once.
+
         :param df: original data
         :type df: pd.DataFrame
+        :param vectorized: calculate in float, default is true in fast numeric backend, and false in exact backend
+        :type vectorized: bool
 
         """
-        # add statistic column
-        df["open"] = df["openTick"].map(lambda x: self.tick_to_price(x))
-        df["price"] = df["closeTick"].map(lambda x: self.tick_to_price(x))
+        if vectorized is None:
+            vectorized = is_fast_backend()
         high_name, low_name = (
             ("lowestTick", "highestTick") if self.pool_info.is_token0_quote else ("highestTick", "lowestTick")
         )
-        df["low"] = df[high_name].map(lambda x: self.tick_to_price(x))
-        df["high"] = df[low_name].map(lambda x: self.tick_to_price(x))
-        df["volume0"] = df["inAmount0"].map(lambda x: Decimal(x) / 10**self.pool_info.token0.decimal)
-        df["volume1"] = df["inAmount1"].map(lambda x: Decimal(x) / 10**self.pool_info.token1.decimal)
-
-    def load_data(self, chain: str, contract_addr: str, start_date: date, end_date: date):
+        tick_columns = {"open": "openTick", "price": "closeTick", "low": high_name, "high": low_name}
+        decimal0, decimal1 = self.pool_info.token0.decimal, self.pool_info.token1.decimal
+        if vectorized:
+            for column, tick_column in tick_columns.items():
+                df[column] = ticks_to_base_unit_price(
+                    df[tick_column].to_numpy(), decimal0, decimal1, self._is_token0_quote
+                )
+            df["volume0"] = df["inAmount0"].to_numpy(dtype=float) / 10**decimal0
+            df["volume1"] = df["inAmount1"].to_numpy(dtype=float) / 10**decimal1
+        else:
+            ticks = pd.unique(np.concatenate([df[c].to_numpy() for c in tick_columns.values()]))
+            prices = {tick: self.tick_to_price(tick) for tick in ticks}
+            for column, tick_column in tick_columns.items():
+                df[column] = df[tick_column].map(prices)
+            df["volume0"] = df["inAmount0"].map(lambda x: Decimal(x) / 10**decimal0)
+            df["volume1"] = df["inAmount1"].map(lambda x: Decimal(x) / 10**decimal1)
+
+    def load_data(
+        self, chain: str, contract_addr: str, start_date: date, end_date: date, cache_dir: str | None = None
+    ):
         """
 
         load data, and preprocess. preprocess actions including:
@@ -1018,6 +1391,10 @@ class UniLpMarket(Market):
         * calculate statistic column
         * set timestamp as index
 
+        If cache_dir is set, prepared data will be saved there, and next time the same files are loaded,
+        prepared data will be read from cache. Cache will be invalid if any source file is modified.
+        Data resampled to AGGREGATE_INTERVALS is saved with prepared data, so switching interval is fast.
+
         :param chain: chain name
         :type chain: str
         :param contract_addr: pool contract address
@@ -1026,13 +1403,14 @@ class UniLpMarket(Market):
         :type start_date: date
         :param end_date: end test date
         :type end_date: date
+        :param cache_dir: folder to cache prepared data, None to disable cache
+        :type cache_dir: str
         """
         self.logger.info(f"start load files from {start_date} to {end_date}...")
-        df = pd.DataFrame()
-        day = start_date
         if start_date > end_date:
             raise DemeterError(f"start date {start_date} should earlier than end date {end_date}")
-        while day <= end_date:
+        paths = []
+        for day in iter_days(start_date, end_date):
             new_type_path = os.path.join(
                 self.data_path,
                 f"{chain.lower()}-{contract_addr}-{day.strftime('%Y-%m-%d')}.minute.csv",
@@ -1049,19 +1427,41 @@ class UniLpMarket(Market):
                 raise IOError(
                     f"resource file {new_type_path} not found, please download with demeter-fetch: https://github.com/zelos-alpha/demeter-fetch"
                 )
-            day_df = pd.read_csv(
-                path,
-                converters={
-                    "inAmount0": to_decimal,
-                    "inAmount1": to_decimal,
-                    "netAmount0": to_decimal,
-                    "netAmount1": to_decimal,
-                    "currentLiquidity": to_decimal,
-                },
+            paths.append(path)
+
+        cache_path = None
+        if cache_dir is not None:
+            key = data_cache_key(
+                paths,
+                market="uniswap",
+                chain=chain.lower(),
+                pool=contract_addr.lower(),
+                start=start_date.isoformat(),
+                end=end_date.isoformat(),
+                decimal0=self._pool.token0.decimal,
+                decimal1=self._pool.token1.decimal,
+                is_token0_quote=self._is_token0_quote,
             )
-            if len(day_df.index) > 0:
-                df = pd.concat([df, day_df])
-            day = day + timedelta(days=1)
+            cache_path = data_cache_path(cache_dir, f"{chain.lower()}-{contract_addr.lower()}", key)
+            aggregates_path = data_cache_path(cache_dir, f"{chain.lower()}-{contract_addr.lower()}-aggregates", key)
+            df = read_data_cache(cache_path)
+            if df is not None:
+                self.data = df
+                aggregates = read_data_cache(aggregates_path)
+                if aggregates is not None:
+                    self._set_aggregates(df, split_aggregates(aggregates))
+                else:
+                    self._set_aggregates(df, build_aggregates(df))
+                    write_data_cache(join_aggregates(self._aggregates), aggregates_path)
+                self.logger.info(f"data has been loaded from cache {cache_path}")
+                return
+
+        amount_columns = ["inAmount0", "inAmount1", "netAmount0", "netAmount1", "currentLiquidity"]
+        if is_fast_backend():
+            read_args = {"dtype": {column: float for column in amount_columns}}
+        else:
+            read_args = {"converters": {column: to_decimal for column in amount_columns}}
+        df = load_daily_files(paths, lambda path: pd.read_csv(path, **read_args))
         self.logger.info("load file complete, preparing...")
 
         df["timestamp"] = pd.to_datetime(df["timestamp"])
@@ -1078,12 +1478,20 @@ class UniLpMarket(Market):
         # df = df.fillna()
         df: pd.DataFrame = fillna(df)
         if pd.isna(df.iloc[0]["closeTick"]):
-            df = df.bfill()
+            df = bfill(df)
 
         self.add_statistic_column(df)
         self.data = df
+        if cache_path is not None:
+            self._set_aggregates(df, build_aggregates(df))
+            write_data_cache(df, cache_path)
+            write_data_cache(join_aggregates(self._aggregates), aggregates_path)
         self.logger.info("data has been prepared")
 
+    def _set_aggregates(self, df: pd.DataFrame, aggregates: Dict[str, pd.DataFrame]):
+        self._aggregates_source = df
+        self._aggregates = aggregates
+
     def formatted_str(self) -> str:
         """
         Return a brief description of this market in pretty format. Used for print in console.
@@ -1108,5 +1516,23 @@ class UniLpMarket(Market):
             value += "Empty DataFrame\n"
         return value
 
+    def __getstate__(self):
+        # aggregated data can be built again, don't save it in checkpoint
+        state = self.__dict__.copy()
+        state["_aggregates_source"] = None
+        state["_aggregates"] = {}
+        state["_resampled"] = None
+        return state
+
     def _resample(self, freq: str):
-        self._data = resample(self.data, freq)
+        """
+        | Resample data to freq. Resampled data is kept and reused,
+        | so switching interval again (e.g. in a parameter sweep) doesn't resample the whole minutely data.
+        | Aggregated data is dropped if data is replaced.
+        """
+        if self._data is not self._aggregates_source and self._data is not self._resampled:
+            self._aggregates_source = self._data
+            self._aggregates = {}
+        # shallow copy, so columns added by strategy will not be saved in aggregated data
+        self._resampled = resample_aggregated(self._aggregates_source, freq, self._aggregates).copy(deep=False)
+        self._data = self._resampled
@@ -0,0 +1,116 @@
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from ._typing import UniV3Pool, PositionInfo, Position
+from .core import V3CoreLib
+from .liquitidy_math import get_sqrt_ratio_at_tick
+from ..utils import to_number
+
+# side of price to a position
+BELOW = -1  # price is below position, position is all token0
+ABOVE = 1  # price is above position, position is all token1
+
+
+class PositionIndex:
+    """
+    | Index of LP positions by tick range, it's built from positions of UniLpMarket,
+    | and should be rebuilt when a position is added or removed.
+    | Tick arrays are used to find positions in range, or positions earning fee.
+    | Token amounts of a position out of range do not depend on price,
+    | so they are cached and only recomputed after price crosses boundaries of the position, or liquidity is changed.
+    | Amount cache can be passed to a new index, as cached values only depend on range, liquidity and side of price.
+    | Liquidity array is kept for fee calculation, call update_liquidity after liquidity of a position is changed.
+
+    :param positions: positions in market
+    :type positions: Dict[PositionInfo, Position]
+    :param pool: pool info
+    :type pool: UniV3Pool
+    :param amount_cache: amount cache of previous index
+    :type amount_cache: Dict[PositionInfo, tuple]
+    """
+
+    def __init__(
+        self,
+        positions: Dict[PositionInfo, Position],
+        pool: UniV3Pool,
+        amount_cache: Dict[PositionInfo, tuple] | None = None,
+    ):
+        self.pool = pool
+        self.keys: List[PositionInfo] = list(positions.keys())
+        self.positions: List[Position] = list(positions.values())
+        self.rows: Dict[PositionInfo, int] = {k: i for i, k in enumerate(self.keys)}
+        # liquidity in number type of current backend, used to calculate share of fee
+        self.liquidity: np.ndarray = V3CoreLib.liquidity_array(self.positions)
+        self.lower_ticks = np.array([k.lower_tick for k in self.keys], dtype=np.int64)
+        self.upper_ticks = np.array([k.upper_tick for k in self.keys], dtype=np.int64)
+        self._sqrt_lower = [get_sqrt_ratio_at_tick(k.lower_tick) for k in self.keys]
+        self._sqrt_upper = [get_sqrt_ratio_at_tick(k.upper_tick) for k in self.keys]
+        # position => (side, liquidity, amount0, amount1)
+        self.amount_cache: Dict[PositionInfo, tuple] = (
+            {} if amount_cache is None else {k: v for k, v in amount_cache.items() if k in positions}
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update_liquidity(self, key: PositionInfo):
+        """
+        Sync liquidity array after liquidity of a position is changed
+
+        :param key: position
+        :type key: PositionInfo
+        """
+        i = self.rows.get(key)
+        if i is not None:
+            self.liquidity[i] = to_number(self.positions[i].liquidity)
+
+    def in_range(self, tick: int) -> List[PositionInfo]:
+        """
+        Positions whose range includes tick
+
+        :param tick: tick, e.g. current close tick
+        :type tick: int
+        :return: positions in range
+        :rtype: List[PositionInfo]
+        """
+        return [self.keys[i] for i in np.flatnonzero((self.lower_ticks <= tick) & (tick <= self.upper_ticks))]
+
+    def out_of_range(self, tick: int) -> List[PositionInfo]:
+        """
+        Positions whose range doesn't include tick
+
+        :param tick: tick, e.g. current close tick
+        :type tick: int
+        :return: positions out of range
+        :rtype: List[PositionInfo]
+        """
+        return [self.keys[i] for i in np.flatnonzero((self.lower_ticks > tick) | (tick > self.upper_ticks))]
+
+    def get_token_amounts(self, i: int, sqrt_price_x96: int) -> Tuple[Decimal, Decimal]:
+        """
+        Token amounts of a position, the same as V3CoreLib.get_token_amounts
+
+        :param i: position of index
+        :type i: int
+        :param sqrt_price_x96: current sqrt price
+        :type sqrt_price_x96: int
+        :return: token0 amount, token1 amount
+        :rtype: Tuple[Decimal, Decimal]
+        """
+        key = self.keys[i]
+        liquidity = self.positions[i].liquidity
+        # the same boundaries as get_amounts
+        if sqrt_price_x96 <= self._sqrt_lower[i]:
+            side = BELOW
+        elif sqrt_price_x96 < self._sqrt_upper[i]:
+            return V3CoreLib.get_token_amounts(self.pool, key, sqrt_price_x96, liquidity)
+        else:
+            side = ABOVE
+        cached = self.amount_cache.get(key)
+        if cached is not None and cached[0] == side and cached[1] == liquidity:
+            return cached[2], cached[3]
+        amount0, amount1 = V3CoreLib.get_token_amounts(self.pool, key, sqrt_price_x96, liquidity)
+        self.amount_cache[key] = (side, liquidity, amount0, amount1)
+        return amount0, amount1
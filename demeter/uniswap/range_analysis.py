@@ -0,0 +1,274 @@
+from datetime import datetime
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ._typing import UniV3Pool
+from .._typing import DemeterError
+
+# elements of a (bar, range) matrix evaluated at once, ranges are split into chunks to bound memory usage
+CHUNK_ELEMENTS = 4_000_000
+
+SUMMARY_COLUMNS = [
+    "lower_tick",
+    "upper_tick",
+    "liquidity",
+    "base_fee",
+    "quote_fee",
+    "fee_value",
+    "position_value",
+    "net_value",
+    "return_rate",
+    "in_range_ratio",
+]
+
+
+def range_grid(lower_ticks: Sequence[int], upper_ticks: Sequence[int]) -> np.ndarray:
+    """
+    All the combinations of lower and upper ticks, pairs whose lower tick is not less than upper tick are dropped.
+
+    :param lower_ticks: candidates of lower tick
+    :type lower_ticks: Sequence[int]
+    :param upper_ticks: candidates of upper tick
+    :type upper_ticks: Sequence[int]
+    :return: array of shape (n, 2), each row is (lower_tick, upper_tick)
+    :rtype: np.ndarray
+    """
+    lower, upper = np.meshgrid(np.asarray(lower_ticks, dtype=np.int64), np.asarray(upper_ticks, dtype=np.int64))
+    pairs = np.column_stack([lower.ravel(), upper.ravel()])
+    return pairs[pairs[:, 0] < pairs[:, 1]]
+
+
+def heatmap(summary: pd.DataFrame, value: str = "net_value") -> pd.DataFrame:
+    """
+    Pivot result of RangeAnalysis.analyze to a heatmap, index is lower tick and columns are upper tick.
+
+    :param summary: result of RangeAnalysis.analyze
+    :type summary: pd.DataFrame
+    :param value: column to show, e.g. net_value, fee_value, return_rate
+    :type value: str
+    :return: heatmap
+    :rtype: pd.DataFrame
+    """
+    if value not in summary.columns:
+        raise DemeterError(f"{value} is not a column of summary")
+    return summary.pivot(index="lower_tick", columns="upper_tick", values=value)
+
+
+class RangeAnalysis:
+    """
+    | Evaluate many static LP ranges over the whole pool data without running back test.
+    | All positions are opened at the same entry time and never changed,
+    | so their fee and value only depend on pool data, and can be calculated on arrays of (bar, range).
+    | Rules are the same as UniLpMarket:
+    | * capital(in quote token) is fully invested at pool price of entry bar, no swap fee is charged
+    | * fee is earned in a bar if close tick is in range, or price crossed the range, or moved out of range, see V3CoreLib.update_fee
+    | * share of fee is liquidity / (pool liquidity + liquidity), as position liquidity is added to pool liquidity
+    | * value of position and uncollected fee is evaluated with price column of pool data
+    | Calculation is done in float, result may be slightly different from back test in Decimal.
+
+    :param pool: pool info
+    :type pool: UniV3Pool
+    :param data: pool data, the same as UniLpMarket.data, columns closeTick, currentLiquidity, inAmount0, inAmount1 and price are required
+    :type data: pd.DataFrame
+    """
+
+    def __init__(self, pool: UniV3Pool, data: pd.DataFrame):
+        for col in ["closeTick", "currentLiquidity", "inAmount0", "inAmount1", "price"]:
+            if col not in data.columns:
+                raise DemeterError(f"column {col} is required in pool data")
+        self.pool = pool
+        self.data = data
+        self._tick = np.asarray(data["closeTick"], dtype=float)
+        self._liquidity = np.asarray(data["currentLiquidity"], dtype=float)
+        self._amount0 = np.asarray(data["inAmount0"], dtype=float) / 10**pool.token0.decimal
+        self._amount1 = np.asarray(data["inAmount1"], dtype=float) / 10**pool.token1.decimal
+        self._price = np.asarray(data["price"], dtype=float)
+        # price column is base/quote in human unit, convert to sqrt price of token1/token0 in atomic unit
+        pool_price = 1 / self._price if pool.is_token0_quote else self._price
+        self._sqrt_price = np.sqrt(pool_price / 10 ** (pool.token0.decimal - pool.token1.decimal))
+        self._fee_rate = float(pool.fee_rate)
+
+    def _entry_row(self, entry_time: datetime) -> int:
+        row = self.data.index.get_indexer([entry_time])[0]
+        if row < 0:
+            raise DemeterError(f"entry time {entry_time} is not in pool data")
+        return row
+
+    @staticmethod
+    def _ranges(ranges) -> Tuple[np.ndarray, np.ndarray]:
+        ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+        if np.any(ranges[:, 0] >= ranges[:, 1]):
+            raise DemeterError("lower tick should be less than upper tick")
+        return ranges[:, 0], ranges[:, 1]
+
+    def _amounts(self, sqrt_price: np.ndarray, lower: np.ndarray, upper: np.ndarray, liquidity: np.ndarray):
+        """
+        Token amounts of positions in base/quote and human unit, arrays are broadcast.
+        """
+        sqrt_lower = 1.0001 ** (lower / 2)
+        sqrt_upper = 1.0001 ** (upper / 2)
+        sp = np.clip(sqrt_price, sqrt_lower, sqrt_upper)
+        amount0 = liquidity * (sqrt_upper - sp) / (sp * sqrt_upper) / 10**self.pool.token0.decimal
+        amount1 = liquidity * (sp - sqrt_lower) / 10**self.pool.token1.decimal
+        return (amount1, amount0) if self.pool.is_token0_quote else (amount0, amount1)
+
+    def _evaluate(self, entry: int, lower: np.ndarray, upper: np.ndarray, capital: float, cumulative: bool):
+        """
+        Evaluate a chunk of ranges, from entry bar to the end of data.
+
+        :return: liquidity, base fee, quote fee and in range ratio.
+            fee is cumulative array of (bar, range) if cumulative, else total fee of each range.
+        """
+        base_per_liq, quote_per_liq = self._amounts(self._sqrt_price[entry], lower, upper, 1.0)
+        liquidity = capital / (base_per_liq * self._price[entry] + quote_per_liq)
+
+        tick = self._tick[entry:, None]
+        # last tick of entry bar is its own close tick, as market status is set again after position is added.
+        last_tick = np.concatenate([self._tick[entry : entry + 1], self._tick[entry:-1]])[:, None]
+        in_range = (upper >= tick) & (tick >= lower)
+        earning = (
+            in_range
+            | ((last_tick > upper) & (tick < lower))
+            | ((tick > upper) & (last_tick < lower))
+            | ((upper >= last_tick) & (last_tick >= lower) & ((tick > upper) | (tick < lower)))
+        )
+        share = np.where(earning, liquidity / (self._liquidity[entry:, None] + liquidity), 0.0) * self._fee_rate
+        fee0 = share * self._amount0[entry:, None]
+        fee1 = share * self._amount1[entry:, None]
+        if cumulative:
+            fee0, fee1 = np.cumsum(fee0, axis=0), np.cumsum(fee1, axis=0)
+        else:
+            fee0, fee1 = fee0.sum(axis=0), fee1.sum(axis=0)
+        base_fee, quote_fee = (fee1, fee0) if self.pool.is_token0_quote else (fee0, fee1)
+        return liquidity, base_fee, quote_fee, in_range.mean(axis=0)
+
+    def analyze(
+        self,
+        ranges: Sequence[Tuple[int, int]] | np.ndarray,
+        entry_time: datetime,
+        capital: float,
+    ) -> pd.DataFrame:
+        """
+        Evaluate ranges and get their status at the end of data.
+
+        | Columns of result:
+        | lower_tick, upper_tick: range of position
+        | liquidity: liquidity of position
+        | base_fee, quote_fee: fee income in token amount
+        | fee_value: value of fee income at last price
+        | position_value: value of liquidity at last price
+        | net_value: position_value + fee_value
+        | return_rate: net_value / capital
+        | in_range_ratio: ratio of bars whose close tick is in range
+
+        :param ranges: tick ranges, e.g. result of range_grid
+        :type ranges: Sequence[Tuple[int, int]] | np.ndarray
+        :param entry_time: time to open position, should be in index of pool data
+        :type entry_time: datetime
+        :param capital: value invested in each position, in quote token
+        :type capital: float
+        :return: one row for each range
+        :rtype: pd.DataFrame
+        """
+        entry = self._entry_row(entry_time)
+        lower, upper = self._ranges(ranges)
+        chunk = max(1, CHUNK_ELEMENTS // (len(self._tick) - entry))
+        results = []
+        for start in range(0, len(lower), chunk):
+            lo, up = lower[start : start + chunk], upper[start : start + chunk]
+            liquidity, base_fee, quote_fee, in_range_ratio = self._evaluate(entry, lo, up, capital, False)
+            base, quote = self._amounts(self._sqrt_price[-1], lo, up, liquidity)
+            results.append((liquidity, base_fee, quote_fee, base * self._price[-1] + quote, in_range_ratio))
+        liquidity, base_fee, quote_fee, position_value, in_range_ratio = [
+            np.concatenate([r[i] for r in results]) if len(results) > 0 else np.array([]) for i in range(5)
+        ]
+        fee_value = base_fee * self._price[-1] + quote_fee
+        net_value = position_value + fee_value
+        return pd.DataFrame(
+            {
+                "lower_tick": lower,
+                "upper_tick": upper,
+                "liquidity": liquidity,
+                "base_fee": base_fee,
+                "quote_fee": quote_fee,
+                "fee_value": fee_value,
+                "position_value": position_value,
+                "net_value": net_value,
+                "return_rate": net_value / capital,
+                "in_range_ratio": in_range_ratio,
+            },
+            columns=SUMMARY_COLUMNS,
+        )
+
+    def series(self, lower_tick: int, upper_tick: int, entry_time: datetime, capital: float) -> pd.DataFrame:
+        """
+        Status of a range in every bar since entry time.
+
+        :param lower_tick: lower tick
+        :type lower_tick: int
+        :param upper_tick: upper tick
+        :type upper_tick: int
+        :param entry_time: time to open position, should be in index of pool data
+        :type entry_time: datetime
+        :param capital: value invested in position, in quote token
+        :type capital: float
+        :return: columns are base_in_position, quote_in_position, base_fee, quote_fee,
+            position_value, fee_value and net_value
+        :rtype: pd.DataFrame
+        """
+        entry = self._entry_row(entry_time)
+        lower, upper = self._ranges([(lower_tick, upper_tick)])
+        liquidity, base_fee, quote_fee, _ = self._evaluate(entry, lower, upper, capital, True)
+        base, quote = self._amounts(self._sqrt_price[entry:, None], lower, upper, liquidity)
+        price = self._price[entry:]
+        df = pd.DataFrame(
+            {
+                "base_in_position": base[:, 0],
+                "quote_in_position": quote[:, 0],
+                "base_fee": base_fee[:, 0],
+                "quote_fee": quote_fee[:, 0],
+            },
+            index=self.data.index[entry:],
+        )
+        df["position_value"] = df["base_in_position"] * price + df["quote_in_position"]
+        df["fee_value"] = df["base_fee"] * price + df["quote_fee"]
+        df["net_value"] = df["position_value"] + df["fee_value"]
+        return df
+
+    def net_values(
+        self,
+        ranges: Sequence[Tuple[int, int]] | np.ndarray,
+        entry_time: datetime,
+        capital: float,
+    ) -> pd.DataFrame:
+        """
+        Net value of ranges in every bar since entry time. Result has a column for each range,
+        so memory usage is bars * ranges, use analyze if only final status is needed.
+
+        :param ranges: tick ranges
+        :type ranges: Sequence[Tuple[int, int]] | np.ndarray
+        :param entry_time: time to open position, should be in index of pool data
+        :type entry_time: datetime
+        :param capital: value invested in each position, in quote token
+        :type capital: float
+        :return: net value, columns are (lower_tick, upper_tick)
+        :rtype: pd.DataFrame
+        """
+        entry = self._entry_row(entry_time)
+        lower, upper = self._ranges(ranges)
+        price = self._price[entry:, None]
+        chunk = max(1, CHUNK_ELEMENTS // (len(self._tick) - entry))
+        values: List[np.ndarray] = []
+        for start in range(0, len(lower), chunk):
+            lo, up = lower[start : start + chunk], upper[start : start + chunk]
+            liquidity, base_fee, quote_fee, _ = self._evaluate(entry, lo, up, capital, True)
+            base, quote = self._amounts(self._sqrt_price[entry:, None], lo, up, liquidity)
+            values.append((base + base_fee) * price + quote + quote_fee)
+        data = np.concatenate(values, axis=1) if len(values) > 0 else np.empty((len(price), 0))
+        return pd.DataFrame(
+            data,
+            index=self.data.index[entry:],
+            columns=pd.MultiIndex.from_arrays([lower, upper], names=["lower_tick", "upper_tick"]),
+        )
@@ -19,3 +19,18 @@ from .console_text import (
     get_formatted_predefined,
     get_formatted_from_dict,
 )
+from .numeric import (
+    NumericBackend,
+    set_numeric_backend,
+    get_numeric_backend,
+    is_fast_backend,
+    to_number,
+    to_unit_number,
+)
+from .data_cache import (
+    data_cache_key,
+    data_cache_path,
+    read_data_cache,
+    write_data_cache,
+)
+from .loader import iter_days, load_daily_files
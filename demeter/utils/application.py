@@ -8,6 +8,7 @@ from typing import Any, Dict
 
 from demeter import TokenInfo, STABLE_COINS
 from demeter._typing import USD
+from .numeric import is_fast_backend
 
 OUTPUT_WIDTH = 30
 
@@ -15,6 +16,11 @@ OUTPUT_WIDTH = 30
 def orjson_default(obj):
     if isinstance(obj, Decimal):
         return str(obj)
+    if isinstance(obj, TokenInfo):
+        return obj.name
+    if isinstance(obj, tuple):
+        # orjson doesn't serialize subclass of tuple, e.g. MarketInfo, PositionInfo
+        return obj._asdict() if hasattr(obj, "_asdict") else list(obj)
     raise TypeError
 
 
@@ -55,9 +61,23 @@ def dict_to_object(dict_entity: Dict) -> Any:
     return json.loads(json.dumps(dict_entity), object_hook=lambda d: SimpleNamespace(**d))
 
 
+def object_to_float(num: Any) -> Any:
+    """
+    If number is Decimal, return float, else return original value
+
+    :param value: any value
+    :type value: Any
+    :return: float value
+    :rtype: Any
+    """
+    return float(num) if isinstance(num, Decimal) else num
+
+
 def float_param_formatter(func):
     """
-    decorator to convert param to float
+    | decorator to convert param to number type of numeric backend.
+    | In exact backend, float and int will be converted to Decimal,
+    | In fast backend, Decimal will be converted to float, int is kept, so tick and liquidity are still exact.
 
     :param func: any function
     :return: function execute result
@@ -65,11 +85,10 @@ def float_param_formatter(func):
 
     @wraps(func)
     def wrapper_func(*args, **kwargs):
-        new_args = ()
-        for arg in args:
-            new_args += (object_to_decimal(arg),)
+        convert = object_to_float if is_fast_backend() else object_to_decimal
+        new_args = tuple(convert(arg) for arg in args)
         for k, v in kwargs.items():
-            kwargs[k] = object_to_decimal(v)
+            kwargs[k] = convert(v)
         return func(*new_args, **kwargs)
 
     return wrapper_func
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import pickle
+from typing import List
+
+import orjson
+import pandas as pd
+
+from .numeric import get_numeric_backend
+
+# increase this if format of prepared data is changed, so old cache files will not be used
+DATA_CACHE_VERSION = 1
+
+
+def data_cache_key(source_files: List[str], **params) -> str:
+    """
+    | Key of prepared data, it's a hash of parameters and source files.
+    | Name, size and modify time of source files are included, so cache is invalid if any source file is changed.
+    | Numeric backend is also included, as data is loaded in different number types.
+
+    :param source_files: path of source files
+    :type source_files: List[str]
+    :param params: parameters which affect prepared data, e.g. chain, pool address, date range, should be json serializable
+    :return: hex digest
+    :rtype: str
+    """
+    files = []
+    for path in source_files:
+        stat = os.stat(path)
+        files.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    content = {
+        "version": DATA_CACHE_VERSION,
+        "backend": get_numeric_backend().name,
+        "pandas": pd.__version__,
+        "params": params,
+        "files": files,
+    }
+    return hashlib.sha256(orjson.dumps(content, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def data_cache_path(cache_dir: str, prefix: str, key: str) -> str:
+    """
+    Path of a cache file
+
+    :param cache_dir: folder of cache files
+    :type cache_dir: str
+    :param prefix: readable prefix of file name, e.g. chain and pool address
+    :type prefix: str
+    :param key: key got from data_cache_key
+    :type key: str
+    :return: file path
+    :rtype: str
+    """
+    return os.path.join(cache_dir, f"{prefix}-{key[:20]}.pkl")
+
+
+def read_data_cache(path: str) -> pd.DataFrame | None:
+    """
+    Read prepared data from cache file.
+
+    :param path: file path
+    :type path: str
+    :return: prepared data, None if cache file doesn't exist or can not be read
+    :rtype: pd.DataFrame | None
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+        return None
+
+
+def write_data_cache(df: pd.DataFrame, path: str):
+    """
+    | Save prepared data to cache file, pickle is used, as it keeps types of all columns(e.g. Decimal) and index,
+    | and it's fast to load.
+    | Data is written to a temporary file first, so an incomplete cache file will never be read.
+
+    :param df: prepared data
+    :type df: pd.DataFrame
+    :param path: file path
+    :type path: str
+    """
+    folder = os.path.dirname(path)
+    if folder != "" and not os.path.exists(folder):
+        os.makedirs(folder)
+    tmp_path = path + ".tmp"
+    df.to_pickle(tmp_path, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import getcontext, setcontext
+from typing import Callable, List
+
+import pandas as pd
+
+# max threads to read files, reading csv is mostly io and c parser, threads are enough.
+DEFAULT_LOAD_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def iter_days(start_date: date, end_date: date) -> List[date]:
+    """
+    Days between start date and end date, both are included.
+
+    :param start_date: start day
+    :type start_date: date
+    :param end_date: end day
+    :type end_date: date
+    :return: days
+    :rtype: List[date]
+    """
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def load_daily_files(
+    paths: List[str],
+    read_file: Callable[[str], pd.DataFrame],
+    max_workers: int | None = None,
+    on_loaded: Callable[[str], None] | None = None,
+) -> pd.DataFrame:
+    """
+    | Read daily files concurrently, then concatenate them once in the order of paths.
+    | Markets decide which files to read and how to parse a file, this function only schedules the work.
+    | Empty files are skipped.
+
+    :param paths: file paths, usually one file for one day
+    :type paths: List[str]
+    :param read_file: function to read a file into dataframe, e.g. a pd.read_csv with market specified arguments
+    :type read_file: Callable[[str], pd.DataFrame]
+    :param max_workers: count of threads, default is DEFAULT_LOAD_WORKERS, 1 to read in current thread
+    :type max_workers: int
+    :param on_loaded: called in current thread after a file is read, e.g. to update progress bar
+    :type on_loaded: Callable[[str], None]
+    :return: data in all the files
+    :rtype: pd.DataFrame
+    """
+    if max_workers is None:
+        max_workers = DEFAULT_LOAD_WORKERS
+    max_workers = max(1, min(max_workers, len(paths)))
+
+    frames: List[pd.DataFrame] = []
+    if max_workers == 1:
+        for path in paths:
+            frames.append(read_file(path))
+            if on_loaded is not None:
+                on_loaded(path)
+    else:
+        # decimal context is thread local, keep precision of current thread in workers
+        context = getcontext()
+        with ThreadPoolExecutor(max_workers=max_workers, initializer=lambda: setcontext(context.copy())) as executor:
+            for path, df in zip(paths, executor.map(read_file, paths)):
+                frames.append(df)
+                if on_loaded is not None:
+                    on_loaded(path)
+
+    frames = [df for df in frames if len(df.index) > 0]
+    if len(frames) < 1:
+        return pd.DataFrame()
+    return pd.concat(frames)
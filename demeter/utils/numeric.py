@@ -0,0 +1,86 @@
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+from .._typing import DemeterError, UnitDecimal
+
+
+class NumericBackend(Enum):
+    """
+    Number type used in calculation.
+
+    * exact: Decimal with 35 digits precision, it's the default backend
+    * fast: float64, much faster, suitable for parameter sweeps which do not need high precision
+    """
+
+    exact = "exact"
+    fast = "fast"
+
+
+_backend: NumericBackend = NumericBackend.exact
+
+
+def set_numeric_backend(backend: NumericBackend | str):
+    """
+    Set numeric backend globally. It should be set before market data is loaded,
+    because data will be loaded into number type of current backend.
+
+    :param backend: new backend, can be NumericBackend or its name
+    :type backend: NumericBackend | str
+    """
+    global _backend
+    if isinstance(backend, str):
+        if backend not in NumericBackend.__members__:
+            raise DemeterError(f"numeric backend should be one of {list(NumericBackend.__members__)}, got {backend}")
+        backend = NumericBackend[backend]
+    _backend = backend
+
+
+def get_numeric_backend() -> NumericBackend:
+    """
+    Get current numeric backend
+
+    :return: current backend
+    :rtype: NumericBackend
+    """
+    return _backend
+
+
+def is_fast_backend() -> bool:
+    """
+    Check if fast(float) backend is used
+
+    :return: True if fast backend is used
+    :rtype: bool
+    """
+    return _backend is NumericBackend.fast
+
+
+def to_number(value: Any) -> Decimal | float:
+    """
+    Convert value to number type of current backend, Decimal for exact backend, float for fast backend
+
+    :param value: any number
+    :type value: Any
+    :return: converted value
+    :rtype: Decimal | float
+    """
+    if _backend is NumericBackend.fast:
+        return float(value)
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def to_unit_number(value: Any, unit: str) -> UnitDecimal | float:
+    """
+    Attach unit to a number. In fast backend, unit is dropped and a float is returned.
+
+    :param value: any number
+    :type value: Any
+    :param unit: unit of this number, e.g. eth
+    :type unit: str
+    :return: number with unit
+    :rtype: UnitDecimal | float
+    """
+    if _backend is NumericBackend.fast:
+        return float(value)
+    return UnitDecimal(value, unit)
@@ -2,12 +2,23 @@ import os
 import pickle
 import json
 import unittest
-from datetime import date, datetime
+import tempfile
+from unittest import mock
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
+import numpy as np
 import pandas as pd
 
 import demeter.indicator
-from demeter import TokenInfo, Actuator, Strategy, MarketInfo, RowData, MarketDict, ChainType, BackTestDescription
+from demeter import NumericBackend, set_numeric_backend, AccountStatus, AssetDict, TokenInfo, Actuator, Strategy, MarketInfo, RowData, MarketDict, ChainType, BackTestDescription
+from demeter import AtTimeTrigger, PeriodTrigger
+from demeter.core import ParameterSweep, LoopProfiler, MultiActuator
+from demeter.core.cursor import BarCursor, _AlignedFrame
+from demeter.core.sweep import _dump_frame, _load_frame
+from demeter.broker import BarRow, MarketBalance
+from demeter.core.recorder import AccountStatusRecorder
+from demeter.result import CsvSink, ResultSink
 from demeter.uniswap import PositionInfo, UniV3Pool, UniLpMarket
 
 pd.options.display.max_columns = None
@@ -39,6 +50,69 @@ class AddLiquidity(Strategy):
             pass
 
 
+class AddLiquidityWithParam(Strategy):
+    def __init__(self, lower: float, upper: float):
+        super().__init__()
+        self.lower = lower
+        self.upper = upper
+
+    def on_bar(self, row_data: RowData):
+        if row_data.row_id == 2:
+            self.markets[test_market].add_liquidity(self.lower, self.upper)
+
+
+class AddLiquidityAndRecordStatus(AddLiquidity):
+    def __init__(self):
+        super().__init__()
+        self.status_list = []
+
+    def after_bar(self, row_data: RowData):
+        self.status_list.append(self.broker.get_account_status(row_data.prices, row_data.timestamp))
+
+
+class AddLiquidityAtTime(Strategy):
+    def initialize(self):
+        self.triggers.append(AtTimeTrigger(datetime(2023, 8, 14, 10, 30), self.add_liquidity))
+
+    def add_liquidity(self, row_data: RowData):
+        self.markets[test_market].add_liquidity(1000, 2000)
+
+
+class RebalanceWithSMA(Strategy):
+    def initialize(self):
+        self.add_column(test_market, "ma5", demeter.indicator.simple_moving_average(self.market1.data.closeTick))
+        self.triggers.append(PeriodTrigger(timedelta(hours=6), self.rebalance, trigger_immediately=True))
+
+    def rebalance(self, row_data: RowData):
+        market: UniLpMarket = self.markets[test_market]
+        market.remove_all_liquidity()
+        market.add_liquidity(1500, 2500)
+
+    def on_bar(self, row_data: RowData):
+        if row_data.row_id == 700:
+            # column added in initialize should be available after resume
+            ma5 = row_data.market_status[test_market].ma5
+            self.markets[test_market].add_liquidity(ma5 - 100, ma5 + 100)
+
+
+class ReadMarketStatus(AddLiquidity):
+    def initialize(self):
+        self.rows = []
+        # replace a column after actuator has lined up data
+        self.markets[test_market].data["ma5"] = 0
+        self.markets[test_market].data["ma5"] = Decimal(5)
+
+    def after_bar(self, row_data: RowData):
+        data = self.markets[test_market].market_status.data
+        assert isinstance(data, pd.Series)
+        assert data.get("not_a_column", 1) == 1
+        # row data and market status are the same row
+        assert row_data.market_status[test_market].values is data.values
+        row = data.to_dict()
+        row["name"] = data.name
+        self.rows.append(row)
+
+
 class WithSMA(Strategy):
     def initialize(self):
         self.add_column(self.market1, "ma5", demeter.indicator.simple_moving_average(self.market1.data.closeTick))
@@ -116,6 +190,293 @@ class TestActuator(unittest.TestCase):
         actuator.run()
         self.assertTrue("ma5" in actuator.broker.markets.default.data.columns)
 
+    def test_bar_cursor(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        market = actuator.broker.markets.default
+        prices = market.get_price_from_data()[0]
+        cursor = BarCursor(market.data.index, prices, actuator.broker.markets)
+        self.assertEqual(len(cursor), 1440)
+        for row_id in [0, 100, 1439]:
+            timestamp = market.data.index[row_id]
+            self.assertTrue(cursor.price(row_id).to_series().equals(prices.loc[timestamp]))
+            status = cursor.market_status(test_market, row_id)
+            self.assertEqual(status.timestamp, timestamp)
+            self.assertTrue(status.data.to_series().equals(market.data.loc[timestamp]))
+            self.assertEqual(status.data.closeTick, market.data.loc[timestamp, "closeTick"])
+            self.assertEqual(status.data["price"], market.data.loc[timestamp, "price"])
+        # columns are views of market data, not a copy
+        frame = cursor._frames[test_market]
+        for i, column in enumerate(frame.arrays):
+            self.assertTrue(np.shares_memory(column, market.data.iloc[:, i].to_numpy()))
+        # values changed in place can be read, replaced columns can be read after refresh
+        market.data.loc[market.data.index[5], "price"] = Decimal(1)
+        market.data["volume0"] = Decimal(2)
+        self.assertEqual(cursor.market_status(test_market, 5).data.price, Decimal(1))
+        self.assertNotEqual(cursor.market_status(test_market, 6).data.volume0, Decimal(2))
+        cursor.refresh()
+        self.assertEqual(cursor.market_status(test_market, 6).data.volume0, Decimal(2))
+        # row is read once, every market status gets a copy
+        self.assertIs(cursor.price(1439), cursor.price(1439))
+        status = cursor.market_status(test_market, 1439)
+        status.data.currentLiquidity = 0
+        self.assertNotEqual(cursor.market_status(test_market, 1439).data.currentLiquidity, 0)
+        market.data["new_column"] = 1
+        self.assertEqual(cursor.market_status(test_market, 0).data["new_column"], 1)
+
+    def test_row_data(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        market = actuator.broker.markets.default
+        cursor = BarCursor(market.data.index, market.get_price_from_data()[0], actuator.broker.markets)
+        row = cursor.market_status(test_market, 10).data
+        self.assertIsInstance(row, BarRow)
+        self.assertIn("closeTick", row.index)
+        self.assertEqual(row.get("not_a_column", 1), 1)
+        with self.assertRaises(AttributeError):
+            row.not_a_column = 1
+        self.assertEqual(str(pickle.loads(pickle.dumps(row))), str(row))
+
+        # row data builds pd.Series when it's read
+        row_data = RowData(market.data.index[10], 10, cursor.price(10))
+        row_data.market_status[test_market] = row
+        self.assertIsInstance(row_data.market_status.data[test_market], BarRow)
+        series = row_data.market_status.market1
+        self.assertIsInstance(series, pd.Series)
+        self.assertIs(row_data.market_status.default, series)
+        self.assertTrue(series.equals(market.data.iloc[10]))
+        # series shares values with the row of market
+        series["currentLiquidity"] = 1
+        self.assertEqual(row.currentLiquidity, 1)
+        self.assertIsInstance(row_data.prices, pd.Series)
+        self.assertEqual(row_data.prices.name, market.data.index[10])
+
+    def test_market_status_is_series(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        strategy = ReadMarketStatus()
+        actuator.strategy = strategy
+        actuator.run()
+        self.assertEqual(len(strategy.rows), 1440)
+        # indicators set in initialize are read in main loop
+        self.assertEqual({row["ma5"] for row in strategy.rows}, {Decimal(5)})
+        self.assertEqual(strategy.rows[3]["name"], actuator.account_status_df.index[3])
+        # market status of strategy shares values with market, virtual liquidity is added
+        self.assertGreater(
+            strategy.rows[3]["currentLiquidity"], actuator.broker.markets[test_market].data.iloc[3].currentLiquidity
+        )
+
+    def test_account_status_recorder(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        strategy = AddLiquidityAndRecordStatus()
+        actuator.strategy = strategy
+        actuator.run()
+        # account status list is built by broker, like it was kept before recorder
+        expected = AccountStatus.to_dataframe(strategy.status_list)
+        pd.testing.assert_frame_equal(actuator.account_status.to_dataframe(), expected)
+        self.assertIsInstance(expected[("tokens", "ETH")].iloc[-1], Decimal)
+
+        recorder = AccountStatusRecorder(chunk_size=100)
+        for status in strategy.status_list:
+            recorder.append(status)
+        self.assertEqual(len(recorder), 1440)
+        pd.testing.assert_frame_equal(recorder.to_dataframe(), expected)
+        self.assertEqual(str(recorder[-1]), str(actuator.final_status))
+        self.assertEqual([str(x) for x in recorder[2:4]], [str(x) for x in strategy.status_list[2:4]])
+
+    def test_account_status_recorder_values(self):
+        timestamps = [datetime(2023, 8, 14, 0, i) for i in range(3)]
+        assets = AssetDict()
+        assets[eth] = Decimal("1.5")
+        assets[usdc] = Decimal("100.000001")
+        markets = MarketDict()
+        markets[test_market] = MarketBalance(Decimal("10.25"))
+        recorder = AccountStatusRecorder(chunk_size=2)
+        recorder.append(AccountStatus(timestamps[0], Decimal("3100.5"), assets, markets))
+        recorder.repeat_last(timestamps[1:], np.array([Decimal("3200.5"), Decimal("3000.5")], dtype=object))
+
+        expected = pd.DataFrame(
+            [
+                [Decimal("3100.5"), Decimal("1.5"), Decimal("100.000001"), Decimal("10.25")],
+                [Decimal("3200.5"), Decimal("1.5"), Decimal("100.000001"), Decimal("10.25")],
+                [Decimal("3000.5"), Decimal("1.5"), Decimal("100.000001"), Decimal("10.25")],
+            ],
+            index=pd.DatetimeIndex(timestamps),
+            columns=pd.MultiIndex.from_tuples(
+                [("net_value", ""), ("tokens", "ETH"), ("tokens", "USDC"), ("market1", "net_value")], names=["l1", "l2"]
+            ),
+            dtype=object,
+        )
+        pd.testing.assert_frame_equal(recorder.to_dataframe(), expected)
+        repeated = recorder[2]
+        self.assertEqual(repeated.timestamp, timestamps[2])
+        self.assertEqual(repeated.net_value, Decimal("3000.5"))
+        self.assertIsInstance(repeated.net_value, Decimal)
+        self.assertEqual(repeated.asset_balances[usdc], Decimal("100.000001"))
+        self.assertEqual(repeated.market_status[test_market].net_value, Decimal("10.25"))
+
+    def test_run_with_fast_backend(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = AddLiquidity()
+        actuator.run()
+        try:
+            set_numeric_backend(NumericBackend.fast)
+            fast_actuator = TestActuator.get_actuator_with_uni_market()
+            fast_actuator.strategy = AddLiquidity()
+            fast_actuator.run()
+        finally:
+            set_numeric_backend(NumericBackend.exact)
+        fast_net_value = fast_actuator.account_status_df["net_value"]
+        self.assertEqual(fast_net_value.dtype, float)
+        exact_net_value = actuator.account_status_df["net_value"].astype(float)
+        self.assertTrue(((fast_net_value - exact_net_value).abs() < 1e-8).all())
+
+    def test_fast_forward(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = AddLiquidityAtTime()
+        actuator.run()
+        fast_actuator = TestActuator.get_actuator_with_uni_market()
+        fast_actuator.fast_forward = True
+        fast_actuator.strategy = AddLiquidityAtTime()
+        fast_actuator.run()
+        self.assertEqual(len(fast_actuator.broker.markets[test_market].positions), 1)
+        pd.testing.assert_frame_equal(actuator.account_status_df, fast_actuator.account_status_df)
+        self.assertEqual(str(actuator.account_status[100]), str(fast_actuator.account_status[100]))
+
+    def test_profile(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        samples = []
+        actuator.profiler = LoopProfiler(sample_every=100, on_sample=lambda i, t, laps: samples.append((i, laps)))
+        actuator.strategy = AddLiquidity()
+        actuator.run()
+        report = actuator.profile_report
+        self.assertEqual(report.loc[("update", test_market.name), "calls"], 1440)
+        self.assertEqual(report.loc[("on_bar", ""), "calls"], 1440)
+        self.assertAlmostEqual(report["percent"].sum(), 100)
+        self.assertEqual([i for i, laps in samples], list(range(0, 1440, 100)))
+        self.assertIn(("account_status", ""), samples[0][1])
+        with tempfile.TemporaryDirectory() as folder:
+            actuator.save_result(folder, "profile_test")
+            self.assertTrue(os.path.exists(os.path.join(folder, "profile_test.profile.csv")))
+
+        self.assertIsNone(TestActuator.get_actuator_with_uni_market().profile_report)
+
+    def test_checkpoint(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = RebalanceWithSMA()
+        actuator.run()
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "test.checkpoint")
+            saved_actuator = TestActuator.get_actuator_with_uni_market()
+            saved_actuator.checkpoint_every = 500
+            saved_actuator.checkpoint_path = path
+            saved_actuator.strategy = RebalanceWithSMA()
+            saved_actuator.run()
+            pd.testing.assert_frame_equal(actuator.account_status_df, saved_actuator.account_status_df)
+
+            # last checkpoint is saved before row 1000
+            resumed_actuator = TestActuator.get_actuator_with_uni_market()
+            resumed_actuator.run(resume_from=path)
+        self.assertEqual(len(resumed_actuator.actions), len(actuator.actions))
+        self.assertEqual(
+            list(resumed_actuator.broker.markets[test_market].positions.keys()),
+            list(actuator.broker.markets[test_market].positions.keys()),
+        )
+        pd.testing.assert_frame_equal(actuator.account_status_df, resumed_actuator.account_status_df)
+
+    def test_result_sink(self):
+        with tempfile.TemporaryDirectory() as folder:
+            actuator = TestActuator.get_actuator_with_uni_market()
+            actuator.result_sink = CsvSink(folder, "kept", chunk_size=500)
+            actuator.strategy = RebalanceWithSMA()
+            actuator.run()
+            self.assertEqual(len(os.listdir(os.path.join(folder, "kept.account"))), 3)
+            saved = actuator.result_sink.read_account_status()
+            pd.testing.assert_index_equal(saved.columns, actuator.account_status_df.columns)
+            pd.testing.assert_frame_equal(saved, actuator.account_status_df.astype(float), check_dtype=False)
+            self.assertEqual(len(actuator.result_sink.read_actions().index), len(actuator.actions))
+
+            bounded_actuator = TestActuator.get_actuator_with_uni_market()
+            bounded_actuator.result_sink = CsvSink(folder, "bounded", chunk_size=500, keep_in_memory=False)
+            bounded_actuator.strategy = RebalanceWithSMA()
+            bounded_actuator.run()
+            self.assertEqual(len(bounded_actuator.account_status), 1440)
+            self.assertEqual(len(bounded_actuator.account_status.timestamps), 1)
+            pd.testing.assert_frame_equal(saved, bounded_actuator.account_status_df)
+            self.assertEqual(str(actuator.final_status), str(bounded_actuator.final_status))
+            # actions are kept in memory, and saved result is the same
+            self.assertGreater(len(actuator.actions), 0)
+            self.assertEqual([str(a) for a in bounded_actuator.actions], [str(a) for a in actuator.actions])
+            self.assertIs(bounded_actuator.strategy.actions, bounded_actuator.actions)
+            pd.testing.assert_frame_equal(
+                actuator.result_sink.read_actions(), bounded_actuator.result_sink.read_actions()
+            )
+            saved_actions = []
+            for name, a in [("kept", actuator), ("bounded", bounded_actuator)]:
+                pkl_path = [f for f in a.save_result(folder, name) if f.endswith(".pkl")][0]
+                with open(pkl_path, "rb") as f:
+                    saved_actions.append([str(x) for x in pickle.load(f).actions])
+            self.assertEqual(saved_actions[0], saved_actions[1])
+            self.assertEqual(saved_actions[0], [str(a) for a in actuator.actions])
+
+            detail = json.loads(actuator.result_sink.read_actions()["detail"].iloc[0])
+            self.assertEqual(detail["market"]["name"], test_market.name)
+            self.assertIn("lower_tick", detail["position"])
+
+            class UnknownSink(ResultSink):
+                pass
+
+            with self.assertRaises(TypeError):
+                UnknownSink(folder)
+
+    def test_multi_actuator(self):
+        strategies = [AddLiquidity, RebalanceWithSMA, AddLiquidityAtTime]
+        multi = MultiActuator(TestActuator.get_actuator_with_uni_market(), [s() for s in strategies])
+        multi.actuators[2].fast_forward = True
+        multi.run()
+        for strategy, multi_actuator in zip(strategies, multi.actuators):
+            actuator = TestActuator.get_actuator_with_uni_market()
+            actuator.strategy = strategy()
+            actuator.run()
+            self.assertIsInstance(multi_actuator.strategy, strategy)
+            self.assertEqual(len(multi_actuator.actions), len(actuator.actions))
+            pd.testing.assert_frame_equal(actuator.account_status_df, multi_actuator.account_status_df)
+
+    def test_multi_actuator_reads_row_once(self):
+        multi = MultiActuator(TestActuator.get_actuator_with_uni_market(), [AddLiquidity(), AddLiquidityAtTime()])
+        with mock.patch.object(_AlignedFrame, "row", autospec=True, side_effect=_AlignedFrame.row) as row:
+            multi.run()
+        # price row and market row of each bar
+        self.assertEqual(row.call_count, 2 * 1440)
+        self.assertIsNot(
+            multi.actuators[0].broker.markets[test_market].market_status.data,
+            multi.actuators[1].broker.markets[test_market].market_status.data,
+        )
+
+    def test_parameter_sweep(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        sweep = ParameterSweep(actuator, AddLiquidityWithParam, {"lower": [1000, 1500], "upper": [2000, 2500]}, 2)
+        result = sweep.run()
+        self.assertEqual(len(result.index), 4)
+        self.assertEqual(list(result["lower"]), [1000, 1000, 1500, 1500])
+
+        actuator.strategy = AddLiquidityWithParam(1500, 2500)
+        actuator.run()
+        net_value = actuator.account_status_df["net_value"]
+        self.assertAlmostEqual(result.iloc[3]["return_value"], float(net_value.iloc[-1] - net_value.iloc[0]))
+
+    def test_parameter_sweep_memory_mapped(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator._check_backtest()
+        for df in [actuator.broker.markets[test_market].data, actuator.token_prices]:
+            with tempfile.TemporaryDirectory() as folder:
+                _dump_frame(df, folder)
+                loaded = _load_frame(folder)
+                for column in df.columns:
+                    values = loaded[column].to_numpy()
+                    # Decimal columns are converted to float and mapped, not unpickled in each worker
+                    self.assertIsInstance(values.base, np.memmap, column)
+                    self.assertFalse(values.flags.writeable)
+                pd.testing.assert_frame_equal(loaded.astype(float), df.astype(float))
+                del loaded, values
+
     def test_uniswap_load_missing_data(self):
         pool = UniV3Pool(usdc, eth, 0.05, usdc)
         market = UniLpMarket(test_market, pool)
@@ -143,18 +504,20 @@ class TestActuator(unittest.TestCase):
         actuator = TestActuator.get_actuator_with_uni_market()
         actuator.strategy = AddLiquidity()
         actuator.run()
-        file_list = actuator.save_result("result")
-        for f in file_list:
-            self.assertTrue(os.path.exists(f))
+        with tempfile.TemporaryDirectory() as folder:
+            file_list = actuator.save_result(folder)
+            for f in file_list:
+                self.assertTrue(os.path.exists(f))
 
     def test_load_pkl(self):
         actuator = TestActuator.get_actuator_with_uni_market()
         actuator.strategy = AddLiquidity()
         actuator.run()
-        files = actuator.save_result("result")
-        file = filter(lambda x: ".pkl" in x, files)
-        with open(list(file)[0], "rb") as f:
-            xxx: BackTestDescription = pickle.load(f)
-            self.assertEqual(actuator._action_list[0].lower_quote_price, xxx.actions[0].lower_quote_price)
-            self.assertEqual(actuator._action_list[0].action_type, xxx.actions[0].action_type)
-            self.assertEqual(actuator._action_list[0].timestamp, xxx.actions[0].timestamp)
+        with tempfile.TemporaryDirectory() as folder:
+            files = actuator.save_result(folder)
+            file = filter(lambda x: ".pkl" in x, files)
+            with open(list(file)[0], "rb") as f:
+                xxx: BackTestDescription = pickle.load(f)
+        self.assertEqual(actuator._action_list[0].lower_quote_price, xxx.actions[0].lower_quote_price)
+        self.assertEqual(actuator._action_list[0].action_type, xxx.actions[0].action_type)
+        self.assertEqual(actuator._action_list[0].timestamp, xxx.actions[0].timestamp)
@@ -1,9 +1,12 @@
 import unittest
+from unittest import mock
 from datetime import datetime, timedelta
 
 import pandas as pd
 import numpy as np
 from demeter import TokenInfo, PriceTrigger, MarketDict, MarketInfo, AtTimeTrigger, PeriodTrigger, MarketStatus, RowData
+from demeter import Strategy, AtTimesTrigger, TimeRange, TimeRangeTrigger, TimeRangesTrigger, PeriodsTrigger
+from demeter.strategy import TriggerScheduler, TriggerList
 
 eth = TokenInfo(name="weth", decimal=18, address="0x7ceb23fd6bc0add59e62ac25578270cff1b9f619")
 usdc = TokenInfo(name="usdc", decimal=6)
@@ -120,3 +123,130 @@ class UniLpCoreTest(unittest.TestCase):
         self.__run(price_df, pt)
         self.assertEqual(param_container[0], 3)
         self.assertEqual(price_df.index[1440 - 1], datetime(2023, 5, 1, 23, 59, 0))
+
+    def test_scheduler(self):
+        def get_triggers(fired):
+            def record(name):
+                return lambda row_data: fired.append((name, row_data.timestamp))
+
+            def add_trigger(row_data):
+                # triggers added in an action should be checked in the same iteration
+                strategy.triggers.append(AtTimeTrigger(row_data.timestamp, record("added")))
+
+            return [
+                PriceTrigger(lambda p: p["eth"] > 1714.35, record("price")),
+                AtTimeTrigger(datetime(2023, 5, 1, 10, 10), add_trigger),
+                AtTimeTrigger(datetime(2023, 4, 1), record("past")),
+                AtTimesTrigger([datetime(2023, 5, 1, 3), datetime(2023, 5, 1, 1)], record("at_times")),
+                TimeRangeTrigger(TimeRange(datetime(2023, 5, 1, 5), datetime(2023, 5, 1, 5, 3)), record("range")),
+                TimeRangesTrigger(
+                    [
+                        TimeRange(datetime(2023, 5, 1, 6), datetime(2023, 5, 1, 6, 2)),
+                        TimeRange(datetime(2023, 5, 1, 2), datetime(2023, 5, 1, 2, 1)),
+                    ],
+                    record("ranges"),
+                ),
+                PeriodTrigger(timedelta(hours=5), record("period"), trigger_immediately=True),
+                PeriodsTrigger([timedelta(hours=7), timedelta(hours=11)], record("periods")),
+            ]
+
+        price_df = UniLpCoreTest.__get_price_df()
+        # scan all the triggers in every iteration
+        expected = []
+        triggers = get_triggers(expected)
+        strategy = Strategy()
+        strategy.triggers = triggers
+        for time_index, price_row in price_df.iterrows():
+            row_data = UniLpCoreTest.__get_moke_row_data(time_index.to_pydatetime(), price_row)
+            for trigger in strategy.triggers:
+                if trigger.when(row_data):
+                    trigger.do(row_data)
+            strategy.triggers = [x for x in strategy.triggers if not x.is_out_date(row_data.timestamp)]
+        expected_left = [type(x) for x in strategy.triggers]
+
+        actual = []
+        strategy = Strategy()
+        strategy.triggers = get_triggers(actual)
+        scheduler = TriggerScheduler(strategy)
+        for time_index, price_row in price_df.iterrows():
+            scheduler.run(UniLpCoreTest.__get_moke_row_data(time_index.to_pydatetime(), price_row))
+
+        self.assertEqual(actual, expected)
+        self.assertEqual([type(x) for x in strategy.triggers], expected_left)
+        self.assertEqual(expected_left, [PriceTrigger, PeriodTrigger, PeriodsTrigger])
+        self.assertIn(("at_times", datetime(2023, 5, 1, 1)), actual)
+        self.assertIn(("added", datetime(2023, 5, 1, 10, 10)), actual)
+
+    def test_scheduler_change_in_place(self):
+        def run(fired, use_scheduler):
+            def record(name):
+                return lambda row_data: fired.append((name, row_data.timestamp))
+
+            strategy = Strategy()
+            strategy.triggers = [
+                PeriodTrigger(timedelta(hours=2), record("old"), trigger_immediately=True),
+                PriceTrigger(lambda p: p["eth"] > 1714.35, record("price")),
+            ]
+            scheduler = TriggerScheduler(strategy)
+            for time_index, price_row in UniLpCoreTest.__get_price_df().iterrows():
+                timestamp = time_index.to_pydatetime()
+                row_data = UniLpCoreTest.__get_moke_row_data(timestamp, price_row)
+                if use_scheduler:
+                    scheduler.run(row_data)
+                else:
+                    for trigger in strategy.triggers:
+                        if trigger.when(row_data):
+                            trigger.do(row_data)
+                # like in on_bar, list is changed in place and length is not changed
+                if timestamp == datetime(2023, 5, 1, 5):
+                    strategy.triggers.remove(strategy.triggers[0])
+                    strategy.triggers.append(PeriodTrigger(timedelta(hours=3), record("new")))
+                elif timestamp == datetime(2023, 5, 1, 13):
+                    strategy.triggers[0] = AtTimeTrigger(datetime(2023, 5, 1, 14), record("replaced"))
+
+        expected, actual = [], []
+        run(expected, False)
+        run(actual, True)
+        self.assertEqual(actual, expected)
+        self.assertNotIn(("old", datetime(2023, 5, 1, 6)), actual)
+        self.assertIn(("new", datetime(2023, 5, 1, 8, 1)), actual)
+        self.assertIn(("replaced", datetime(2023, 5, 1, 14)), actual)
+
+    def test_scheduler_idle_iteration(self):
+        checked = []
+
+        class CountingTrigger(AtTimeTrigger):
+            def when(self, row_data) -> bool:
+                checked.append(row_data.timestamp)
+                return super().when(row_data)
+
+        strategy = Strategy()
+        # many triggers wait after the data, they should not be touched in any iteration
+        strategy.triggers = [CountingTrigger(datetime(2023, 5, 2) + timedelta(minutes=i), None) for i in range(5000)]
+        strategy.triggers.append(CountingTrigger(datetime(2023, 5, 1, 12), None))
+        scheduler = TriggerScheduler(strategy)
+        compared, scanned = [], []
+        original_eq, original_iter = TriggerList.__eq__, TriggerList.__iter__
+
+        def count_eq(this, other):
+            compared.append(timestamp)
+            return original_eq(this, other)
+
+        def count_iter(this):
+            scanned.append(timestamp)
+            return original_iter(this)
+
+        with mock.patch.object(TriggerList, "__eq__", count_eq), mock.patch.object(TriggerList, "__iter__", count_iter):
+            for time_index, price_row in UniLpCoreTest.__get_price_df().iterrows():
+                timestamp = time_index.to_pydatetime()
+                scheduler.run(UniLpCoreTest.__get_moke_row_data(timestamp, price_row))
+                if timestamp == datetime(2023, 5, 1, 6):
+                    strategy.triggers.append(CountingTrigger(datetime(2023, 5, 1, 7), None))
+
+        self.assertEqual(checked, [datetime(2023, 5, 1, 7), datetime(2023, 5, 1, 12)])
+        self.assertEqual(compared, [])
+        # list is only gone through when it's scheduled at first, and when expired triggers are removed
+        self.assertEqual(
+            sorted(set(scanned)), [datetime(2023, 5, 1, 0), datetime(2023, 5, 1, 7), datetime(2023, 5, 1, 12)]
+        )
+        self.assertEqual(len(strategy.triggers), 5000)
@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+from demeter import RowData, Strategy
+from demeter.uniswap import UniLpMarket, RemoveLiquidityAction, LpAnalytics, delta_gamma, helper
+from tests import actuator_test
+from tests.actuator_test import test_market
+
+
+class AddAndRemoveLiquidity(Strategy):
+    def on_bar(self, row_data: RowData):
+        market: UniLpMarket = self.broker.markets[test_market]
+        if row_data.row_id == 2:
+            market.add_liquidity(1000, 2000)
+        elif row_data.row_id == 600:
+            position, liquidity = list(market.positions.items())[0]
+            market.remove_liquidity(position, liquidity.liquidity // 2, collect=False)
+
+
+class UniLpAnalyticsTest(unittest.TestCase):
+    def test_same_as_backtest(self):
+        actuator = actuator_test.TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = AddAndRemoveLiquidity()
+        actuator.run(print_result=False)
+        market: UniLpMarket = actuator.broker.markets[test_market]
+        position_info, position = list(market.positions.items())[0]
+        removed: RemoveLiquidityAction = [a for a in actuator.actions if isinstance(a, RemoveLiquidityAction)][0]
+
+        analytics = LpAnalytics(market.pool_info, market.data)
+        liquidity = analytics.liquidity_from_actions(actuator.actions)
+        self.assertEqual(list(liquidity.columns), [(position_info.lower_tick, position_info.upper_tick)])
+        self.assertEqual(liquidity.iloc[1, 0], 0)
+        self.assertEqual(liquidity.iloc[2, 0], position.liquidity + removed.removed_liquidity)
+        self.assertEqual(liquidity.iloc[-1, 0], position.liquidity)
+
+        result = analytics.analyze(liquidity)
+        self.assertEqual(len(result.index), len(market.data.index))
+        last = result.iloc[-1]
+        base_amount, quote_amount = market.get_position_amount(position_info)[::-1]
+        self.assertAlmostEqual(last.base_in_position / float(base_amount), 1, 6)
+        self.assertAlmostEqual(last.quote_in_position / float(quote_amount), 1, 6)
+        # pending amount includes tokens removed from position
+        base_fee = float(position.pending_amount1 - removed.base_amount)
+        quote_fee = float(position.pending_amount0 - removed.quote_amount)
+        self.assertAlmostEqual(result.base_fee.sum() / base_fee, 1, 6)
+        self.assertAlmostEqual(result.quote_fee.sum() / quote_fee, 1, 6)
+
+        self.assertEqual(result.position_value.iloc[1], 0)
+        self.assertAlmostEqual(result.impermanent_loss.iloc[2], 0, 6)
+        self.assertTrue(np.isnan(result.fee_apr.iloc[1]))
+        self.assertGreater(result.fee_apr.iloc[-1], 0)
+
+    def test_delta_gamma(self):
+        actuator = actuator_test.TestActuator.get_actuator_with_uni_market()
+        market: UniLpMarket = actuator.broker.markets[test_market]
+        pool = market.pool_info
+        lower_tick, upper_tick, liquidity = 200000, 202000, 10**16
+        lower_price = float(market.tick_to_price(upper_tick))
+        upper_price = float(market.tick_to_price(lower_tick))
+        prices = np.array([1500, lower_price * 1.01, 1700, 1800, upper_price * 0.99, 2500])
+        delta, gamma = delta_gamma(pool, prices, np.array([lower_tick]), np.array([upper_tick]), np.array([liquidity]))
+        for i, price in enumerate(prices):
+            expected_delta, expected_gamma = helper.get_delta_gamma(
+                lower_price, upper_price, price, liquidity, pool.token0.decimal, pool.token1.decimal, True
+            )
+            self.assertAlmostEqual(delta[i], float(expected_delta), 9)
+            self.assertAlmostEqual(gamma[i] * 10**6, float(expected_gamma) * 10**6, 6)
+
+        # constant positions
+        analytics = LpAnalytics(pool, market.data)
+        result = analytics.analyze([(lower_tick, upper_tick, liquidity)])
+        delta, gamma = delta_gamma(
+            pool, market.data.price.astype(float), np.array([lower_tick]), np.array([upper_tick]), [liquidity]
+        )
+        self.assertTrue(np.allclose(result.delta, delta))
+        self.assertTrue(np.allclose(result.impermanent_loss.iloc[0], 0))
+        self.assertTrue(np.allclose(result.hodl_value.iloc[0], result.position_value.iloc[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,14 @@
 import math
 import unittest
+from unittest import mock
 from decimal import Decimal
 
-from demeter import TokenInfo
-from demeter.uniswap import V3CoreLib, UniV3Pool
+import numpy as np
+import pandas as pd
+
+from demeter import TokenInfo, NumericBackend, set_numeric_backend
+from demeter.uniswap import core
+from demeter.uniswap import V3CoreLib, UniV3Pool, PositionInfo, Position
 from demeter.uniswap.helper import (
     tick_to_sqrt_price_x96,
     get_swap_value,
@@ -234,3 +239,50 @@ class UniLpCoreTest(unittest.TestCase):
             math.isclose(actual_from + actual_to + m * fee_rate, to_invest_f + to_invest_t, abs_tol=0.000001)
         )
         self.assertGreaterEqual(from_val + to_val, actual_from + actual_to + m * fee_rate)
+
+    def test_update_fees(self):
+        ticks = [(193400, 193440), (193420, 193460), (193300, 193380), (193500, 193600), (193430, 193431)]
+        infos = [PositionInfo(lower, upper) for lower, upper in ticks]
+        lower_ticks = np.array([t[0] for t in ticks])
+        upper_ticks = np.array([t[1] for t in ticks])
+        # loop for a few positions, and arrays for many positions
+        for min_positions in [core._VECTORIZE_MIN_POSITIONS, 1]:
+            expected = [Position(Decimal(0), Decimal(0), 10**15 * (i + 1), Decimal(0), Decimal(0)) for i in range(5)]
+            actual = [Position(Decimal(0), Decimal(0), 10**15 * (i + 1), Decimal(0), Decimal(0)) for i in range(5)]
+            last_tick = None
+            # in position, cross over position, move out of position, and first bar without last tick
+            for close_tick in [193430, 193450, 193700, 193350, 193250, 193430, 193390]:
+                state = pd.Series(
+                    {"closeTick": close_tick, "inAmount0": 12345678, "inAmount1": 10**16, "currentLiquidity": 10**17},
+                    dtype=object,
+                )
+                for info, position in zip(infos, expected):
+                    V3CoreLib.update_fee(last_tick, self.pool, info, position, state)
+                with mock.patch.object(core, "_VECTORIZE_MIN_POSITIONS", min_positions):
+                    V3CoreLib.update_fees(last_tick, self.pool, lower_ticks, upper_ticks, actual, state)
+                last_tick = close_tick
+            for e, a in zip(expected, actual):
+                self.assertEqual(e.pending_amount0, a.pending_amount0)
+                self.assertEqual(e.pending_amount1, a.pending_amount1)
+                self.assertIsInstance(a.pending_amount0, Decimal)
+        self.assertGreater(actual[3].pending_amount0, 0)
+
+        # liquidity array in fast backend
+        try:
+            set_numeric_backend(NumericBackend.fast)
+            expected = [Position(0.0, 0.0, 10**15 * (i + 1), 0.0, 0.0) for i in range(len(ticks))]
+            actual = [Position(0.0, 0.0, 10**15 * (i + 1), 0.0, 0.0) for i in range(len(ticks))]
+            liquidity = V3CoreLib.liquidity_array(actual)
+            self.assertEqual(liquidity.dtype, float)
+            state = pd.Series({"closeTick": 193430, "inAmount0": 12345678, "inAmount1": 10**16, "currentLiquidity": 1e17})
+            for info, position in zip(infos, expected):
+                V3CoreLib.update_fee(193450, self.pool, info, position, state)
+            with mock.patch.object(core, "_VECTORIZE_MIN_POSITIONS", 1):
+                V3CoreLib.update_fees(193450, self.pool, lower_ticks, upper_ticks, actual, state, liquidity)
+        finally:
+            set_numeric_backend(NumericBackend.exact)
+        for e, a in zip(expected, actual):
+            self.assertAlmostEqual(e.pending_amount0, a.pending_amount0, 15)
+            self.assertAlmostEqual(e.pending_amount1, a.pending_amount1, 15)
+            self.assertIsInstance(a.pending_amount0, float)
+        self.assertGreater(actual[4].pending_amount1, 0)
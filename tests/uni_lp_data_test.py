@@ -1,5 +1,9 @@
+import time
 import unittest
 
+from decimal import Decimal
+
+import numpy as np
 import pandas as pd
 
 from demeter.uniswap import LineTypeEnum, data
@@ -73,3 +77,60 @@ class UniLpDataTest(unittest.TestCase):
         self.assertEqual(new_df.iloc[2, 2], 0)
         self.assertEqual(new_df.iloc[2, 3], 0)
         self.assertEqual(new_df.iloc[2, 4], 8)
+
+    def test_fillna_by_kernels(self):
+        index = pd.date_range("2022-9-6 8:0:0", periods=7, freq="1min")
+        nan = float("nan")
+        df = pd.DataFrame(
+            data={
+                LineTypeEnum.openTick.name: [nan, 1.0, nan, 3.0, nan, 5.0, nan],
+                LineTypeEnum.closeTick.name: [nan, 2.0, nan, 4.0, nan, 6.0, nan],
+                LineTypeEnum.inAmount0.name: [nan, Decimal(1), nan, Decimal(3), nan, Decimal(5), nan],
+                LineTypeEnum.netAmount1.name: [nan, 1.0, nan, 3.0, nan, 5.0, nan],
+                LineTypeEnum.currentLiquidity.name: [nan, Decimal(10), nan, Decimal(30), nan, Decimal(50), nan],
+            },
+            index=index,
+        )
+        expected = data.fillna(df, vectorized=False)
+        new_df = data.fillna(df)
+        pd.testing.assert_frame_equal(new_df, expected)
+        self.assertEqual(list(new_df[LineTypeEnum.openTick.name].iloc[1:]), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(new_df[LineTypeEnum.inAmount0.name].iloc[2], 0)
+        self.assertEqual(new_df[LineTypeEnum.currentLiquidity.name].iloc[2], Decimal(10))
+        self.assertTrue(np.isnan(new_df[LineTypeEnum.closeTick.name].iloc[0]))
+        pd.testing.assert_frame_equal(data.bfill(new_df), expected.bfill())
+        self.assertEqual(data.bfill(new_df)[LineTypeEnum.currentLiquidity.name].iloc[0], Decimal(10))
+
+        with self.assertRaises(ValueError):
+            data.fillna(pd.DataFrame(data={"S0": [1.0, nan]}, index=index[:2]))
+
+    def test_fillna_by_kernels_dtype(self):
+        # a year of minutely data, 30% of minutes have swaps
+        index = pd.date_range("2023-1-1", periods=365 * 1440, freq="1min")
+        rng = np.random.default_rng(0)
+        has_data = rng.random(len(index)) < 0.3
+        has_data[0] = True
+        ticks = np.where(has_data, rng.integers(200000, 201000, len(index)), np.nan)
+        amounts = np.where(has_data, rng.integers(1, 10**12, len(index)).astype(object), np.nan)
+        exact_amounts = np.array([Decimal(x) if has else x for x, has in zip(amounts, has_data)], dtype=object)
+        tick_columns = [LineTypeEnum.closeTick.name, LineTypeEnum.openTick.name, LineTypeEnum.highestTick.name]
+        amount_columns = [LineTypeEnum.netAmount0.name, LineTypeEnum.inAmount1.name, LineTypeEnum.currentLiquidity.name]
+        exact_df = pd.DataFrame(
+            data={**{c: ticks for c in tick_columns}, **{c: exact_amounts for c in amount_columns}}, index=index
+        )
+        fast_df = exact_df.astype(float)
+
+        start = time.perf_counter()
+        exact = data.fillna(exact_df)
+        fast = data.fillna(fast_df)
+        self.assertLess(time.perf_counter() - start, 10)
+
+        for column in tick_columns:
+            self.assertEqual(exact[column].dtype, np.float64)
+            self.assertFalse(exact[column].isna().any())
+        for column in amount_columns:
+            self.assertEqual(fast[column].dtype, np.float64)
+            self.assertEqual(exact[column].dtype, object)
+        self.assertEqual(exact[LineTypeEnum.currentLiquidity.name].iloc[1], exact_amounts[1 if has_data[1] else 0])
+        self.assertIsInstance(exact[LineTypeEnum.currentLiquidity.name].iloc[-1], Decimal)
+        pd.testing.assert_frame_equal(exact.astype(float), fast)
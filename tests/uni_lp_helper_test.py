@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 from decimal import Decimal
 
 from demeter.uniswap import helper, liquitidy_math
@@ -149,3 +150,54 @@ class UniLpDataTest(unittest.TestCase):
         tick = helper.sqrt_price_x96_to_tick(sqrt_price_x96)
         print(tick)
         self.assertEqual(tick, 196147)
+
+    def test_tick_cache(self):
+        helper.clear_tick_cache()
+        for tick in [-887272, -200000, -1, 0, 1, 196147, 887272]:
+            expected = liquitidy_math._sqrt_ratio_at_tick.__wrapped__(tick)
+            self.assertEqual(liquitidy_math.get_sqrt_ratio_at_tick(tick), expected)
+            # cached value, tick can also be a float from data
+            self.assertEqual(liquitidy_math.get_sqrt_ratio_at_tick(float(tick)), expected)
+            price = helper._tick_to_base_unit_price.__wrapped__(tick, 6, 18, True, False, 35)
+            self.assertEqual(helper.tick_to_base_unit_price(tick, 6, 18, True), price)
+            self.assertEqual(helper.tick_to_base_unit_price(tick, 6, 18, True), price)
+        self.assertEqual(liquitidy_math._sqrt_ratio_at_tick.cache_info().hits, 3 * 7)
+        helper.clear_tick_cache()
+        self.assertEqual(liquitidy_math._sqrt_ratio_at_tick.cache_info().currsize, 0)
+
+    def test_find_tick_range_at_rate(self):
+        cases = [
+            ((Decimal(1800), Decimal("1.5"), 10, 6, 18, True), (201360, 205130, 195400)),
+            ((Decimal(1800), Decimal("2"), 10, 6, 18, True), (201360, 202850, 198260)),
+            ((Decimal(1800), Decimal("1.2"), 60, 6, 18, True), (201360, 221040, 173520)),
+            ((Decimal("0.0005"), Decimal("1.5"), 10, 18, 6, False), (-352340, -348570, -358300)),
+            ((Decimal(1800), Decimal("1.5"), 1, 6, 18, True), (201364, 201594, 201018)),
+        ]
+        for args, (center, upper, lower) in cases:
+            result = helper.find_tick_range_at_rate(*args)
+            self.assertEqual((result.center_tick, result.upper, result.lower), (center, upper, lower))
+            self.assertEqual((result.upper_delta, result.lower_delta), (upper - center, lower - center))
+            self.assertEqual(result.rate.quantize(Decimal("0.00001")), args[1].quantize(Decimal("0.00001")))
+        result = helper.find_tick_range_at_rate(Decimal(1800), Decimal("1.5"), 10, 6, 18, True)
+        self.assertEqual(result.final_price, Decimal("1800.8748414004480387338126301005483"))
+        result = helper.find_tick_range_at_rate(Decimal(1800), Decimal("1.5"), 10, 6, 18, True, Decimal("0.001"))
+        self.assertEqual((result.upper, result.lower), (201380, 201330))
+
+        ranges = helper.find_tick_ranges_at_rate([1800, 1800, 1800], [1.5, 2, 1.5], 10, 6, 18, True)
+        self.assertEqual(list(ranges["center_tick"]), [201360, 201360, 201360])
+        self.assertEqual(list(ranges["upper"]), [205130, 202850, 205130])
+        self.assertEqual(list(ranges["lower"]), [195400, 198260, 195400])
+        assert_equal_with_error(ranges["rate"].iloc[0], 1.5000003709981647, 0.000001)
+        ranges = helper.find_tick_ranges_at_rate([0.0005], [1.5], 10, 18, 6, False)
+        self.assertEqual((ranges["upper"].iloc[0], ranges["lower"].iloc[0]), (-348570, -358300))
+
+    def test_find_tick_range_at_rate_calls(self):
+        # upper tick is 230 spacings away, exact liquidity math should only run on candidates
+        with mock.patch("demeter.uniswap.helper.get_liquidity", wraps=helper.get_liquidity) as get_liquidity:
+            result = helper.find_tick_range_at_rate(Decimal(1800), Decimal("1.5"), 1, 6, 18, True)
+        self.assertEqual((result.center_tick, result.upper, result.lower), (201364, 201594, 201018))
+        self.assertLess(get_liquidity.call_count, 20)
+
+        ranges = helper.find_tick_ranges_at_rate([1800, 1800], [1.5, 1.2], 1, 6, 18, True)
+        self.assertEqual(list(ranges["upper"].iloc[:1]), [201594])
+        self.assertTrue(ranges["upper"].notna().all())
@@ -0,0 +1,137 @@
+import unittest
+from decimal import Decimal
+
+import pandas as pd
+
+from demeter import TokenInfo, Broker, MarketInfo, DemeterError
+from demeter.uniswap import UniLpMarket, UniV3Pool, UniswapMarketStatus, LiquidityBook
+from demeter.uniswap.liquitidy_math import get_sqrt_ratio_at_tick, get_amount0, get_amount1
+from tests.common import assert_equal_with_error
+
+test_market = MarketInfo("market1")
+L = 58280013108171131649
+
+
+class TestLiquidityBook(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.eth = TokenInfo(name="eth", decimal=18)
+        self.usdc = TokenInfo(name="usdc", decimal=6)
+        self.pool = UniV3Pool(self.usdc, self.eth, 0.05, self.usdc)
+        super(TestLiquidityBook, self).__init__(*args, **kwargs)
+
+    def get_book(self):
+        return LiquidityBook.from_positions(self.pool, [(199000, 201000, L), (195000, 205000, L)])
+
+    def test_book(self):
+        book = self.get_book()
+        self.assertEqual(book.ticks, [195000, 199000, 201000, 205000])
+        self.assertEqual(book.liquidity_at(194999), 0)
+        self.assertEqual(book.liquidity_at(195000), L)
+        self.assertEqual(book.liquidity_at(200000), 2 * L)
+        self.assertEqual(book.liquidity_at(201000), L)
+        self.assertEqual(book.liquidity_at(205000), 0)
+        self.assertEqual(book.next_initialized_tick(199000, True), 199000)
+        self.assertEqual(book.next_initialized_tick(199000, False), 201000)
+        self.assertIsNone(book.next_initialized_tick(205000, False))
+
+        book.add_position(199000, 201000, -L)
+        self.assertEqual(book.ticks, [195000, 205000])
+        self.assertEqual(book.liquidity_at(200000), L)
+
+        df = pd.DataFrame({"tick": [195000, 205000], "liquidityNet": [L, -L]})
+        self.assertEqual(LiquidityBook.from_dataframe(self.pool, df).ticks, [195000, 205000])
+
+    def test_swap_in_range(self):
+        book = self.get_book()
+        sqrt_price = get_sqrt_ratio_at_tick(200000)
+        # 1000 usdc for eth
+        result = book.swap(1000 * 10**6, True, sqrt_price)
+        self.assertEqual(result.amount_in + result.fee, 1000 * 10**6)
+        self.assertEqual(result.fee, 500000)
+        self.assertEqual(result.crossed_ticks, [])
+        self.assertEqual(result.liquidity, 2 * L)
+        self.assertLess(result.sqrt_price_x96, sqrt_price)
+        # amounts match the change of price
+        self.assertEqual(get_amount0(result.sqrt_price_x96, sqrt_price, 2 * L, 0).quantize(Decimal(1)), 999500000)
+        expected_out = get_amount1(result.sqrt_price_x96, sqrt_price, 2 * L, 0)
+        self.assertTrue(0 <= expected_out - result.amount_out < 1)
+
+        # exact output of the same amount needs the same input
+        reverse = book.swap(result.amount_out, True, sqrt_price, exact_input=False)
+        self.assertEqual(reverse.amount_out, result.amount_out)
+        assert_equal_with_error(reverse.amount_in + reverse.fee, 1000 * 10**6, 0.000001)
+
+    def test_swap_cross_ticks(self):
+        book = self.get_book()
+        sqrt_price = get_sqrt_ratio_at_tick(200000)
+        # sell a lot of eth, price goes up and crosses 201000
+        amount = 200000 * 10**18
+        result = book.swap(amount, False, sqrt_price)
+        self.assertEqual(result.crossed_ticks, [201000])
+        self.assertEqual(result.liquidity, L)
+        self.assertTrue(201000 < result.tick < 205000)
+        self.assertEqual(result.amount_in + result.fee, amount)
+
+        # swap out all the liquidity, only part of amount is filled
+        result = book.swap(10**12 * 10**6, True, sqrt_price)
+        self.assertEqual(result.crossed_ticks, [199000, 195000])
+        self.assertEqual(result.liquidity, 0)
+        self.assertLess(result.amount_in + result.fee, 10**12 * 10**6)
+
+    def get_broker(self):
+        broker = Broker()
+        market = UniLpMarket(test_market, self.pool)
+        broker.add_market(market)
+        tick = 200000
+        price = market.tick_to_price(tick)
+        market.set_market_status(
+            UniswapMarketStatus(
+                timestamp=None,
+                data=pd.Series(
+                    data=[840860039126296093, 18714189922, 2 * L, tick, price],
+                    index=["inAmount0", "inAmount1", "currentLiquidity", "closeTick", "price"],
+                ),
+            ),
+            price=None,
+        )
+        broker.set_balance(self.eth, 500000)
+        broker.set_balance(self.usdc, 200000 * price)
+        return broker
+
+    def test_market_swap(self):
+        broker = self.get_broker()
+        market: UniLpMarket = broker.markets[test_market]
+        price = market.market_status.data.price
+        fee, base_amount, quote_got_no_book = market.sell(Decimal(10))
+        market.liquidity_book = self.get_book()
+
+        # small trade is close to bar price
+        fee, base_amount, quote_got = market.sell(Decimal(10))
+        self.assertEqual(fee, Decimal("0.005"))
+        self.assertLess(quote_got, quote_got_no_book)
+        assert_equal_with_error(quote_got, quote_got_no_book, 0.0001)
+        self.assertEqual(market.last_swap_result.crossed_ticks, [])
+
+        # large trade crosses ticks, and price is worse
+        eth_before = broker.assets[self.eth].balance
+        fee, base_amount, quote_got = market.sell(Decimal(200000))
+        self.assertEqual(market.last_swap_result.crossed_ticks, [201000])
+        self.assertLess(quote_got / base_amount, price * Decimal("0.95"))
+        self.assertEqual(broker.assets[self.eth].balance, eth_before - 200000)
+
+        usdc_before = broker.assets[self.usdc].balance
+        fee, quote_spent, base_got = market.buy(Decimal(10))
+        self.assertEqual(base_got, Decimal(10))
+        self.assertGreater(quote_spent, 10 * price)
+        self.assertEqual(broker.assets[self.usdc].balance, usdc_before - quote_spent)
+
+        # price is specified, liquidity book is not used
+        fee, base_amount, quote_got = market.sell(Decimal(10), price)
+        self.assertEqual(quote_got, quote_got_no_book)
+
+        with self.assertRaises(DemeterError):
+            market.sell(Decimal(1000000))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from datetime import date
 from decimal import Decimal
@@ -6,7 +8,10 @@ import pandas as pd
 
 import demeter
 from demeter import TokenInfo, Broker, MarketInfo, ChainType, MarketStatus
-from demeter.uniswap import UniLpMarket, UniV3Pool, UniV3PoolStatus, UniswapMarketStatus
+from demeter.uniswap import UniLpMarket, UniV3Pool, UniV3PoolStatus, UniswapMarketStatus, V3CoreLib, Position
+from demeter.uniswap._typing import position_dict_to_dataframe
+from demeter.uniswap.data import resample
+from tests.common import assert_equal_with_error
 
 test_market = MarketInfo("market1")
 
@@ -400,6 +405,255 @@ class TestUniLpMarket(unittest.TestCase):
         print("test_get_price")
         print(prices)
 
+    def test_position_index(self):
+        broker = self.get_broker()
+        broker.set_balance(self.eth, 100)
+        broker.set_balance(self.usdc, 100000)
+        market: UniLpMarket = broker.markets[test_market]
+        ranges = [(199000, 199500), (199500, 199900), (199900, 200100), (200100, 200500), (200500, 201000)]
+        positions = [market.add_liquidity_by_tick(lower, upper, 1, 1000)[0] for lower, upper in ranges]
+        self.assertEqual(market.get_in_range_positions(), [positions[2]])
+        self.assertEqual(market.get_in_range_positions(200300), [positions[3]])
+
+        def expected_balance():
+            sqrt_price = demeter.uniswap.helper.base_unit_price_to_sqrt_price_x96(
+                market.market_status.data.price, 6, 18, True
+            )
+            amount0, amount1 = Decimal(0), Decimal(0)
+            for key, position in market.positions.items():
+                a0, a1 = V3CoreLib.get_token_amounts(self.pool, key, sqrt_price, position.liquidity)
+                amount0, amount1 = amount0 + a0, amount1 + a1
+            return amount0, amount1
+
+        balance = market.get_market_balance()
+        self.assertEqual((balance.quote_in_position, balance.base_in_position), expected_balance())
+        # only positions out of range are cached
+        self.assertEqual(set(market.position_index.amount_cache.keys()), set(positions) - {positions[2]})
+
+        tick = 200300
+        market.set_market_status(
+            UniswapMarketStatus(
+                timestamp=None,
+                data=pd.Series(
+                    data=[840860039126296093, 18714189922, 58280013108171131649, tick, market.tick_to_price(tick)],
+                    index=["inAmount0", "inAmount1", "currentLiquidity", "closeTick", "price"],
+                ),
+            ),
+            price=None,
+        )
+        balance = market.get_market_balance()
+        self.assertEqual((balance.quote_in_position, balance.base_in_position), expected_balance())
+        self.assertEqual(market.position_index.amount_cache[positions[2]][0], 1)  # tick is above range
+
+        market.remove_liquidity(positions[0], remove_dry_pool=False)
+        balance = market.get_market_balance()
+        self.assertEqual((balance.quote_in_position, balance.base_in_position), expected_balance())
+        self.assertEqual(market.position_index.amount_cache[positions[0]][1], 0)
+
+        # liquidity array for fee is synced with positions
+        market.add_liquidity_by_tick(*ranges[1], 1, 1000)
+        market.remove_liquidity(positions[3], market.positions[positions[3]].liquidity // 2, collect=False)
+        index = market.position_index
+        self.assertEqual(list(index.liquidity), [Decimal(market.positions[k].liquidity) for k in index.keys])
+
+    def test_position_snapshot(self):
+        broker = self.get_broker()
+        broker.set_balance(self.eth, 10)
+        broker.set_balance(self.usdc, 10000)
+        market: UniLpMarket = broker.markets[test_market]
+        position, _, _, liquidity = market.add_liquidity_by_tick(199000, 201000, 1, 1000)
+        market.update()
+        self.assertTrue(isinstance(market.positions, dict))
+        self.assertFalse(hasattr(market.positions[position], "__dict__"))
+        self.assertEqual(market.positions.total_liquidity(), liquidity)
+
+        snapshot = market.snapshot_positions()
+        balance = market.get_market_balance()
+        pending = market.positions[position].pending_amount0
+        self.assertGreater(pending, 0)
+        market.update()
+        market.add_liquidity_by_tick(199500, 200500, 1, 1000)
+        self.assertEqual(len(market.positions), 2)
+        self.assertGreater(market.positions[position].pending_amount0, pending)
+
+        market.restore_positions(snapshot)
+        self.assertEqual(list(market.positions.keys()), [position])
+        self.assertEqual(market.positions[position].pending_amount0, pending)
+        self.assertEqual(market.positions[position].liquidity, liquidity)
+        self.assertEqual(market.get_market_balance().net_value, balance.net_value)
+        self.assertEqual(len(market.position_index), 1)
+
+        df = market.positions.to_dataframe()
+        self.assertEqual(df.iloc[0].lower_tick, position.lower_tick)
+        self.assertEqual(df.iloc[0].liquidity, liquidity)
+        self.assertEqual(df.iloc[0].pending0, pending)
+        printed = position_dict_to_dataframe(market.positions)
+        self.assertEqual(list(printed.columns), ["lower_tick", "upper_tick", "pending0", "pending1", "liquidity"])
+        self.assertEqual(printed.iloc[0].liquidity, liquidity)
+
+    def test_batch_operations(self):
+        actions = {}
+        results = {}
+        ranges = [(199000, 199900), (199900, 200100), (200100, 201000), (199900, 200100)]
+        for mode in ["single", "batch"]:
+            broker = self.get_broker()
+            broker.set_balance(self.eth, 10)
+            broker.set_balance(self.usdc, 10000)
+            market: UniLpMarket = broker.markets[test_market]
+            actions[mode] = []
+            market._record_action_callback = actions[mode].append
+            if mode == "single":
+                added = [market.add_liquidity_by_tick(lower, upper, 1, 1000) for lower, upper in ranges]
+            else:
+                added = market.add_liquidity_batch([(lower, upper, 1, 1000) for lower, upper in ranges])
+            self.assertEqual(len(market.positions), 3)
+            market.update()
+            collected = market.collect_fee_batch([added[0][0]]) if mode == "batch" else market.collect_fee(added[0][0])
+            if mode == "single":
+                removed = [market.remove_liquidity(p) for p in list(market.positions.keys())]
+                removed = (sum(r[0] for r in removed), sum(r[1] for r in removed))
+            else:
+                removed = market.remove_liquidity_batch()
+            results[mode] = (
+                added,
+                collected,
+                removed,
+                broker.get_token_balance(self.eth),
+                broker.get_token_balance(self.usdc),
+                len(market.positions),
+            )
+        self.assertEqual(results["single"][0], results["batch"][0])
+        self.assertEqual(results["single"][1], results["batch"][1])
+        self.assertEqual(results["single"][5], 0)
+        self.assertEqual(results["batch"][5], 0)
+        single_values = [*results["single"][2], *results["single"][3:5]]
+        batch_values = [*results["batch"][2], *results["batch"][3:5]]
+        for single, batch in zip(single_values, batch_values):
+            self.assertTrue(assert_equal_with_error(single, batch, 1e-20))
+        self.assertEqual(len(actions["batch"]), 3)
+        self.assertEqual(actions["batch"][0].positions, [a[0] for a in results["batch"][0]])
+
+    def test_batch_add_insufficient_balance(self):
+        broker = self.get_broker()
+        market: UniLpMarket = broker.markets[test_market]
+        eth, usdc = broker.get_token_balance(self.eth), broker.get_token_balance(self.usdc)
+        with self.assertRaises(AssertionError):
+            market.add_liquidity_batch([(199900, 200100, 0.8, 100000), (199900, 200100, 0.8, 100000)])
+        self.assertEqual(len(market.positions), 0)
+        self.assertEqual(broker.get_token_balance(self.eth), eth)
+        self.assertEqual(broker.get_token_balance(self.usdc), usdc)
+
+    def test_market_balance_cache(self):
+        broker = self.get_broker()
+        market: UniLpMarket = broker.markets[test_market]
+        balance = market.get_market_balance()
+        self.assertIs(market.get_market_balance(), balance)
+        position, _, _, _ = market.add_liquidity_by_tick(199900, 200100, Decimal("0.5"), 500)
+        balance = market.get_market_balance()
+        self.assertEqual(balance.position_count, 1)
+        self.assertIs(market.get_market_balance(), balance)
+        # earn fee
+        market.update()
+        self.assertIsNot(market.get_market_balance(), balance)
+        self.assertGreater(market.get_market_balance().quote_uncollected, 0)
+        balance = market.get_market_balance()
+        market.transfer_position_out(position)
+        self.assertEqual(market.get_market_balance().position_count, 0)
+        self.assertIsNot(market.get_market_balance(), balance)
+        market.transfer_position_in(position)
+
+        # positions changed directly
+        balance = market.get_market_balance()
+        market.positions[position].pending_amount0 += Decimal(1)
+        self.assertEqual(market.get_market_balance().quote_uncollected, balance.quote_uncollected + 1)
+        balance = market.get_market_balance()
+        market.positions[position].liquidity //= 2
+        self.assertLess(market.get_market_balance().base_in_position, balance.base_in_position)
+        self.assertEqual(market.position_index.liquidity[0], Decimal(market.positions[position].liquidity))
+        balance = market.get_market_balance()
+        old = market.positions[position]
+        zero = Decimal(0)
+        market.positions[position] = Position(zero, zero, old.liquidity * 2, old.lower_price, old.upper_price)
+        self.assertGreater(market.get_market_balance().base_in_position, balance.base_in_position)
+        self.assertEqual(market.get_market_balance().quote_uncollected, 0)
+        # replaced position is not counted any more
+        old.liquidity = 0
+        self.assertEqual(market.position_index.liquidity[0], Decimal(market.positions[position].liquidity))
+        balance = market.get_market_balance()
+        market.positions.clear()
+        self.assertEqual(market.get_market_balance().position_count, 0)
+        self.assertIsNot(market.get_market_balance(), balance)
+
+    def test_load_data_cache(self):
+        pool_address = "0x45dda9cb7c25131df268515131f647d726f50608"
+        args = (ChainType.polygon.name, pool_address, date(2023, 8, 15), date(2023, 8, 15))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            market = UniLpMarket(test_market, self.pool)
+            market.data_path = "data"
+            market.load_data(*args, cache_dir=cache_dir)
+            # prepared data and aggregated data
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+            cached = UniLpMarket(test_market, self.pool)
+            cached.data_path = "data"
+            with self.assertLogs(cached.logger, "INFO") as logs:
+                cached.load_data(*args, cache_dir=cache_dir)
+            self.assertTrue(any("from cache" in line for line in logs.output))
+            pd.testing.assert_frame_equal(market.data, cached.data)
+            self.assertEqual(type(cached.data.iloc[0].inAmount0), Decimal)
+            self.assertEqual(list(cached._aggregates.keys()), list(market._aggregates.keys()))
+            for interval, df in market._aggregates.items():
+                pd.testing.assert_frame_equal(df, cached._aggregates[interval])
+            # cache is not used by another pool
+            other = UniLpMarket(test_market, UniV3Pool(self.usdc, self.eth, 0.05, self.eth))
+            other.data_path = "data"
+            other.load_data(*args, cache_dir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 4)
+
+    def test_resample_aggregates(self):
+        market = UniLpMarket(test_market, self.pool)
+        market.data_path = "data"
+        market.load_data(
+            ChainType.polygon.name, "0x45dda9cb7c25131df268515131f647d726f50608", date(2023, 8, 15), date(2023, 8, 15)
+        )
+        minute_data = market.data
+        for interval in ["1h", "15min", "45min", "1d"]:
+            market._resample(interval)
+            pd.testing.assert_frame_equal(market.data, resample(minute_data, interval))
+        # levels which can divide 45min are built
+        self.assertEqual(set(market._aggregates.keys()), {"5min", "15min", "45min", "1h", "1d"})
+
+        aggregated = market._aggregates["1h"]
+        market._resample("1h")
+        self.assertIs(market._aggregates["1h"], aggregated)
+        # columns added by strategy are not saved
+        market.data["ma"] = 1
+        self.assertNotIn("ma", aggregated.columns)
+
+        # new data is set, aggregated data is dropped
+        market.data = minute_data.iloc[:120]
+        market._resample("1h")
+        self.assertEqual(len(market.data.index), 2)
+        self.assertEqual(list(market._aggregates.keys()), ["5min", "15min", "1h"])
+
+    def test_add_statistic_column_vectorized(self):
+        market = UniLpMarket(test_market, self.pool)
+        market.data_path = "data"
+        market.load_data(
+            ChainType.polygon.name, "0x45dda9cb7c25131df268515131f647d726f50608", date(2023, 8, 15), date(2023, 8, 15)
+        )
+        exact = market.data
+        row = exact.iloc[100]
+        self.assertEqual(row.price, market.tick_to_price(row.closeTick))
+        self.assertEqual(row.low, market.tick_to_price(row.highestTick))  # token0 is quote
+        self.assertEqual(row.volume0, Decimal(row.inAmount0) / 10**6)
+
+        df = exact.copy()
+        market.add_statistic_column(df, vectorized=True)
+        for column in ["open", "price", "low", "high", "volume0", "volume1"]:
+            self.assertEqual(df[column].dtype, float)
+            diff = ((df[column] - exact[column].astype(float)).abs() / exact[column].astype(float)).max()
+            self.assertLess(diff, 1e-9, column)
+
     def test_even_rebalance_buy(self):
         broker = self.get_broker()
         broker.set_balance(self.usdc, 3000)
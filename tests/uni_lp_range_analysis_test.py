@@ -0,0 +1,47 @@
+import unittest
+
+from demeter.uniswap import UniLpMarket, AddLiquidityAction, RangeAnalysis, range_grid, heatmap
+from tests import actuator_test
+from tests.actuator_test import AddLiquidity, test_market
+
+
+class UniLpRangeAnalysisTest(unittest.TestCase):
+    def test_same_as_backtest(self):
+        actuator = actuator_test.TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = AddLiquidity()
+        actuator.run(print_result=False)
+        market: UniLpMarket = actuator.broker.markets[test_market]
+        position_info, position = list(market.positions.items())[0]
+        action: AddLiquidityAction = [a for a in actuator.actions if isinstance(a, AddLiquidityAction)][0]
+        entry_time = market.data.index[2]
+        capital = float(action.base_amount_actual * market.data.price.iloc[2] + action.quote_amount_actual)
+
+        analysis = RangeAnalysis(market.pool_info, market.data)
+        series = analysis.series(position_info.lower_tick, position_info.upper_tick, entry_time, capital)
+        self.assertEqual(len(series.index), len(market.data.index) - 2)
+        last = series.iloc[-1]
+        quote_amount, base_amount = market.get_position_amount(position_info)
+        self.assertAlmostEqual(last.quote_fee / float(position.pending_amount0), 1, 6)
+        self.assertAlmostEqual(last.base_fee / float(position.pending_amount1), 1, 6)
+        self.assertAlmostEqual(last.quote_in_position / float(quote_amount), 1, 6)
+        self.assertAlmostEqual(last.base_in_position / float(base_amount), 1, 6)
+
+        summary = analysis.analyze([(position_info.lower_tick, position_info.upper_tick)], entry_time, capital)
+        self.assertAlmostEqual(summary.liquidity[0] / position.liquidity, 1, 6)
+        self.assertAlmostEqual(summary.net_value[0], last.net_value, 6)
+
+    def test_grid(self):
+        actuator = actuator_test.TestActuator.get_actuator_with_uni_market()
+        market: UniLpMarket = actuator.broker.markets[test_market]
+        ranges = range_grid(range(199000, 203000, 500), range(199000, 203000, 500))
+        self.assertEqual(len(ranges), 8 * 7 / 2)
+        analysis = RangeAnalysis(market.pool_info, market.data)
+        summary = analysis.analyze(ranges, market.data.index[0], 1000)
+        net_values = analysis.net_values(ranges, market.data.index[0], 1000)
+        self.assertEqual(len(summary.index), len(ranges))
+        # final net values are the same as the last row of series
+        for i, row in summary.iterrows():
+            self.assertAlmostEqual(row.net_value, net_values[(row.lower_tick, row.upper_tick)].iloc[-1], 6)
+        self.assertTrue((net_values.iloc[0] - 1000).abs().max() < 1)
+        table = heatmap(summary, "fee_value")
+        self.assertEqual(table.shape, (7, 7))
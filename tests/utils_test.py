@@ -1,6 +1,10 @@
 import unittest
+from datetime import date
+
+import pandas as pd
+
 from demeter import UnitDecimal, Strategy, AccountStatus, TokenInfo
-from demeter.utils import get_formatted, ModeEnum, ForColorEnum, BackColorEnum
+from demeter.utils import get_formatted, ModeEnum, ForColorEnum, BackColorEnum, iter_days, load_daily_files
 
 
 class UtilsTest(unittest.TestCase):
@@ -97,3 +101,16 @@ class UtilsTest(unittest.TestCase):
         print(get_formatted("white", back=BackColorEnum.white))
         print("")
         print(get_formatted("Compound", ModeEnum.invert, ForColorEnum.red))
+
+    def test_load_daily_files(self):
+        days = iter_days(date(2023, 8, 14), date(2023, 8, 17))
+        self.assertEqual(len(days), 4)
+        self.assertEqual(days[-1], date(2023, 8, 17))
+        paths = [f"data/polygon-0x45dda9cb7c25131df268515131f647d726f50608-{d.isoformat()}.minute.csv" for d in days]
+        loaded = []
+        df = load_daily_files(paths, pd.read_csv, max_workers=4, on_loaded=loaded.append)
+        self.assertEqual(loaded, paths)
+        expected = pd.concat([pd.read_csv(p) for p in paths])
+        pd.testing.assert_frame_equal(df, expected)
+        pd.testing.assert_frame_equal(load_daily_files(paths, pd.read_csv, max_workers=1), expected)
+        self.assertTrue(load_daily_files([], pd.read_csv).empty)